@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from .models import AccountProfile, RevokedToken
+
+
+@admin.register(RevokedToken)
+class RevokedTokenAdmin(admin.ModelAdmin):
+    list_display = ('jti', 'revoked_at', 'expires_at')
+    search_fields = ('jti',)
+
+
+@admin.register(AccountProfile)
+class AccountProfileAdmin(admin.ModelAdmin):
+    list_display = ('user', 'account_type', 'terms_accepted_at')
+    list_filter = ('account_type',)
+    raw_id_fields = ('user',)
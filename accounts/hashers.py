@@ -0,0 +1,16 @@
+from django.contrib.auth import hashers
+
+from .hashing import hashing_settings
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2 hasher with the cost from PASSWORD_HASHING['ITERATIONS'].
+
+    The algorithm name is unchanged, so existing hashes still verify, and a
+    hash made with another iteration count is upgraded on the next login.
+    """
+
+    @property
+    def iterations(self):
+        return hashing_settings()['ITERATIONS'] or super().iterations
@@ -0,0 +1,147 @@
+"""
+Password hashing off the request threads.
+
+A PBKDF2 check costs the better part of a second of CPU by design, so a
+burst of logins would otherwise take every worker for as long as it lasts,
+and other requests would queue behind it.  Instead, hashes are computed in a
+small process pool of PASSWORD_HASHING['WORKERS'] processes per server
+process, so hashing never uses more than that many cores.  At most
+PASSWORD_HASHING['MAX_PENDING'] hashes wait for a free worker.  Beyond that,
+``HashingBusy`` is raised at once, without hashing anything, and the API
+answers 429 with a Retry-After header rather than letting the queue grow.
+The waiting request thread only blocks on the result and uses no CPU.
+
+``check_password`` also upgrades the stored hash when the hasher settings
+have changed, e.g. PASSWORD_HASHING['ITERATIONS'] (see accounts.hashers).
+The new hash is computed in the pool too and saved only if the password has
+not changed in the meantime.
+
+With WORKERS = 0 hashes are computed on the request thread, still within
+the same limit on concurrent hashes.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+DEFAULTS = {
+    'WORKERS': 2,
+    'MAX_PENDING': 8,
+    'TIMEOUT': 10.0,
+    'RETRY_AFTER': 1,
+    'ITERATIONS': None,
+}
+
+
+class HashingBusy(Exception):
+    def __init__(self, retry_after):
+        super().__init__('Too many sign-ins at the moment; retry shortly')
+        self.retry_after = retry_after
+
+
+def hashing_settings():
+    return {**DEFAULTS, **getattr(settings, 'PASSWORD_HASHING', {})}
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+
+
+def _check(password, encoded):
+    """``(valid, upgraded hash or None)``."""
+    upgraded = []
+    valid = hashers.check_password(password, encoded, setter=lambda raw: upgraded.append(hashers.make_password(raw)))
+    return valid, upgraded[0] if upgraded else None
+
+
+class HashingPool:
+    def __init__(self, workers, max_pending, timeout, retry_after):
+        self.workers = workers
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        with self._lock:
+            # A pool inherited through fork has no workers in this process.
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context('spawn'), initializer=_init_worker,
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def _reset(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, function, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusy(self.retry_after)
+        if not self.workers:
+            try:
+                return function(*args)
+            finally:
+                self._slots.release()
+        executor = self._get_executor()
+        try:
+            future = executor.submit(function, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _future: self._slots.release())
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            raise HashingBusy(self.retry_after)
+        except BrokenProcessPool:
+            # A worker died; start a new pool for the next request.
+            self._reset(executor)
+            raise HashingBusy(self.retry_after)
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+_pool = None
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        config = hashing_settings()
+        _pool = HashingPool(config['WORKERS'], config['MAX_PENDING'], config['TIMEOUT'], config['RETRY_AFTER'])
+    return _pool
+
+
+def make_password(password):
+    return get_pool().run(hashers.make_password, password)
+
+
+def check_password(user, password):
+    """Whether ``password`` is ``user``'s, upgrading the stored hash if its hasher settings changed."""
+    encoded = user.password
+    if not encoded or not hashers.is_password_usable(encoded):
+        # Same cost as a real check, so unknown accounts cannot be told apart by timing.
+        make_password(password)
+        return False
+    valid, upgraded = get_pool().run(_check, password, encoded)
+    if valid and upgraded:
+        type(user)._default_manager.filter(pk=user.pk, password=encoded).update(password=upgraded)
+        user.password = upgraded
+    return valid
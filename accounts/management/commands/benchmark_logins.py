@@ -0,0 +1,100 @@
+import json
+import threading
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client, override_settings
+
+from accounts import hashing
+
+EMAIL = 'login-bench@example.com'
+PASSWORD = 'login-bench-Password-1'
+LOGIN = 'mutation($email: String!, $password: String!) { login(email: $email, password: $password) { token } }'
+PROBE = '{ __typename }'
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+def _post(client, query, variables=None):
+    started = perf_counter()
+    response = client.post(
+        '/graphql/', json.dumps({'query': query, 'variables': variables or {}}), content_type='application/json',
+    )
+    return response.status_code, perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = 'Login throughput and latency at increasing concurrency, with the hashing pool and inline'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+        parser.add_argument('--duration', type=float, default=10.0, help='Seconds per concurrency level')
+        parser.add_argument('--workers', type=int, nargs='+', help='Pool sizes to compare; 0 hashes inline')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        user = User.objects.filter(email=EMAIL).first() or User(username=EMAIL, email=EMAIL)
+        user.set_password(PASSWORD)
+        user.save()
+        config = hashing.hashing_settings()
+        configured = hashing._pool
+        # The login rate limit would otherwise answer most of these with 429.
+        throttling = override_settings(RATE_LIMITS={**getattr(settings, 'RATE_LIMITS', {}), 'ENABLED': False})
+        throttling.enable()
+        try:
+            for workers in options['workers'] or [config['WORKERS'], 0]:
+                hashing._pool = hashing.HashingPool(
+                    workers, config['MAX_PENDING'], config['TIMEOUT'], config['RETRY_AFTER'],
+                )
+                # Start the workers before measuring.
+                hashing.check_password(user, PASSWORD)
+                label = f'{workers} hashing processes' if workers else 'inline hashing'
+                self.stdout.write(f'{label}, {config["MAX_PENDING"]} pending at most')
+                for concurrency in options['concurrency']:
+                    self._level(concurrency, options['duration'])
+                hashing._pool.shutdown()
+        finally:
+            hashing._pool = configured
+            throttling.disable()
+
+    def _level(self, concurrency, duration):
+        stop = threading.Event()
+        logins, rejected, probes = [], [], []
+
+        def client_loop():
+            client = Client(SERVER_NAME='localhost')
+            while not stop.is_set():
+                status, elapsed = _post(client, LOGIN, {'email': EMAIL, 'password': PASSWORD})
+                (logins if status == 200 else rejected).append(elapsed)
+            connections.close_all()
+
+        def probe_loop():
+            # A cheap request next to the logins, standing in for the rest of the traffic.
+            client = Client(SERVER_NAME='localhost')
+            while not stop.is_set():
+                probes.append(_post(client, PROBE)[1])
+                stop.wait(0.01)
+            connections.close_all()
+
+        threads = [threading.Thread(target=client_loop) for _ in range(concurrency)]
+        threads.append(threading.Thread(target=probe_loop))
+        started = perf_counter()
+        for thread in threads:
+            thread.start()
+        stop.wait(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = perf_counter() - started
+        self.stdout.write(
+            f'  {concurrency:>3} clients: {len(logins) / elapsed:6.1f} logins/s, '
+            f'p50 {percentile(logins, 0.5) * 1000:7.1f} ms, p99 {percentile(logins, 0.99) * 1000:7.1f} ms; '
+            f'{len(rejected)} rejected with 429 (p99 {percentile(rejected, 0.99) * 1000:.1f} ms); '
+            f'other requests p99 {percentile(probes, 0.99) * 1000:.1f} ms'
+        )
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from accounts.tokens import purge_revoked
+
+
+class Command(BaseCommand):
+    help = 'Delete revoked refresh tokens that have expired'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Deleted {purge_revoked()} revoked tokens')
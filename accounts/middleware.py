@@ -0,0 +1,29 @@
+from django.contrib.auth.models import AnonymousUser
+
+from .tokens import TokenError, TokenUser, verify
+
+
+class JWTAuthenticationMiddleware:
+    """
+    Authenticates requests that send ``Authorization: Bearer <access token>``.
+
+    Goes after AuthenticationMiddleware and replaces its session user, so
+    token requests never read the session or the user table.  A request
+    with an invalid token is anonymous, with the reason in
+    ``request.auth_error``.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.auth_error = None
+        header = request.META.get('HTTP_AUTHORIZATION', '')
+        scheme, _, token = header.partition(' ')
+        if scheme.lower() in ('bearer', 'jwt') and token.strip():
+            try:
+                request.user = TokenUser(verify(token.strip()))
+            except TokenError as error:
+                request.user = AnonymousUser()
+                request.auth_error = str(error)
+        return self.get_response(request)
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AccountProfile',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='account_profile', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('account_type', models.CharField(choices=[('CUSTOMER', 'Customer'), ('VENDOR', 'Vendor'), ('RESELLER', 'Reseller'), ('SUPPLIER', 'Supplier')], default='CUSTOMER', max_length=20)),
+                ('terms_accepted_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
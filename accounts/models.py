@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db import models
+
+
+class RevokedToken(models.Model):
+    """A token revoked before it expired; see accounts.tokens."""
+
+    jti = models.CharField(max_length=32, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.jti
+
+
+class AccountProfile(models.Model):
+    CUSTOMER = 'CUSTOMER'
+    VENDOR = 'VENDOR'
+    RESELLER = 'RESELLER'
+    SUPPLIER = 'SUPPLIER'
+    ACCOUNT_TYPES = [
+        (CUSTOMER, 'Customer'),
+        (VENDOR, 'Vendor'),
+        (RESELLER, 'Reseller'),
+        (SUPPLIER, 'Supplier'),
+    ]
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='account_profile',
+    )
+    account_type = models.CharField(max_length=20, choices=ACCOUNT_TYPES, default=CUSTOMER)
+    terms_accepted_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.user_id} ({self.account_type})'
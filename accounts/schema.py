@@ -0,0 +1,174 @@
+import graphene
+from django.contrib.auth import get_user_model, password_validation
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from graphene.types.generic import GenericScalar
+from graphene_django import DjangoObjectType
+from graphql import GraphQLError
+
+from .hashing import HashingBusy, check_password, make_password
+from .models import AccountProfile
+from .tokens import REFRESH, TokenError, issue_pair, revoke, rotate, verify
+
+
+class MeType(DjangoObjectType):
+    account_type = graphene.String()
+
+    class Meta:
+        model = get_user_model()
+        fields = ('id', 'username', 'email', 'first_name', 'last_name')
+
+    def resolve_account_type(self, info):
+        profile = getattr(self, 'account_profile', None)
+        return profile.account_type if profile is not None else AccountProfile.CUSTOMER
+
+
+def busy_error(info, error):
+    # Read by the GraphQL view, which then answers 429 with Retry-After.
+    info.context.retry_after = error.retry_after
+    return GraphQLError(str(error), extensions={'code': 'RATE_LIMITED', 'retryAfter': error.retry_after})
+
+
+def current_user_id(info):
+    user = info.context.user
+    if not user.is_authenticated:
+        # auth_error says why a bearer token was refused, e.g. so clients refresh an expired one.
+        reason = getattr(info.context, 'auth_error', None)
+        extensions = {'code': 'UNAUTHENTICATED', 'reason': reason} if reason else None
+        raise GraphQLError('Authentication required', extensions=extensions)
+    return user.pk
+
+
+class Query(graphene.ObjectType):
+    view_me = graphene.Field(MeType)
+
+    def resolve_view_me(self, info):
+        current_user_id(info)
+        return info.context.user
+
+
+class Register(graphene.Mutation):
+    class Arguments:
+        first_name = graphene.String(required=True)
+        last_name = graphene.String(required=True)
+        email = graphene.String(required=True)
+        password1 = graphene.String(required=True)
+        password2 = graphene.String(required=True)
+        account_type = graphene.String(required=True)
+        terms_accepted = graphene.Boolean(required=True)
+
+    success = graphene.Boolean(required=True)
+    token = graphene.String()
+    refresh_token = graphene.String()
+    errors = GenericScalar()
+
+    def mutate(self, info, first_name, last_name, email, password1, password2, account_type, terms_accepted):
+        User = get_user_model()
+        email = email.strip().lower()
+        account_type = account_type.upper()
+        errors = {}
+        try:
+            validate_email(email)
+        except ValidationError as error:
+            errors['email'] = error.messages
+        if 'email' not in errors and User._default_manager.filter(email__iexact=email).exists():
+            errors['email'] = ['A user with that email already exists.']
+        if account_type not in dict(AccountProfile.ACCOUNT_TYPES):
+            errors['accountType'] = [f'{account_type} is not a valid account type.']
+        if not terms_accepted:
+            errors['termsAccepted'] = ['You must accept the terms and conditions.']
+        if password1 != password2:
+            errors['password2'] = ["The two password fields didn't match."]
+        user = User(username=email, email=email, first_name=first_name.strip(), last_name=last_name.strip())
+        if 'password2' not in errors:
+            try:
+                password_validation.validate_password(password1, user)
+            except ValidationError as error:
+                errors['password2'] = error.messages
+        if errors:
+            return Register(success=False, errors=errors)
+        try:
+            user.password = make_password(password1)
+        except HashingBusy as error:
+            raise busy_error(info, error)
+        try:
+            with transaction.atomic():
+                user.save()
+                AccountProfile.objects.create(user=user, account_type=account_type, terms_accepted_at=timezone.now())
+        except IntegrityError:
+            return Register(success=False, errors={'email': ['A user with that email already exists.']})
+        token, refresh_token = issue_pair(user)
+        return Register(success=True, token=token, refresh_token=refresh_token)
+
+
+class Login(graphene.Mutation):
+    class Arguments:
+        email = graphene.String(required=True)
+        password = graphene.String(required=True)
+
+    token = graphene.String(required=True)
+    refresh_token = graphene.String(required=True)
+    user = graphene.Field(MeType)
+
+    def mutate(self, info, email, password):
+        User = get_user_model()
+        user = (
+            User._default_manager.filter(email__iexact=email.strip(), is_active=True)
+            .select_related('account_profile').first()
+        )
+        try:
+            valid = check_password(user or User(), password)
+        except HashingBusy as error:
+            raise busy_error(info, error)
+        if user is None or not valid:
+            raise GraphQLError('Please enter valid credentials')
+        token, refresh_token = issue_pair(user)
+        return Login(token=token, refresh_token=refresh_token, user=user)
+
+
+class RefreshToken(graphene.Mutation):
+    """Exchange a refresh token for a new pair; the old refresh token stops working."""
+
+    class Arguments:
+        refresh_token = graphene.String(required=True)
+
+    token = graphene.String(required=True)
+    refresh_token = graphene.String(required=True)
+
+    def mutate(self, info, refresh_token):
+        try:
+            _user, token, refresh_token = rotate(refresh_token)
+        except TokenError as error:
+            raise GraphQLError(str(error), extensions={'code': 'INVALID_TOKEN'})
+        return RefreshToken(token=token, refresh_token=refresh_token)
+
+
+class Logout(graphene.Mutation):
+    class Arguments:
+        refresh_token = graphene.String(required=True)
+
+    message = graphene.String()
+
+    def mutate(self, info, refresh_token):
+        try:
+            claims = verify(refresh_token, REFRESH)
+        except TokenError as error:
+            raise GraphQLError(str(error), extensions={'code': 'INVALID_TOKEN'})
+        user = info.context.user
+        if user.is_authenticated and str(user.pk) != claims['sub']:
+            raise GraphQLError('You do not have permission to perform this action')
+        revoke(claims)
+        # Also end the access token the request was made with.
+        access = getattr(user, 'token_claims', None)
+        if access is not None:
+            revoke(access)
+        return Logout(message='Logged out')
+
+
+class Mutation(graphene.ObjectType):
+    register = Register.Field()
+    login = Login.Field()
+    refresh_token = RefreshToken.Field()
+    logout = Logout.Field()
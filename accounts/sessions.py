@@ -0,0 +1,131 @@
+"""
+Session engine: cached sessions that write to the database only when needed.
+
+Like ``django.contrib.sessions.backends.cached_db``, sessions are read from
+the cache and fall back to the django_session table, so admin and GraphiQL
+requests stop reading the main database.  Saving differs in two ways:
+
+* A save whose data is unchanged is skipped, e.g. a view re-setting the
+  same value, or the save SESSION_SAVE_EVERY_REQUEST does on every
+  response.  A save is only written when the data changed or when the
+  stored expiry has fallen SESSIONS['WRITE_INTERVAL'] seconds behind the
+  one the cookie gets.  A sliding session may therefore expire up to
+  WRITE_INTERVAL early, and costs one write per interval instead of one per
+  request.
+* Along with the data, the cache holds a digest of it and the stored
+  expiry, so that check needs no query.
+
+The cache is only used when SESSIONS['CACHE'] names one, which must be
+shared by all workers, e.g. Redis.  A per-process cache would keep serving a
+session after another worker changed or deleted it.  Without one, sessions
+are read from the database on each request, and unchanged ones are still
+not written back.
+
+``clear_expired``, run by ``manage.py clearsessions``, deletes expired
+sessions in chunks of SESSIONS['PURGE_BATCH'], each in its own short
+transaction, so a large backlog never holds the write lock for long.
+"""
+
+import hashlib
+from datetime import timedelta
+from time import sleep
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends import cached_db, db
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.db import transaction
+from django.utils import timezone
+
+DEFAULTS = {
+    'CACHE': None,
+    'WRITE_INTERVAL': 60 * 60,
+    'PURGE_BATCH': 1000,
+    'PURGE_PAUSE': 0.05,
+}
+
+
+def session_settings():
+    return {**DEFAULTS, **getattr(settings, 'SESSIONS', {})}
+
+
+class SessionStore(cached_db.SessionStore):
+    cache_key_prefix = 'accounts.sessions'
+
+    def __init__(self, session_key=None):
+        super().__init__(session_key)
+        config = session_settings()
+        self._cache = caches[config['CACHE']] if config['CACHE'] else DummyCache('', {})
+        self.write_interval = timedelta(seconds=config['WRITE_INTERVAL'])
+        # (digest, expire_date) of the row as last read or written.
+        self._stored = None
+
+    def _digest(self, data):
+        return hashlib.blake2b(self.serializer().dumps(data), digest_size=16).digest()
+
+    def _cache_set(self, data):
+        digest, expire_date = self._stored
+        try:
+            self._cache.set(self.cache_key, (data, digest, expire_date), self.get_expiry_age(expiry=expire_date))
+        except Exception:
+            cached_db.logger.exception('Error saving to cache (%s)', self._cache)
+
+    def load(self):
+        try:
+            cached = self._cache.get(self.cache_key)
+        except Exception:
+            # Invalid keys raise on some backends; treat as a miss (see cached_db).
+            cached = None
+        if cached is not None:
+            data, digest, expire_date = cached
+            self._stored = (digest, expire_date)
+            return data
+        session = self._get_session_from_db()
+        if session is None:
+            self._stored = None
+            return {}
+        data = self.decode(session.session_data)
+        self._stored = (self._digest(data), session.expire_date)
+        self._cache_set(data)
+        return data
+
+    async def aload(self):
+        return await sync_to_async(self.load)()
+
+    def _unchanged(self, data):
+        if self._stored is None:
+            return False
+        digest, expire_date = self._stored
+        return digest == self._digest(data) and self.get_expiry_date() - expire_date < self.write_interval
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        data = self._get_session(no_load=must_create)
+        if not must_create and self._unchanged(data):
+            return
+        expire_date = self.get_expiry_date()
+        db.SessionStore.save(self, must_create)
+        self._stored = (self._digest(data), expire_date)
+        self._cache_set(data)
+
+    async def asave(self, must_create=False):
+        return await sync_to_async(self.save)(must_create)
+
+    @classmethod
+    def clear_expired(cls):
+        config = session_settings()
+        sessions = cls.get_model_class().objects
+        while True:
+            with transaction.atomic():
+                keys = list(
+                    sessions.filter(expire_date__lt=timezone.now())
+                    .values_list('session_key', flat=True)[:config['PURGE_BATCH']]
+                )
+                if keys:
+                    sessions.filter(session_key__in=keys).delete()
+            if len(keys) < config['PURGE_BATCH']:
+                return
+            # Let other writers take the lock between chunks.
+            sleep(config['PURGE_PAUSE'])
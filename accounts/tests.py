@@ -0,0 +1,190 @@
+from django.conf import settings
+from django.core.cache import caches
+
+from accounts.models import AccountProfile, RevokedToken
+from accounts.sessions import SessionStore
+from accounts.tokens import ACCESS, TokenError, TokenUser, decode, encode, issue, issue_pair, revoke, rotate, verify
+from src.testing import PASSWORD, APITestCase, make_user
+
+REGISTER = '''
+mutation($email: String!, $password: String!, $accountType: String!) {
+  register(firstName: "Ada", lastName: "Lovelace", email: $email, password1: $password, password2: $password,
+           accountType: $accountType, termsAccepted: true) { success token refreshToken errors }
+}
+'''
+LOGIN = '''
+mutation($email: String!, $password: String!) {
+  login(email: $email, password: $password) { token refreshToken user { id email accountType } }
+}
+'''
+REFRESH = 'mutation($token: String!) { refreshToken(refreshToken: $token) { token refreshToken } }'
+LOGOUT = 'mutation($token: String!) { logout(refreshToken: $token) { message } }'
+VIEW_ME = '{ viewMe { email firstName accountType } }'
+
+
+class RegisterTests(APITestCase):
+    def test_register(self):
+        data = self.query(REGISTER, {'email': 'Ada@Example.com', 'password': PASSWORD, 'accountType': 'supplier'})
+        self.assertTrue(data['register']['success'])
+        self.assertTrue(data['register']['token'])
+        profile = AccountProfile.objects.get(user__email='ada@example.com')
+        self.assertEqual(profile.account_type, AccountProfile.SUPPLIER)
+
+    def test_duplicate_email(self):
+        make_user(email='ada@example.com')
+        data = self.query(REGISTER, {'email': 'ada@example.com', 'password': PASSWORD, 'accountType': 'CUSTOMER'})
+        self.assertFalse(data['register']['success'])
+        self.assertIn('email', data['register']['errors'])
+
+
+class LoginTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user(email='login@example.com')
+
+    def test_login(self):
+        data = self.query(LOGIN, {'email': 'login@example.com', 'password': PASSWORD})
+        self.assertEqual(data['login']['user'], {
+            'id': str(self.user.pk), 'email': 'login@example.com', 'accountType': AccountProfile.CUSTOMER,
+        })
+
+    def test_wrong_password(self):
+        result = self.execute(LOGIN, {'email': 'login@example.com', 'password': 'wrong'})
+        self.assertError(result, 'Please enter valid credentials')
+
+    def test_refresh_rotates_the_refresh_token(self):
+        refresh_token = self.query(LOGIN, {'email': 'login@example.com', 'password': PASSWORD})['login']['refreshToken']
+        self.assertTrue(self.query(REFRESH, {'token': refresh_token})['refreshToken']['token'])
+        self.assertError(self.execute(REFRESH, {'token': refresh_token}), code='INVALID_TOKEN')
+
+    def test_logout_revokes_the_refresh_token(self):
+        refresh_token = self.query(LOGIN, {'email': 'login@example.com', 'password': PASSWORD})['login']['refreshToken']
+        self.query(LOGOUT, {'token': refresh_token}, user=self.user)
+        self.assertError(self.execute(REFRESH, {'token': refresh_token}), code='INVALID_TOKEN')
+
+    def test_view_me(self):
+        self.assertEqual(self.query(VIEW_ME, user=self.user)['viewMe']['email'], 'login@example.com')
+        self.assertError(self.execute(VIEW_ME), 'Authentication required')
+
+
+class TokenTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+
+    def view_me(self, token):
+        response = self.client.post(
+            '/graphql/', {'query': VIEW_ME}, content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {token}',
+        )
+        return response.json()
+
+    def test_bearer_token(self):
+        access, _ = issue_pair(self.user)
+        self.assertEqual(self.view_me(access)['data']['viewMe']['email'], self.user.email)
+
+    def test_refused_tokens_say_why(self):
+        _, refresh = issue_pair(self.user)
+        error = self.view_me(refresh)['errors'][0]
+        self.assertEqual(error['message'], 'Authentication required')
+        self.assertEqual(error['extensions'], {'code': 'UNAUTHENTICATED', 'reason': 'Not an access token'})
+
+    def test_tampered_tokens(self):
+        access = issue(self.user, ACCESS)
+        verify(access)
+        signature = access.rpartition('.')[2]
+        claims = {**decode(access), 'sub': str(make_user().pk)}
+        forged = encode(claims).rsplit('.', 1)[0] + '.' + signature
+        # Not trusted from the verified-token LRU, which is keyed by the signature.
+        with self.assertRaisesMessage(TokenError, 'Invalid token signature'):
+            verify(forged)
+        with self.assertRaisesMessage(TokenError, 'Malformed token'):
+            verify('not-a-token')
+        self.assertEqual(verify(access)['sub'], str(self.user.pk))
+
+    def test_expired_tokens(self):
+        with self.settings(JWT={**settings.JWT, 'ACCESS_TTL': -60, 'LEEWAY': 30}):
+            access = issue(self.user, ACCESS)
+            with self.assertRaisesMessage(TokenError, 'Token has expired'):
+                verify(access)
+
+    def test_revoked_access_tokens(self):
+        access = issue(self.user, ACCESS)
+        claims = verify(access)
+        self.assertTrue(revoke(claims))
+        with self.assertRaisesMessage(TokenError, 'Token has been revoked'):
+            verify(access)
+        # Without a shared cache, other workers see the revocation in the database.
+        self.assertTrue(RevokedToken.objects.filter(jti=claims['jti']).exists())
+
+    def test_revoked_access_tokens_in_a_shared_cache(self):
+        with self.settings(JWT={**settings.JWT, 'CACHE': 'default'}):
+            access = issue(self.user, ACCESS)
+            claims = verify(access)
+            revoke(claims)
+            with self.assertRaisesMessage(TokenError, 'Token has been revoked'):
+                verify(access)
+        self.assertFalse(RevokedToken.objects.exists())
+
+    def test_logout_revokes_the_access_token(self):
+        access, refresh = issue_pair(self.user)
+        self.query(LOGOUT, {'token': refresh}, request=self.request(TokenUser(verify(access))))
+        with self.assertRaisesMessage(TokenError, 'Token has been revoked'):
+            verify(access)
+
+    def test_logout_needs_the_users_own_token(self):
+        _, refresh = issue_pair(make_user())
+        self.assertError(self.execute(LOGOUT, {'token': refresh}, user=self.user), 'You do not have permission')
+
+    def test_revoked_refresh_tokens_survive_the_cache(self):
+        _, refresh = issue_pair(self.user)
+        rotate(refresh)
+        self.assertTrue(RevokedToken.objects.filter(jti=decode(refresh)['jti']).exists())
+        caches['default'].clear()
+        with self.assertRaisesMessage(TokenError, 'Token has been revoked'):
+            rotate(refresh)
+
+    def test_inactive_users_cannot_refresh(self):
+        _, refresh = issue_pair(self.user)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaisesMessage(TokenError, 'User not found'):
+            rotate(refresh)
+
+
+class SessionTests(APITestCase):
+    def test_unchanged_sessions_are_not_written(self):
+        session = SessionStore()
+        session['cart'] = 1
+        session.save()
+        session = SessionStore(session.session_key)
+        session['cart'] = 1
+        with self.assertNumQueries(0):
+            session.save()
+
+    def test_changed_sessions_are_written(self):
+        session = SessionStore()
+        session['cart'] = 1
+        session.save()
+        session = SessionStore(session.session_key)
+        session['cart'] = 2
+        session.save()
+        self.assertEqual(SessionStore(session.session_key)['cart'], 2)
+
+    def test_cached_sessions(self):
+        with self.settings(SESSIONS={**settings.SESSIONS, 'CACHE': 'default'}):
+            session = SessionStore()
+            session['cart'] = 1
+            session.save()
+            with self.assertNumQueries(0):
+                self.assertEqual(SessionStore(session.session_key)['cart'], 1)
+
+    def test_clear_expired(self):
+        model = SessionStore.get_model_class()
+        for n in range(5):
+            session = SessionStore()
+            session['n'] = n
+            session.set_expiry(-60 if n < 3 else 60)
+            session.save()
+        with self.settings(SESSIONS={**settings.SESSIONS, 'PURGE_BATCH': 2, 'PURGE_PAUSE': 0}):
+            SessionStore.clear_expired()
+        self.assertEqual(model.objects.count(), 2)
@@ -0,0 +1,259 @@
+"""
+Stateless JWT access and refresh tokens.
+
+Tokens are HS256 JWTs signed with JWT['SIGNING_KEY'] (SECRET_KEY by
+default), so checking one needs no database: the signature, expiry and type
+are verified in process, and the user id and username come from the
+claims.  Each process also keeps the last JWT['VERIFIED_TOKENS'] verified
+tokens in an LRU, so a client reusing its token skips the HMAC and JSON
+decoding too.  The LRU is keyed by the signature segment, which identifies
+a token as well as its ``jti`` does but needs no decoding to find, and a
+hit is only trusted when the whole token matches the one verified.
+
+Access tokens live for JWT['ACCESS_TTL'] seconds and refresh tokens for
+JWT['REFRESH_TTL'].  Nothing is stored when they are issued.  Revoking a
+token (logout, or a refresh token being rotated) adds its ``jti`` to a
+deny-list that expires with the token, so the list only ever holds revoked
+tokens that are still unexpired.
+
+With JWT['CACHE'], which must be shared by all workers (e.g. Redis), the
+deny-list is kept in the cache and checking it is one cache get per
+request.  Revoked refresh tokens are also saved as RevokedToken rows, which
+the refresh mutation checks: refreshing is rare, and a logout then holds
+even when the cache loses the entry.  Access tokens are only checked
+against the cache and are short-lived, so that is all a lost entry can
+cost.  Without a shared cache, where another worker would never see the
+entry, every revoked token is saved as a RevokedToken row and checking the
+deny-list is one indexed query per request instead.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.utils.functional import SimpleLazyObject
+
+from .models import RevokedToken
+
+ACCESS, REFRESH = 'access', 'refresh'
+
+DEFAULTS = {
+    'SIGNING_KEY': None,
+    'ACCESS_TTL': 15 * 60,
+    'REFRESH_TTL': 30 * 24 * 60 * 60,
+    'LEEWAY': 30,
+    'CACHE': None,
+    'VERIFIED_TOKENS': 10_000,
+}
+
+_HEADER = base64.urlsafe_b64encode(json.dumps({'alg': 'HS256', 'typ': 'JWT'}, separators=(',', ':')).encode())
+_HEADER = _HEADER.rstrip(b'=')
+
+
+class TokenError(Exception):
+    pass
+
+
+def jwt_settings():
+    return {**DEFAULTS, **getattr(settings, 'JWT', {})}
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def _b64decode(data):
+    return base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+
+
+def _signing_key():
+    return (jwt_settings()['SIGNING_KEY'] or settings.SECRET_KEY).encode()
+
+
+def _sign(message):
+    return _b64encode(hmac.new(_signing_key(), message, hashlib.sha256).digest())
+
+
+def encode(claims):
+    message = _HEADER + b'.' + _b64encode(json.dumps(claims, separators=(',', ':')).encode())
+    return (message + b'.' + _sign(message)).decode()
+
+
+def decode(token):
+    """The claims of a correctly signed token, whatever its expiry or type."""
+    try:
+        message, signature = token.encode('ascii').rsplit(b'.', 1)
+        header, payload = message.split(b'.')
+    except (UnicodeEncodeError, ValueError):
+        raise TokenError('Malformed token')
+    if not hmac.compare_digest(signature, _sign(message)):
+        raise TokenError('Invalid token signature')
+    try:
+        if json.loads(_b64decode(header)).get('alg') != 'HS256':
+            raise TokenError('Unsupported token algorithm')
+        claims = json.loads(_b64decode(payload))
+    except (ValueError, AttributeError):
+        raise TokenError('Malformed token')
+    if not isinstance(claims, dict) or not {'sub', 'jti', 'exp', 'typ'} <= claims.keys():
+        raise TokenError('Malformed token')
+    return claims
+
+
+def issue(user, type):
+    now = int(time.time())
+    ttl = jwt_settings()['ACCESS_TTL' if type == ACCESS else 'REFRESH_TTL']
+    return encode({
+        'sub': str(user.pk), 'username': user.get_username(), 'typ': type,
+        'jti': uuid.uuid4().hex, 'iat': now, 'exp': now + ttl,
+    })
+
+
+def issue_pair(user):
+    """``(access token, refresh token)`` for ``user``."""
+    return issue(user, ACCESS), issue(user, REFRESH)
+
+
+class VerifiedTokens:
+    """LRU of recently verified tokens: ``signature -> (token, claims)``."""
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._tokens = OrderedDict()
+
+    def get(self, token):
+        key = token.rpartition('.')[2]
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is None:
+                return None
+            self._tokens.move_to_end(key)
+        stored, claims = entry
+        return claims if hmac.compare_digest(stored, token) else None
+
+    def add(self, token, claims):
+        key = token.rpartition('.')[2]
+        with self._lock:
+            self._tokens[key] = (token, claims)
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.size:
+                self._tokens.popitem(last=False)
+
+    def discard(self, token):
+        with self._lock:
+            self._tokens.pop(token.rpartition('.')[2], None)
+
+
+_verified = None
+
+
+def get_verified_tokens():
+    global _verified
+    if _verified is None:
+        _verified = VerifiedTokens(jwt_settings()['VERIFIED_TOKENS'])
+    return _verified
+
+
+def _deny_key(jti):
+    return f'jwt:deny:{jti}'
+
+
+def verify(token, type=ACCESS):
+    """The claims of a valid, unrevoked token of ``type``; raises TokenError otherwise."""
+    config = jwt_settings()
+    verified = get_verified_tokens()
+    claims = verified.get(token)
+    if claims is None:
+        claims = decode(token)
+        verified.add(token, claims)
+    if claims['typ'] != type:
+        raise TokenError(f'Not {"an" if type == ACCESS else "a"} {type} token')
+    if claims['exp'] + config['LEEWAY'] < time.time():
+        verified.discard(token)
+        raise TokenError('Token has expired')
+    # Checked on every request, cached or not, so revocation is immediate.
+    if config['CACHE']:
+        revoked = caches[config['CACHE']].get(_deny_key(claims['jti'])) is not None
+    else:
+        revoked = RevokedToken.objects.filter(jti=claims['jti']).exists()
+    if revoked:
+        raise TokenError('Token has been revoked')
+    return claims
+
+
+def revoke(claims):
+    """Deny a token until it expires; False if it was already revoked."""
+    config = jwt_settings()
+    remaining = int(claims['exp'] + config['LEEWAY'] - time.time())
+    if remaining <= 0:
+        return True
+    created = True
+    if claims['typ'] == REFRESH or not config['CACHE']:
+        # The unique jti makes concurrent rotations of one token fail but one.
+        _, created = RevokedToken.objects.get_or_create(
+            jti=claims['jti'], defaults={'expires_at': datetime.fromtimestamp(claims['exp'], tz=dt_timezone.utc)},
+        )
+    if config['CACHE']:
+        caches[config['CACHE']].set(_deny_key(claims['jti']), 1, remaining)
+    return created
+
+
+def rotate(refresh_token):
+    """Revoke ``refresh_token`` and return ``(user, access token, refresh token)``."""
+    claims = verify(refresh_token, REFRESH)
+    user = get_user_model()._default_manager.filter(pk=claims['sub'], is_active=True).first()
+    if user is None:
+        raise TokenError('User not found')
+    if not revoke(claims):
+        raise TokenError('Token has been revoked')
+    return (user, *issue_pair(user))
+
+
+def purge_revoked():
+    """Delete RevokedToken rows of tokens that have expired anyway."""
+    return RevokedToken.objects.filter(expires_at__lt=datetime.now(dt_timezone.utc)).delete()[0]
+
+
+def _load_user(user_id):
+    return get_user_model()._default_manager.filter(pk=user_id, is_active=True).first() or AnonymousUser()
+
+
+class TokenUser(SimpleLazyObject):
+    """
+    The user a verified access token belongs to.
+
+    ``pk``, ``id``, ``username`` and the authentication flags come from
+    the token; touching anything else loads the user row once.
+    """
+
+    def __init__(self, claims):
+        user_id = int(claims['sub'])
+        super().__init__(lambda: _load_user(user_id))
+        self.__dict__['_claims'] = claims
+
+    @property
+    def pk(self):
+        return int(self._claims['sub'])
+
+    id = pk
+
+    @property
+    def username(self):
+        return self._claims.get('username', '')
+
+    @property
+    def token_claims(self):
+        return self._claims
+
+    is_authenticated = True
+    is_anonymous = False
@@ -0,0 +1,22 @@
+from django.contrib import admin
+
+from .models import ProductDailyStats, VendorDailyStats, VendorHourlyStats
+
+
+@admin.register(VendorDailyStats)
+class VendorDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('vendor', 'date', 'revenue', 'orders', 'units', 'views')
+    raw_id_fields = ('vendor',)
+    date_hierarchy = 'date'
+
+
+@admin.register(VendorHourlyStats)
+class VendorHourlyStatsAdmin(admin.ModelAdmin):
+    list_display = ('vendor', 'hour', 'revenue', 'orders', 'units', 'views')
+    raw_id_fields = ('vendor',)
+
+
+@admin.register(ProductDailyStats)
+class ProductDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ('product', 'vendor', 'date', 'revenue', 'orders', 'units', 'views')
+    raw_id_fields = ('product', 'vendor')
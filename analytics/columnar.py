@@ -0,0 +1,347 @@
+"""
+Columnar analytics over exported order and product facts.
+
+``manage.py export_analytics`` writes each fact table as one ``.npy`` file
+per column into a new generation directory and then atomically replaces
+``manifest.json`` to point at it::
+
+    ANALYTICS_COLUMNAR_DIR/
+        manifest.json               generation, export time, row counts
+        <generation>/order_items/   created, vendor, product, order, customer,
+                                    quantity, revenue, category, status
+        <generation>/products/      product, vendor, price, stock, active,
+                                    created, category
+
+String columns are dictionary-encoded: the column holds small integer codes
+and ``<column>.dict.json`` the values.  Rows are sorted by vendor and then
+creation time, so a vendor's rows for a time range are one contiguous slice
+found with two binary searches; filters, time buckets and group-bys over the
+slice are NumPy mask, ``unique`` and ``bincount`` operations.  Workers map the
+files read-only and share them through the page cache.
+
+Answers are as fresh as the last export; the incremental rollups cover the
+fixed dashboard ranges in real time.
+"""
+
+import json
+import os
+import shutil
+import threading
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+from products.models import Product
+from search.files import FileLock
+from src.lazy import lazy_module
+
+# Imported on first use; columnar analytics is disabled without NumPy.
+np = lazy_module('numpy')
+
+CHUNK_SIZE = 50000
+MANIFEST = 'manifest.json'
+INTERVALS = {'hour': 'datetime64[h]', 'day': 'datetime64[D]', 'week': None, 'month': 'datetime64[M]'}
+
+TABLES = {
+    'order_items': {
+        'queryset': lambda: OrderItem.objects.annotate(
+            created=F('order__created_at'), vendor=F('order__vendor_id'), customer=F('order__customer_id'),
+            status=F('order__status'), category=F('product__category'),
+        ),
+        'columns': {
+            'created': ('created', 'timestamp'),
+            'vendor': ('vendor', 'int64'),
+            'product': ('product_id', 'int64'),
+            'order': ('order_id', 'int64'),
+            'customer': ('customer', 'int64'),
+            'quantity': ('quantity', 'int32'),
+            'revenue': ('total_price', 'float64'),
+            'category': ('category', 'dictionary'),
+            'status': ('status', 'dictionary'),
+        },
+    },
+    'products': {
+        'queryset': lambda: Product.objects.all(),
+        'columns': {
+            'product': ('id', 'int64'),
+            'vendor': ('seller_id', 'int64'),
+            'price': ('price', 'float64'),
+            'stock': ('stock_quantity', 'int32'),
+            'active': ('is_active', 'bool'),
+            'created': ('created_at', 'timestamp'),
+            'category': ('category', 'dictionary'),
+        },
+    },
+}
+
+
+def available():
+    return np is not None
+
+
+def columnar_directory():
+    return str(getattr(settings, 'ANALYTICS_COLUMNAR_DIR', os.path.join(settings.BASE_DIR, 'var', 'analytics')))
+
+
+def _timestamp(value):
+    return int(value.timestamp()) if value is not None else 0
+
+
+def _encode(values, kind, dictionary=None):
+    if kind == 'timestamp':
+        return np.fromiter((_timestamp(value) for value in values), dtype=np.int64, count=len(values))
+    if kind == 'dictionary':
+        return np.fromiter(
+            (dictionary.setdefault(value or '', len(dictionary)) for value in values), dtype=np.int32, count=len(values)
+        )
+    return np.array([0 if value is None else value for value in values], dtype=kind)
+
+
+def export_table(directory, name):
+    """Write one fact table as column files; returns the row count."""
+    columns = TABLES[name]['columns']
+    queryset = TABLES[name]['queryset']().order_by().values_list(*(field for field, _kind in columns.values()))
+    chunks = {column: [] for column in columns}
+    dictionaries = {column: {} for column, (_field, kind) in columns.items() if kind == 'dictionary'}
+
+    def append(rows):
+        for position, (column, (_field, kind)) in enumerate(columns.items()):
+            chunks[column].append(_encode([row[position] for row in rows], kind, dictionaries.get(column)))
+
+    batch = []
+    for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+        batch.append(row)
+        if len(batch) == CHUNK_SIZE:
+            append(batch)
+            batch = []
+    append(batch)
+
+    values = {column: np.concatenate(parts) for column, parts in chunks.items()}
+    table_dir = os.path.join(directory, name)
+    os.makedirs(table_dir)
+    for column, dictionary in dictionaries.items():
+        # Codes were handed out in first-seen order; store the dictionary sorted.
+        ordered = sorted(dictionary)
+        remap = np.empty(max(len(ordered), 1), dtype=np.int32)
+        remap[[dictionary[value] for value in ordered]] = np.arange(len(ordered), dtype=np.int32)
+        values[column] = remap[values[column]]
+        with open(os.path.join(table_dir, f'{column}.dict.json'), 'w') as f:
+            json.dump(ordered, f)
+    order = np.lexsort((values['created'], values['vendor']))
+    for column, array in values.items():
+        np.save(os.path.join(table_dir, f'{column}.npy'), array[order])
+    return len(order)
+
+
+def export(directory=None):
+    """Export every fact table into a new generation and switch to it."""
+    directory = directory or columnar_directory()
+    os.makedirs(directory, exist_ok=True)
+    with FileLock(os.path.join(directory, 'export.lock')):
+        generation = timezone.now().strftime('%Y%m%dT%H%M%S%f')
+        target = os.path.join(directory, generation)
+        counts = {name: export_table(target, name) for name in TABLES}
+        previous = read_manifest(directory)
+        tmp_path = os.path.join(directory, f'{MANIFEST}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'generation': generation, 'exported_at': timezone.now().isoformat(), 'rows': counts}, f)
+        os.replace(tmp_path, os.path.join(directory, MANIFEST))
+        # Keep the previous generation for queries that started before the switch.
+        keep = {generation, previous and previous['generation']}
+        for entry in os.listdir(directory):
+            if entry not in keep and os.path.isdir(os.path.join(directory, entry)):
+                shutil.rmtree(os.path.join(directory, entry), ignore_errors=True)
+    return counts
+
+
+def read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+class Table:
+    """Memory-mapped columns of one exported fact table."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._columns = {}
+        self._dictionaries = {}
+
+    def column(self, name):
+        values = self._columns.get(name)
+        if values is None:
+            values = self._columns[name] = np.load(os.path.join(self.directory, f'{name}.npy'), mmap_mode='r')
+        return values
+
+    def dictionary(self, name):
+        values = self._dictionaries.get(name)
+        if values is None:
+            with open(os.path.join(self.directory, f'{name}.dict.json')) as f:
+                values = self._dictionaries[name] = json.load(f)
+        return values
+
+    def codes(self, name, values):
+        dictionary = self.dictionary(name)
+        positions = {value: code for code, value in enumerate(dictionary)}
+        return [positions[value] for value in values if value in positions]
+
+    def __len__(self):
+        return len(self.column('vendor'))
+
+    def vendor_slice(self, vendor_id, start=None, end=None):
+        """Row range of a vendor, narrowed to ``start <= created < end``."""
+        vendors = self.column('vendor')
+        low, high = np.searchsorted(vendors, [vendor_id, vendor_id + 1])
+        created = self.column('created')[low:high]
+        if start is not None:
+            low += np.searchsorted(created, _timestamp(start))
+        if end is not None:
+            high = low + np.searchsorted(self.column('created')[low:high], _timestamp(end))
+        return slice(low, high)
+
+
+class Dataset:
+    """The current export generation; reloaded when a new one is published."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._generation = None
+        self.tables = {}
+        self.exported_at = None
+
+    def refresh(self):
+        manifest = read_manifest(self.directory)
+        if manifest is None:
+            raise FileNotFoundError(f'No analytics export in {self.directory}; run manage.py export_analytics')
+        with self._lock:
+            if manifest['generation'] != self._generation:
+                base = os.path.join(self.directory, manifest['generation'])
+                self.tables = {name: Table(os.path.join(base, name)) for name in TABLES}
+                self.exported_at = datetime.fromisoformat(manifest['exported_at'])
+                self._generation = manifest['generation']
+        return self
+
+    def table(self, name):
+        return self.tables[name]
+
+
+_dataset = None
+
+
+def get_dataset():
+    global _dataset
+    if _dataset is None:
+        _dataset = Dataset(columnar_directory())
+    return _dataset.refresh()
+
+
+def _buckets(created, interval):
+    """UTC bucket start of every timestamp, as epoch seconds."""
+    if interval == 'week':
+        days = created // 86400
+        # Day 0 was a Thursday; weeks start on Monday.
+        return (days - (days + 3) % 7) * 86400
+    return created.astype('datetime64[s]').astype(INTERVALS[interval]).astype('datetime64[s]').astype(np.int64)
+
+
+def sales_breakdown(vendor_id, start=None, end=None, group_by=(), interval=None, categories=None,
+                    statuses=None, include_void=False, dataset=None):
+    """
+    Revenue, units, orders and distinct customers of a vendor's order items,
+    grouped by any of ``category``, ``product`` and ``status`` and optionally
+    bucketed by ``interval``.  Returns a list of dicts sorted by group.
+    """
+    table = (dataset or get_dataset()).table('order_items')
+    rows = table.vendor_slice(vendor_id, start, end)
+    mask = np.ones(rows.stop - rows.start, dtype=bool)
+    if categories is not None:
+        mask &= np.isin(table.column('category')[rows], table.codes('category', categories))
+    if statuses is not None:
+        mask &= np.isin(table.column('status')[rows], table.codes('status', statuses))
+    if not include_void:
+        mask &= ~np.isin(table.column('status')[rows], table.codes('status', Order.VOID_STATUSES))
+    # Whole slices stay views of the mapped files; only filtered rows are copied.
+    selected = rows if mask.all() else np.flatnonzero(mask) + rows.start
+    size = int(mask.sum())
+
+    # Each key is reduced to dense codes and the codes are combined in mixed
+    # radix, so grouping is a single one-dimensional unique.
+    keys = []
+    if interval is not None:
+        keys.append(('bucket', _buckets(table.column('created')[selected], interval)))
+    keys.extend((column, table.column(column)[selected]) for column in group_by)
+    combined = np.zeros(size, dtype=np.int64)
+    levels = []
+    for name, values in keys:
+        uniques, codes = np.unique(values, return_inverse=True)
+        combined = combined * len(uniques) + codes.ravel()
+        levels.append((name, uniques))
+    groups, inverse = np.unique(combined, return_inverse=True)
+    inverse = inverse.ravel()
+    count = len(groups)
+
+    revenue = np.bincount(inverse, weights=table.column('revenue')[selected], minlength=count)
+    units = np.bincount(inverse, weights=table.column('quantity')[selected], minlength=count)
+    orders = _distinct_per_group(inverse, table.column('order')[selected], count)
+    customers = _distinct_per_group(inverse, table.column('customer')[selected], count)
+
+    columns = {}
+    remainder = groups
+    for name, uniques in reversed(levels):
+        values = uniques[remainder % len(uniques)].tolist()
+        remainder = remainder // len(uniques)
+        if name == 'bucket':
+            values = [datetime.fromtimestamp(value, dt_timezone.utc) for value in values]
+        elif name in ('category', 'status'):
+            dictionary = table.dictionary(name)
+            values = [dictionary[value] for value in values]
+        columns[name] = values
+    return [
+        {
+            'revenue': float(revenue[index]), 'units': int(units[index]),
+            'orders': int(orders[index]), 'customers': int(customers[index]),
+            **{name: values[index] for name, values in columns.items()},
+        }
+        for index in range(count)
+    ]
+
+
+def _distinct_per_group(inverse, values, count):
+    if not len(values):
+        return np.zeros(count, dtype=np.int64)
+    values = np.asarray(values, dtype=np.int64)
+    span = int(values.max()) + 1
+    pairs = np.unique(inverse.astype(np.int64) * span + values)
+    return np.bincount(pairs // span, minlength=count)
+
+
+def catalog_breakdown(vendor_id, dataset=None):
+    """Product counts, stock-outs and average price per category for a vendor."""
+    table = (dataset or get_dataset()).table('products')
+    rows = table.vendor_slice(vendor_id)
+    dictionary = table.dictionary('category')
+    categories = table.column('category')[rows]
+    active = table.column('active')[rows]
+    out_of_stock = active & (table.column('stock')[rows] == 0)
+    products = np.bincount(categories, minlength=len(dictionary))
+    active_products = np.bincount(categories[active], minlength=len(dictionary))
+    stock_outs = np.bincount(categories[out_of_stock], minlength=len(dictionary))
+    prices = np.bincount(categories, weights=table.column('price')[rows], minlength=len(dictionary))
+    return [
+        {
+            'category': name,
+            'products': int(products[code]),
+            'active': int(active_products[code]),
+            'out_of_stock': int(stock_outs[code]),
+            'average_price': float(prices[code] / products[code]),
+        }
+        for code, name in enumerate(dictionary)
+        if products[code]
+    ]
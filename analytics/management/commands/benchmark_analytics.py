@@ -0,0 +1,81 @@
+from statistics import median
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F, Sum
+from django.db.models.functions import Trunc
+
+from analytics import columnar
+from orders.models import Order, OrderItem
+
+# ``product`` is the OrderItem foreign key itself; the others are joined in.
+GROUP_FIELDS = {'category': 'product__category', 'product': None, 'status': 'order__status'}
+
+
+def orm_sales_breakdown(vendor_id, group_by=(), interval=None):
+    """The ORM aggregation ``columnar.sales_breakdown`` replaces."""
+    queryset = OrderItem.objects.filter(order__vendor_id=vendor_id).exclude(order__status__in=Order.VOID_STATUSES)
+    fields = [column for column in group_by if GROUP_FIELDS[column] is None]
+    groups = {column: F(GROUP_FIELDS[column]) for column in group_by if GROUP_FIELDS[column] is not None}
+    if interval is not None:
+        groups['bucket'] = Trunc('order__created_at', interval)
+    return list(
+        queryset.order_by().values(*fields, **groups).annotate(
+            revenue=Sum('total_price'),
+            units=Sum('quantity'),
+            orders=Count('order_id', distinct=True),
+            customers=Count('order__customer_id', distinct=True),
+        )
+    )
+
+
+class Command(BaseCommand):
+    help = 'Time a vendor sales breakdown through the ORM and the columnar store'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendor', type=int, help='Vendor id (default: the vendor with the most order items)')
+        parser.add_argument('--group-by', nargs='*', default=['category'], choices=sorted(GROUP_FIELDS))
+        parser.add_argument('--interval', default='day', choices=sorted(columnar.INTERVALS))
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        if not columnar.available():
+            raise CommandError('Columnar analytics needs NumPy')
+        try:
+            dataset = columnar.get_dataset()
+        except FileNotFoundError as error:
+            raise CommandError(str(error))
+        vendor_id = options['vendor'] or (
+            Order.objects.order_by().values('vendor_id').annotate(items=Count('items'))
+            .order_by('-items').values_list('vendor_id', flat=True).first()
+        )
+        if vendor_id is None:
+            raise CommandError('There are no orders to benchmark')
+        group_by, interval = tuple(options['group_by']), options['interval']
+
+        def timed(function):
+            timings = []
+            for _ in range(options['repeat']):
+                started = perf_counter()
+                result = function()
+                timings.append(perf_counter() - started)
+            return result, median(timings)
+
+        orm_rows, orm_time = timed(lambda: orm_sales_breakdown(vendor_id, group_by, interval))
+        columnar_rows, columnar_time = timed(
+            lambda: columnar.sales_breakdown(vendor_id, group_by=group_by, interval=interval, dataset=dataset)
+        )
+        rows = dataset.table('order_items').vendor_slice(vendor_id)
+        self.stdout.write(
+            f'vendor {vendor_id}: {rows.stop - rows.start} order items, '
+            f'grouped by {", ".join(group_by) or "nothing"} per {interval}'
+        )
+        self.stdout.write(f'  orm       {orm_time * 1000:9.2f} ms  {len(orm_rows)} groups')
+        self.stdout.write(f'  columnar  {columnar_time * 1000:9.2f} ms  {len(columnar_rows)} groups')
+        orm_revenue = float(sum(row['revenue'] for row in orm_rows))
+        columnar_revenue = sum(row['revenue'] for row in columnar_rows)
+        if len(orm_rows) != len(columnar_rows) or abs(orm_revenue - columnar_revenue) > 0.01 * max(len(orm_rows), 1):
+            self.stdout.write(self.style.WARNING(
+                'Results differ; the columnar export is probably older than the latest orders'
+            ))
+        self.stdout.write(self.style.SUCCESS(f'columnar is {orm_time / columnar_time:.1f}x faster'))
@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from analytics import rollups
+
+
+class Command(BaseCommand):
+    help = 'Drop expired hourly and empty vendor analytics rollups, optionally recomputing recent order figures'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild-days', type=int, default=0,
+            help='Recompute order revenue, counts and units of the last N days from the orders table',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild_days']:
+            rollups.rebuild_orders(timezone.now() - timedelta(days=options['rebuild_days']))
+            self.stdout.write(f"Rebuilt order rollups for the last {options['rebuild_days']} days")
+        deleted = rollups.compact()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} rollup rows'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from analytics import columnar
+
+
+class Command(BaseCommand):
+    help = 'Export order and product facts to the memory-mapped columnar analytics store'
+
+    def handle(self, *args, **options):
+        if not columnar.available():
+            raise CommandError('Columnar analytics needs NumPy')
+        counts = columnar.export()
+        summary = ', '.join(f'{rows} {table}' for table, rows in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Exported {summary} to {columnar.columnar_directory()}'))
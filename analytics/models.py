@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db import models
+
+
+class RollupStats(models.Model):
+    """Additive counters; every rollup row is updated with ``F() + delta``."""
+
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    orders = models.IntegerField(default=0)
+    units = models.IntegerField(default=0)
+    views = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class VendorStats(RollupStats):
+    # Orders from customers buying from the vendor for the first time, and from
+    # customers who had bought before.  Sums of these stay exact over any range.
+    new_customers = models.IntegerField(default=0)
+    returning_customers = models.IntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class VendorHourlyStats(VendorStats):
+    vendor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    hour = models.DateTimeField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['vendor', 'hour'], name='unique_vendor_hour')]
+
+
+class VendorDailyStats(VendorStats):
+    vendor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    date = models.DateField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['vendor', 'date'], name='unique_vendor_date')]
+
+
+class ProductDailyStats(RollupStats):
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='+')
+    vendor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    date = models.DateField()
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['product', 'date'], name='unique_product_date')]
+        indexes = [models.Index(fields=['vendor', 'date'])]
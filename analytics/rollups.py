@@ -0,0 +1,287 @@
+"""
+Per-vendor hourly and daily sales rollups, maintained incrementally.
+
+Dashboards read a handful of precomputed rows per day instead of grouping
+every order of a vendor.  Three tables hold additive counters::
+
+    VendorHourlyStats   vendor, hour    kept for HOURLY_RETENTION_DAYS
+    VendorDailyStats    vendor, date
+    ProductDailyStats   product, date   for top-product breakdowns
+
+Changes arrive as deltas.  An order is added to the buckets of its creation
+time when its transaction commits, and subtracted again if it is cancelled,
+refunded or deleted, so late status changes land in the right day.  Orders
+and their items must therefore be created in one transaction.  Product views
+are frequent and only ever add, so they are buffered per process and written
+every ANALYTICS_ROLLUPS['FLUSH_DELAY'] seconds.
+
+Deltas are applied as ``UPDATE ... SET col = col + delta`` in a fixed key
+order, so concurrent workers never overwrite each other; a missing row is
+inserted, retrying the update if another worker inserted it first.
+
+``manage.py compact_rollups`` drops hourly rows past retention and empty
+rows, and can recompute the order columns of recent days from the orders
+table to repair drift, e.g. from orders updated in bulk without signals.
+"""
+
+import threading
+from collections import Counter, defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from functools import cached_property
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, Exists, F, OuterRef, Sum
+from django.db.models.functions import TruncDate, TruncHour
+from django.utils import timezone
+
+from orders.models import Order, OrderItem
+
+from .models import ProductDailyStats, VendorDailyStats, VendorHourlyStats
+
+DEFAULTS = {
+    'FLUSH_DELAY': 5.0,
+    'HOURLY_RETENTION_DAYS': 14,
+}
+
+TIME_RANGES = {
+    '24h': timedelta(hours=24),
+    '7d': timedelta(days=7),
+    '30d': timedelta(days=30),
+    '90d': timedelta(days=90),
+    '1y': timedelta(days=365),
+}
+
+ORDER_FIELDS = ('revenue', 'orders', 'units', 'new_customers', 'returning_customers')
+TOP_PRODUCTS = 5
+
+
+def rollup_settings():
+    return {**DEFAULTS, **getattr(settings, 'ANALYTICS_ROLLUPS', {})}
+
+
+def hour_of(moment):
+    return timezone.localtime(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def date_of(moment):
+    return timezone.localtime(moment).date()
+
+
+def hourly_cutoff():
+    """Hours before this have been compacted away and are not written to."""
+    return hour_of(timezone.now() - timedelta(days=rollup_settings()['HOURLY_RETENTION_DAYS']))
+
+
+class Deltas(defaultdict):
+    """``{(model, key): Counter}`` of pending increments."""
+
+    def __init__(self):
+        super().__init__(Counter)
+
+    def add_vendor(self, vendor_id, moment, **amounts):
+        hour = hour_of(moment)
+        if hour >= hourly_cutoff():
+            self[VendorHourlyStats, (('vendor_id', vendor_id), ('hour', hour))].update(amounts)
+        self[VendorDailyStats, (('vendor_id', vendor_id), ('date', hour.date()))].update(amounts)
+
+    def add_product(self, product_id, vendor_id, moment, **amounts):
+        key = (('product_id', product_id), ('date', date_of(moment)))
+        self[ProductDailyStats, key].update(amounts)
+        self[ProductDailyStats, key]['vendor_id'] = vendor_id
+
+
+def apply(deltas):
+    """Add ``deltas`` to the rollup tables."""
+    with transaction.atomic():
+        # A fixed order keeps concurrent writers from deadlocking on rows.
+        for (model, key), amounts in sorted(deltas.items(), key=lambda item: (item[0][0]._meta.label, item[0][1])):
+            lookup = dict(key)
+            extra = {'vendor_id': amounts['vendor_id']} if 'vendor_id' in amounts else {}
+            amounts = {field: value for field, value in amounts.items() if field != 'vendor_id' and value}
+            if not amounts:
+                continue
+            changes = {field: F(field) + value for field, value in amounts.items()}
+            if model.objects.filter(**lookup).update(**changes):
+                continue
+            try:
+                with transaction.atomic():
+                    model.objects.create(**lookup, **extra, **amounts)
+            except IntegrityError:
+                model.objects.filter(**lookup).update(**changes)
+
+
+def order_deltas(order, sign):
+    """Deltas adding (``sign=1``) or removing (``sign=-1``) an order's sales."""
+    items = list(
+        order.items.order_by().values('product_id').annotate(units=Sum('quantity'), revenue=Sum('total_price'))
+    )
+    returning = Order.objects.filter(
+        customer_id=order.customer_id, vendor_id=order.vendor_id, id__lt=order.id,
+    ).exclude(status__in=Order.VOID_STATUSES).exists()
+    deltas = Deltas()
+    deltas.add_vendor(
+        order.vendor_id, order.created_at,
+        revenue=sign * order.total_amount,
+        orders=sign,
+        units=sign * sum(item['units'] for item in items),
+        **{'returning_customers' if returning else 'new_customers': sign},
+    )
+    for item in items:
+        if item['product_id'] is not None:
+            deltas.add_product(
+                item['product_id'], order.vendor_id, order.created_at,
+                revenue=sign * item['revenue'], orders=sign, units=sign * item['units'],
+            )
+    return deltas
+
+
+class ViewBuffer:
+    """Per-process product view counts, flushed on a timer."""
+
+    def __init__(self, flush_delay):
+        self.flush_delay = flush_delay
+        self._lock = threading.Lock()
+        self._deltas = Deltas()
+        self._timer = None
+
+    def add(self, product):
+        now = timezone.now()
+        with self._lock:
+            self._deltas.add_vendor(product.seller_id, now, views=1)
+            self._deltas.add_product(product.pk, product.seller_id, now, views=1)
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_delay, self._flush_in_thread)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            deltas, self._deltas = self._deltas, Deltas()
+            self._timer = None
+        if deltas:
+            apply(deltas)
+
+    def _flush_in_thread(self):
+        try:
+            self.flush()
+        finally:
+            # The timer thread's connection is never reused.
+            connection.close()
+
+
+_buffer = None
+
+
+def get_view_buffer():
+    global _buffer
+    if _buffer is None:
+        _buffer = ViewBuffer(rollup_settings()['FLUSH_DELAY'])
+    return _buffer
+
+
+def rebuild_orders(since):
+    """Recompute the order columns of every bucket from the day of ``since`` on."""
+    # Whole days, since the daily rows of the first day are zeroed too.
+    since = timezone.localtime(since).replace(hour=0, minute=0, second=0, microsecond=0)
+    counted = Order.objects.filter(created_at__gte=since).exclude(status__in=Order.VOID_STATUSES)
+    earlier = Order.objects.filter(
+        customer_id=OuterRef('customer_id'), vendor_id=OuterRef('vendor_id'), id__lt=OuterRef('id'),
+    ).exclude(status__in=Order.VOID_STATUSES)
+    deltas = Deltas()
+    orders = counted.order_by().annotate(hour=TruncHour('created_at'), returning=Exists(earlier)).values(
+        'vendor_id', 'hour', 'returning',
+    ).annotate(revenue=Sum('total_amount'), orders=Count('id'))
+    for row in orders:
+        deltas.add_vendor(
+            row['vendor_id'], row['hour'], revenue=row['revenue'], orders=row['orders'],
+            **{'returning_customers' if row['returning'] else 'new_customers': row['orders']},
+        )
+    items = OrderItem.objects.filter(order__in=counted).order_by()
+    for row in items.annotate(hour=TruncHour('order__created_at')).values('order__vendor_id', 'hour').annotate(units=Sum('quantity')):
+        deltas.add_vendor(row['order__vendor_id'], row['hour'], units=row['units'])
+    products = items.filter(product__isnull=False).annotate(date=TruncDate('order__created_at')).values(
+        'product_id', 'order__vendor_id', 'date',
+    ).annotate(revenue=Sum('total_price'), orders=Count('order_id', distinct=True), units=Sum('quantity'))
+    for row in products:
+        key = (('product_id', row['product_id']), ('date', row['date']))
+        deltas[ProductDailyStats, key].update(revenue=row['revenue'], orders=row['orders'], units=row['units'])
+        deltas[ProductDailyStats, key]['vendor_id'] = row['order__vendor_id']
+
+    zero = {field: 0 for field in ORDER_FIELDS}
+    with transaction.atomic():
+        # Hours before the cutoff are not written to, so leave them as they are.
+        VendorHourlyStats.objects.filter(hour__gte=max(since, hourly_cutoff())).update(**zero)
+        VendorDailyStats.objects.filter(date__gte=since.date()).update(**zero)
+        ProductDailyStats.objects.filter(date__gte=since.date()).update(revenue=0, orders=0, units=0)
+        apply(deltas)
+
+
+def compact():
+    """Drop hourly rows past retention and rows with nothing left in them."""
+    deleted = VendorHourlyStats.objects.filter(hour__lt=hourly_cutoff()).delete()[0]
+    empty = {'revenue': 0, 'orders': 0, 'units': 0, 'views': 0}
+    customers = {'new_customers': 0, 'returning_customers': 0}
+    for model, fields in ((VendorHourlyStats, {**empty, **customers}), (VendorDailyStats, {**empty, **customers}),
+                          (ProductDailyStats, empty)):
+        deleted += model.objects.filter(**fields).delete()[0]
+    return deleted
+
+
+class Dashboard:
+    """Lazily computed vendor dashboard figures for one time range."""
+
+    def __init__(self, vendor_id, time_range, now=None):
+        self.vendor_id = vendor_id
+        self.now = now or timezone.now()
+        self.hourly = time_range == '24h'
+        start = self.now - TIME_RANGES[time_range]
+        if self.hourly:
+            self.buckets = [hour_of(start) + timedelta(hours=offset) for offset in range(1, 25)]
+        else:
+            days = TIME_RANGES[time_range].days
+            self.buckets = [date_of(self.now) - timedelta(days=offset) for offset in reversed(range(days))]
+
+    def _rows(self):
+        if self.hourly:
+            return VendorHourlyStats.objects.filter(vendor_id=self.vendor_id, hour__gte=self.buckets[0]), 'hour'
+        return VendorDailyStats.objects.filter(vendor_id=self.vendor_id, date__gte=self.buckets[0]), 'date'
+
+    @cached_property
+    def series(self):
+        rows, bucket = self._rows()
+        by_bucket = {row.pop(bucket): row for row in rows.values(bucket, 'revenue', 'orders')}
+        empty = {'revenue': Decimal(0), 'orders': 0}
+        return [(key, by_bucket.get(key, empty)) for key in self.buckets]
+
+    @cached_property
+    def totals(self):
+        rows, _bucket = self._rows()
+        totals = rows.aggregate(**{field: Sum(field) for field in ORDER_FIELDS + ('views',)})
+        return {field: value or 0 for field, value in totals.items()}
+
+    @property
+    def conversion_rate(self):
+        views = self.totals['views']
+        return self.totals['orders'] / views if views else 0.0
+
+    @property
+    def average_order_value(self):
+        orders = self.totals['orders']
+        return float(self.totals['revenue']) / orders if orders else 0.0
+
+    @cached_property
+    def total_customers(self):
+        # Every customer is counted as new exactly once, on their first order.
+        total = VendorDailyStats.objects.filter(vendor_id=self.vendor_id).aggregate(total=Sum('new_customers'))['total']
+        return total or 0
+
+    def top_products(self, limit=TOP_PRODUCTS):
+        start = self.buckets[0].date() if self.hourly else self.buckets[0]
+        return list(
+            ProductDailyStats.objects.filter(vendor_id=self.vendor_id, date__gte=start)
+            .values('product_id', 'product__name')
+            .annotate(units=Sum('units'), revenue=Sum('revenue'), views=Sum('views'))
+            .order_by('-revenue', '-units')[:limit]
+        )
@@ -0,0 +1,200 @@
+import graphene
+from graphql import GraphQLError
+
+from orders.models import Order
+from products.models import Product
+
+from . import columnar
+from .rollups import TIME_RANGES, Dashboard
+
+RECENT_ORDERS = 5
+BREAKDOWN_GROUPS = ('category', 'product', 'status')
+
+
+class TopProduct(graphene.ObjectType):
+    id = graphene.ID()
+    name = graphene.String()
+    sales = graphene.Int()
+    revenue = graphene.Float()
+    views = graphene.Int()
+
+
+class RecentOrder(graphene.ObjectType):
+    id = graphene.ID()
+    order_number = graphene.String()
+    total_amount = graphene.Float()
+    status = graphene.String()
+    created_at = graphene.DateTime()
+
+
+class SalesPoint(graphene.ObjectType):
+    date = graphene.String()
+    revenue = graphene.Float()
+    orders = graphene.Int()
+
+
+class CustomerMetrics(graphene.ObjectType):
+    total_customers = graphene.Int()
+    new_customers = graphene.Int()
+    returning_customers = graphene.Int()
+    customer_retention_rate = graphene.Float()
+
+
+class VendorAnalytics(graphene.ObjectType):
+    """Resolved from rollup rows; every field is computed only when asked for."""
+
+    total_revenue = graphene.Float()
+    total_orders = graphene.Int()
+    total_products = graphene.Int()
+    average_order_value = graphene.Float()
+    conversion_rate = graphene.Float()
+    top_products = graphene.List(TopProduct)
+    recent_orders = graphene.List(RecentOrder)
+    sales_chart = graphene.List(SalesPoint)
+    customer_metrics = graphene.Field(CustomerMetrics)
+
+    def resolve_total_revenue(dashboard, info):
+        return float(dashboard.totals['revenue'])
+
+    def resolve_total_orders(dashboard, info):
+        return dashboard.totals['orders']
+
+    def resolve_total_products(dashboard, info):
+        return Product.objects.filter(seller_id=dashboard.vendor_id, is_active=True).count()
+
+    def resolve_average_order_value(dashboard, info):
+        return dashboard.average_order_value
+
+    def resolve_conversion_rate(dashboard, info):
+        return dashboard.conversion_rate
+
+    def resolve_top_products(dashboard, info):
+        return [
+            TopProduct(id=row['product_id'], name=row['product__name'], sales=row['units'],
+                       revenue=float(row['revenue']), views=row['views'])
+            for row in dashboard.top_products()
+        ]
+
+    def resolve_recent_orders(dashboard, info):
+        return Order.objects.filter(vendor_id=dashboard.vendor_id)[:RECENT_ORDERS]
+
+    def resolve_sales_chart(dashboard, info):
+        return [
+            SalesPoint(date=bucket.isoformat(), revenue=float(row['revenue']), orders=row['orders'])
+            for bucket, row in dashboard.series
+        ]
+
+    def resolve_customer_metrics(dashboard, info):
+        new, returning = dashboard.totals['new_customers'], dashboard.totals['returning_customers']
+        return CustomerMetrics(
+            total_customers=dashboard.total_customers,
+            new_customers=new,
+            returning_customers=returning,
+            customer_retention_rate=returning / (new + returning) if new + returning else 0.0,
+        )
+
+
+class SalesBreakdownRow(graphene.ObjectType):
+    bucket = graphene.DateTime()
+    category = graphene.String()
+    product_id = graphene.ID()
+    product_name = graphene.String()
+    status = graphene.String()
+    revenue = graphene.Float()
+    units = graphene.Int()
+    orders = graphene.Int()
+    customers = graphene.Int()
+
+
+class CategoryBreakdownRow(graphene.ObjectType):
+    category = graphene.String()
+    products = graphene.Int()
+    active = graphene.Int()
+    out_of_stock = graphene.Int()
+    average_price = graphene.Float()
+
+
+class SalesBreakdown(graphene.ObjectType):
+    """Ad-hoc breakdown from the columnar export, as of ``exported_at``."""
+
+    exported_at = graphene.DateTime()
+    rows = graphene.List(SalesBreakdownRow)
+    catalog = graphene.List(CategoryBreakdownRow)
+
+    def resolve_catalog(breakdown, info):
+        return [CategoryBreakdownRow(**row) for row in columnar.catalog_breakdown(breakdown.vendor_id, breakdown.dataset)]
+
+
+def vendor_for(info, vendor_id):
+    """The vendor whose figures the current user may see."""
+    user = info.context.user
+    if not user.is_authenticated:
+        raise GraphQLError('Authentication required')
+    if vendor_id is None:
+        return user.pk
+    if not str(vendor_id).isdigit():
+        raise GraphQLError('vendorId must be a numeric ID', extensions={'code': 'BAD_USER_INPUT'})
+    if int(vendor_id) == user.pk:
+        return user.pk
+    if not user.is_staff:
+        raise GraphQLError("You do not have permission to view this vendor's analytics")
+    return int(vendor_id)
+
+
+class Query(graphene.ObjectType):
+    vendor_analytics = graphene.Field(
+        VendorAnalytics,
+        time_range=graphene.String(default_value='7d'),
+        vendor_id=graphene.ID(),
+    )
+
+    vendor_sales_breakdown = graphene.Field(
+        SalesBreakdown,
+        vendor_id=graphene.ID(),
+        start=graphene.DateTime(),
+        end=graphene.DateTime(),
+        group_by=graphene.List(graphene.String),
+        interval=graphene.String(),
+        categories=graphene.List(graphene.String),
+        statuses=graphene.List(graphene.String),
+    )
+
+    def resolve_vendor_analytics(self, info, time_range='7d', vendor_id=None):
+        if time_range not in TIME_RANGES:
+            raise GraphQLError(f"timeRange must be one of {', '.join(TIME_RANGES)}")
+        return Dashboard(vendor_for(info, vendor_id), time_range)
+
+    def resolve_vendor_sales_breakdown(self, info, vendor_id=None, start=None, end=None, group_by=None,
+                                       interval=None, categories=None, statuses=None):
+        vendor_id = vendor_for(info, vendor_id)
+        group_by = tuple(group_by or ())
+        if any(column not in BREAKDOWN_GROUPS for column in group_by) or len(set(group_by)) != len(group_by):
+            raise GraphQLError(f"groupBy may contain {', '.join(BREAKDOWN_GROUPS)}")
+        if interval is not None and interval not in columnar.INTERVALS:
+            raise GraphQLError(f"interval must be one of {', '.join(columnar.INTERVALS)}")
+        if not columnar.available():
+            raise GraphQLError('Sales breakdowns are not available on this server')
+        try:
+            dataset = columnar.get_dataset()
+        except FileNotFoundError:
+            raise GraphQLError('Sales breakdowns have not been exported yet')
+        rows = columnar.sales_breakdown(
+            vendor_id, start=start, end=end, group_by=group_by, interval=interval,
+            categories=categories, statuses=statuses, dataset=dataset,
+        )
+        names = {}
+        if 'product' in group_by:
+            names = dict(Product.objects.filter(pk__in=[row['product'] for row in rows]).values_list('id', 'name'))
+        breakdown = SalesBreakdown(
+            exported_at=dataset.exported_at,
+            rows=[
+                SalesBreakdownRow(
+                    bucket=row.get('bucket'), category=row.get('category'), status=row.get('status'),
+                    product_id=row.get('product'), product_name=names.get(row.get('product')),
+                    revenue=row['revenue'], units=row['units'], orders=row['orders'], customers=row['customers'],
+                )
+                for row in rows
+            ],
+        )
+        breakdown.vendor_id, breakdown.dataset = vendor_id, dataset
+        return breakdown
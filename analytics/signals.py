@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete
+from django.dispatch import receiver
+
+from orders.models import Order
+from products.signals import product_viewed
+
+from .rollups import apply, get_view_buffer, order_deltas
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, **kwargs):
+    if created:
+        was_sale = False
+    elif hasattr(instance, '_loaded_status'):
+        was_sale = instance._loaded_status not in Order.VOID_STATUSES
+    else:
+        # Saved without being loaded first, so the previous status is unknown;
+        # compact_rollups --rebuild-days repairs anything missed here.
+        return
+    instance._loaded_status = instance.status
+    if was_sale != instance.counts_as_sale:
+        sign = 1 if instance.counts_as_sale else -1
+        # Items are created after the order, so read them once it commits.
+        transaction.on_commit(lambda: apply(order_deltas(instance, sign)))
+
+
+@receiver(pre_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    if getattr(instance, '_loaded_status', instance.status) not in Order.VOID_STATUSES:
+        deltas = order_deltas(instance, -1)
+        transaction.on_commit(lambda: apply(deltas))
+
+
+@receiver(product_viewed)
+def product_viewed_handler(sender, product, **kwargs):
+    get_view_buffer().add(product)
@@ -0,0 +1,42 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from analytics.models import ProductDailyStats, VendorDailyStats
+from analytics.rollups import rebuild_orders
+from orders.models import Order, OrderItem
+from src.testing import APITestCase, make_order, make_product, make_supplier
+
+
+VENDOR_ANALYTICS = '''
+query($vendorId: ID) { vendorAnalytics(vendorId: $vendorId) { totalRevenue } }
+'''
+
+
+class RebuildOrdersTests(APITestCase):
+    def test_partial_rebuild_matches_orders(self):
+        vendor = make_supplier()
+        product = make_product(seller=vendor, price=Decimal('10.00'))
+        day = timezone.localtime() - timedelta(days=2)
+        morning = day.replace(hour=2, minute=0, second=0, microsecond=0)
+        for hour, quantity in ((2, 1), (14, 3)):
+            order = make_order(items=[(product, quantity)])
+            Order.objects.filter(pk=order.pk).update(created_at=morning.replace(hour=hour))
+
+        # From the afternoon on; the morning order is on the same day and must be counted too.
+        rebuild_orders(morning.replace(hour=13))
+
+        orders = Order.objects.filter(vendor=vendor).aggregate(revenue=Sum('total_amount'), orders=Count('id'))
+        units = OrderItem.objects.filter(order__vendor=vendor).aggregate(units=Sum('quantity'))['units']
+        daily = VendorDailyStats.objects.get(vendor=vendor, date=morning.date())
+        self.assertEqual((daily.revenue, daily.orders, daily.units), (orders['revenue'], orders['orders'], units))
+        product_daily = ProductDailyStats.objects.get(product=product, date=morning.date())
+        self.assertEqual((product_daily.orders, product_daily.units), (2, 4))
+
+
+class VendorAnalyticsTests(APITestCase):
+    def test_invalid_vendor_id(self):
+        result = self.execute(VENDOR_ANALYTICS, {'vendorId': 'abc'}, user=make_supplier())
+        self.assertError(result, 'vendorId', code='BAD_USER_INPUT')
@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import models
+
+
+class Cart(models.Model):
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='cart')
+    # Bumped by every change; writers only commit if it is still the version they read.
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Cart of {self.user}'
+
+
+class CartItem(models.Model):
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='+')
+    quantity = models.PositiveIntegerField()
+
+    class Meta:
+        ordering = ['id']
+        constraints = [models.UniqueConstraint(fields=['cart', 'product'], name='unique_cart_product')]
+
+    def __str__(self):
+        return f'{self.quantity} x {self.product_id}'
@@ -0,0 +1,153 @@
+import graphene
+from graphql import GraphQLError
+
+from accounts.schema import current_user_id
+from products.schema import ProductType
+
+from .store import ADD, CLEAR, REMOVE, SET, CartConflict, CartError, get_store, lines
+
+
+class CartOperation(graphene.Enum):
+    ADD = ADD
+    SET = SET
+    REMOVE = REMOVE
+    CLEAR = CLEAR
+
+
+class CartOpInput(graphene.InputObjectType):
+    op = CartOperation(required=True)
+    product_id = graphene.ID()
+    quantity = graphene.Int()
+
+
+class CartItemType(graphene.ObjectType):
+    # Lines are keyed by product, so the product id doubles as the line id.
+    id = graphene.ID()
+    product = graphene.Field(ProductType)
+    quantity = graphene.Int()
+    unit_price = graphene.Float()
+    total_price = graphene.Float()
+
+
+class CartType(graphene.ObjectType):
+    id = graphene.ID()
+    version = graphene.Int()
+    total_items = graphene.Int()
+    total_amount = graphene.Float()
+    items = graphene.List(CartItemType)
+
+
+def cart_type(state):
+    items, total_items, total_amount = lines(state)
+    return CartType(
+        id=state.cart_id,
+        version=state.version,
+        total_items=total_items,
+        total_amount=float(total_amount),
+        items=[
+            CartItemType(id=product.pk, product=product, quantity=quantity,
+                         unit_price=float(total / quantity), total_price=float(total))
+            for product, quantity, total in items
+        ],
+    )
+
+
+def update_cart(info, ops, expected_version=None):
+    try:
+        ops = [
+            {'op': op['op'], 'product_id': int(op['product_id']) if op.get('product_id') else None,
+             'quantity': op.get('quantity')}
+            for op in ops
+        ]
+    except ValueError:
+        raise GraphQLError('productId must be a product id')
+    try:
+        return get_store().update(current_user_id(info), ops, expected_version)
+    except CartConflict as error:
+        raise GraphQLError(str(error), extensions={'code': 'CART_CONFLICT', 'version': error.version})
+    except CartError as error:
+        raise GraphQLError(str(error))
+
+
+class UpdateCart(graphene.Mutation):
+    """Apply a batch of line-item operations in one step and return the new cart."""
+
+    class Arguments:
+        ops = graphene.List(graphene.NonNull(CartOpInput), required=True)
+        expected_version = graphene.Int()
+
+    cart = graphene.Field(CartType)
+
+    def mutate(self, info, ops, expected_version=None):
+        return UpdateCart(cart=cart_type(update_cart(info, ops, expected_version)))
+
+
+class CartItemResult(graphene.ObjectType):
+    cart_item = graphene.Field(CartItemType)
+    success = graphene.Boolean()
+    message = graphene.String()
+
+
+def single_item_result(state, product_id, message):
+    item = next((item for item in cart_type(state).items if item.id == product_id), None)
+    return {'cart_item': item, 'success': True, 'message': message}
+
+
+class AddToCart(graphene.Mutation):
+    class Arguments:
+        product_id = graphene.ID(required=True)
+        quantity = graphene.Int(default_value=1)
+
+    Output = CartItemResult
+
+    def mutate(self, info, product_id, quantity=1):
+        state = update_cart(info, [{'op': ADD, 'product_id': product_id, 'quantity': quantity}])
+        return CartItemResult(**single_item_result(state, int(product_id), 'Added to cart'))
+
+
+class UpdateCartItem(graphene.Mutation):
+    class Arguments:
+        cart_item_id = graphene.ID(required=True)
+        quantity = graphene.Int(required=True)
+
+    Output = CartItemResult
+
+    def mutate(self, info, cart_item_id, quantity):
+        state = update_cart(info, [{'op': SET, 'product_id': cart_item_id, 'quantity': quantity}])
+        return CartItemResult(**single_item_result(state, int(cart_item_id), 'Cart updated'))
+
+
+class RemoveFromCart(graphene.Mutation):
+    class Arguments:
+        cart_item_id = graphene.ID(required=True)
+
+    Output = CartItemResult
+
+    def mutate(self, info, cart_item_id):
+        update_cart(info, [{'op': REMOVE, 'product_id': cart_item_id}])
+        return CartItemResult(success=True, message='Removed from cart')
+
+
+class ClearCart(graphene.Mutation):
+    success = graphene.Boolean()
+    message = graphene.String()
+    cart = graphene.Field(CartType)
+
+    def mutate(self, info):
+        state = update_cart(info, [{'op': CLEAR}])
+        return ClearCart(success=True, message='Cart cleared', cart=cart_type(state))
+
+
+class Query(graphene.ObjectType):
+    my_cart = graphene.Field(CartType)
+
+    def resolve_my_cart(self, info):
+        return cart_type(get_store().load(current_user_id(info)))
+
+
+class Mutation(graphene.ObjectType):
+    update_cart = UpdateCart.Field()
+    add_to_cart = AddToCart.Field()
+    update_cart_item = UpdateCartItem.Field()
+    remove_from_cart = RemoveFromCart.Field()
+    clear_cart = ClearCart.Field()
@@ -0,0 +1,291 @@
+"""
+Cart storage with batched, optimistically versioned updates.
+
+A cart is a version number and an ordered ``{product_id: quantity}`` map.
+``apply_ops`` folds a list of line-item operations (ADD, SET, REMOVE, CLEAR)
+into the map; a store commits the result only if the cart is still at the
+version the operations were applied to, and otherwise reloads and retries.
+Nothing is locked for reading, so concurrent requests for one cart cost a
+retry rather than a queue of SELECT ... FOR UPDATE waiters.
+
+DatabaseCartStore keeps carts in Cart and CartItem rows.  The guarded
+``UPDATE cart SET version = v + 1 WHERE version = v`` is the commit point
+and the changed lines are written in the same transaction.
+
+CachedCartStore keeps hot carts in the cache and writes them behind to the
+database.  Each version of a cart is stored under its own key, and adding
+version v + 1 with ``cache.add`` (set-if-absent, atomic on Redis and LocMem)
+is the compare-and-swap: exactly one writer creates it.  A pointer key holds
+the latest version as a hint and readers probe forward from it.  Changed
+carts are queued per process and written to the database after
+CART['FLUSH_DELAY'] seconds under a ``version < v`` guard, so a late flush
+never overwrites a newer one.  Until then a cart is only as durable as the
+cache; checkout must call ``flush`` first.  Versions are kept until a flush
+has saved a newer one, so a reader whose pointer was evicted walks forward
+from the database version to the latest instead of reading the stale
+database copy.  All workers have to share the cache, so CART['STORE']
+selects this store only when REDIS_URL is set.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.utils import timezone
+
+from products.models import Product
+
+from .models import Cart, CartItem
+
+ADD, SET, REMOVE, CLEAR = 'ADD', 'SET', 'REMOVE', 'CLEAR'
+MAX_QUANTITY = 999
+MAX_LINES = 100
+MAX_RETRIES = 5
+PROBE = 4
+
+DEFAULTS = {
+    'STORE': 'database',
+    'CACHE': 'default',
+    'TIMEOUT': 24 * 60 * 60,
+    'FLUSH_DELAY': 2.0,
+}
+
+
+class CartError(Exception):
+    pass
+
+
+class CartConflict(CartError):
+    def __init__(self, message, version):
+        super().__init__(message)
+        self.version = version
+
+
+@dataclass
+class CartState:
+    version: int
+    items: dict = field(default_factory=dict)
+    cart_id: int = None
+
+
+def cart_settings():
+    return {**DEFAULTS, **getattr(settings, 'CART', {})}
+
+
+def apply_ops(items, ops):
+    """The ``{product_id: quantity}`` map after applying ``ops`` in order."""
+    items = dict(items)
+    for op in ops:
+        kind, product_id, quantity = op['op'], op.get('product_id'), op.get('quantity')
+        if kind == CLEAR:
+            items.clear()
+            continue
+        if product_id is None:
+            raise CartError(f'{kind} needs a productId')
+        if kind == ADD:
+            quantity = items.get(product_id, 0) + (1 if quantity is None else quantity)
+        elif kind == SET:
+            if quantity is None:
+                raise CartError('SET needs a quantity')
+        elif kind == REMOVE:
+            quantity = 0
+        else:
+            raise CartError(f'Unknown cart operation {kind}')
+        if not 0 <= quantity <= MAX_QUANTITY:
+            raise CartError(f'Quantity must be between 0 and {MAX_QUANTITY}')
+        if quantity:
+            items[product_id] = quantity
+        else:
+            items.pop(product_id, None)
+    if len(items) > MAX_LINES:
+        raise CartError(f'A cart holds at most {MAX_LINES} products')
+    return items
+
+
+def check_products(ops):
+    wanted = {op['product_id'] for op in ops if op['op'] in (ADD, SET) and op.get('product_id') is not None}
+    found = set(Product.objects.filter(pk__in=wanted, is_active=True).values_list('pk', flat=True))
+    if wanted - found:
+        raise CartError(f'Product {min(wanted - found)} is not available')
+
+
+def write_items(cart_id, old, new):
+    """Bring a cart's rows from the ``old`` line map to the ``new`` one."""
+    removed = old.keys() - new.keys()
+    if removed:
+        CartItem.objects.filter(cart_id=cart_id, product_id__in=removed).delete()
+    for product_id, quantity in new.items():
+        if product_id in old and old[product_id] != quantity:
+            CartItem.objects.filter(cart_id=cart_id, product_id=product_id).update(quantity=quantity)
+    added = [product_id for product_id in new if product_id not in old]
+    if added:
+        existing = set(Product.objects.filter(pk__in=added).values_list('pk', flat=True))
+        CartItem.objects.bulk_create([
+            CartItem(cart_id=cart_id, product_id=product_id, quantity=new[product_id])
+            for product_id in added if product_id in existing
+        ])
+
+
+def lines(state):
+    """``(product, quantity, line total)`` for the cart's available products, and the totals."""
+    products = Product.objects.filter(is_active=True).in_bulk(list(state.items))
+    result, total_items, total_amount = [], 0, Decimal(0)
+    for product_id, quantity in state.items.items():
+        product = products.get(product_id)
+        if product is None:
+            continue
+        line_total = (product.discount_price or product.price) * quantity
+        result.append((product, quantity, line_total))
+        total_items += quantity
+        total_amount += line_total
+    return result, total_items, total_amount
+
+
+class DatabaseCartStore:
+    def load(self, user_id):
+        cart = Cart.objects.filter(user_id=user_id).first()
+        if cart is None:
+            # Reading never inserts; the row is created by the first change.
+            return CartState(0)
+        # Items read after the version can only be newer, and then the
+        # version has moved on too and the commit will fail and retry.
+        return CartState(cart.version, dict(cart.items.values_list('product_id', 'quantity')), cart.pk)
+
+    def update(self, user_id, ops, expected_version=None):
+        """Apply ``ops`` atomically and return the new state."""
+        check_products(ops)
+        for _attempt in range(MAX_RETRIES):
+            state = self.load(user_id)
+            if expected_version is not None and state.version != expected_version:
+                raise CartConflict('The cart has changed since it was read', state.version)
+            new = CartState(state.version + 1, apply_ops(state.items, ops), state.cart_id)
+            if self._commit(user_id, state, new):
+                return new
+        raise CartConflict('The cart is being changed concurrently; try again', state.version)
+
+    def _cart_id(self, user_id, state):
+        if state.cart_id is None:
+            # A cart created concurrently is past version 0, so the commit retries.
+            state.cart_id = Cart.objects.get_or_create(user_id=user_id)[0].pk
+        return state.cart_id
+
+    def _commit(self, user_id, old, new):
+        with transaction.atomic():
+            cart_id = self._cart_id(user_id, new)
+            updated = Cart.objects.filter(pk=cart_id, version=old.version).update(
+                version=new.version, updated_at=timezone.now(),
+            )
+            if not updated:
+                return False
+            write_items(cart_id, old.items, new.items)
+        return True
+
+    def flush(self, user_ids=None):
+        pass
+
+
+class CachedCartStore(DatabaseCartStore):
+    def __init__(self, cache, timeout, flush_delay):
+        self.cache = cache
+        self.timeout = timeout
+        self.flush_delay = flush_delay
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._timer = None
+
+    def _pointer(self, user_id):
+        return f'cart:{user_id}'
+
+    def _key(self, user_id, version):
+        return f'cart:{user_id}:{version}'
+
+    def _latest(self, user_id, version):
+        """Newest stored state at or after ``version``, or None."""
+        latest = None
+        while True:
+            keys = {self._key(user_id, candidate): candidate for candidate in range(version, version + PROBE)}
+            found = self.cache.get_many(list(keys))
+            if not found:
+                return latest
+            key = max(found, key=keys.get)
+            cart_id, items = found[key]
+            latest = CartState(keys[key], items, cart_id)
+            if latest.version < version + PROBE - 1:
+                return latest
+            version = latest.version + 1
+
+    def load(self, user_id):
+        pointer = self.cache.get(self._pointer(user_id))
+        state = self._latest(user_id, pointer) if pointer is not None else None
+        if state is None:
+            stored = super().load(user_id)
+            # The pointer may have been evicted before unflushed versions were.
+            state = self._latest(user_id, stored.version)
+            if state is None:
+                self.cache.add(self._key(user_id, stored.version), (stored.cart_id, stored.items), self.timeout)
+                state = stored
+        if state.version != pointer:
+            self.cache.set(self._pointer(user_id), state.version, self.timeout)
+        return state
+
+    def _commit(self, user_id, old, new):
+        self._cart_id(user_id, new)
+        if not self.cache.add(self._key(user_id, new.version), (new.cart_id, new.items), self.timeout):
+            return False
+        self.cache.set(self._pointer(user_id), new.version, self.timeout)
+        with self._lock:
+            self._dirty.add(user_id)
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_delay, self._flush_in_thread)
+                self._timer.daemon = True
+                self._timer.start()
+        return True
+
+    def flush(self, user_ids=None):
+        """Write queued carts, or the given users' carts, to the database."""
+        with self._lock:
+            if user_ids is None:
+                user_ids, self._dirty = self._dirty, set()
+                self._timer = None
+            else:
+                self._dirty.difference_update(user_ids)
+        for user_id in user_ids:
+            pointer = self.cache.get(self._pointer(user_id))
+            state = self._latest(user_id, pointer) if pointer is not None else None
+            if state is not None:
+                self._save(user_id, state)
+
+    def _save(self, user_id, state):
+        with transaction.atomic():
+            cart, _ = Cart.objects.get_or_create(user_id=user_id)
+            if not Cart.objects.filter(pk=cart.pk, version__lt=state.version).update(
+                version=state.version, updated_at=timezone.now(),
+            ):
+                return
+            write_items(cart.pk, dict(cart.items.values_list('product_id', 'quantity')), state.items)
+        # Readers only walk forward from the saved version now; the one before
+        # is kept for readers with a stale pointer.
+        self.cache.delete_many([self._key(user_id, version) for version in range(cart.version, state.version - 1)])
+
+    def _flush_in_thread(self):
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+
+_store = None
+
+
+def get_store():
+    global _store
+    if _store is None:
+        config = cart_settings()
+        if config['STORE'] == 'cached':
+            _store = CachedCartStore(caches[config['CACHE']], config['TIMEOUT'], config['FLUSH_DELAY'])
+        else:
+            _store = DatabaseCartStore()
+    return _store
@@ -0,0 +1,107 @@
+from django.core.cache import caches
+
+from cart.models import Cart
+from cart.store import ADD, CLEAR, CachedCartStore, CartConflict
+from src.testing import APITestCase, make_product, make_user
+
+ADD_TO_CART = '''
+mutation($productId: ID!, $quantity: Int) {
+  addToCart(productId: $productId, quantity: $quantity) { success cartItem { quantity totalPrice } }
+}
+'''
+MY_CART = '{ myCart { totalItems totalAmount items { product { id } quantity } } }'
+CLEAR_CART = 'mutation { clearCart { success } }'
+
+
+class CartTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.product = make_product(price='12.50')
+
+    def test_add_to_cart(self):
+        data = self.query(ADD_TO_CART, {'productId': self.product.pk, 'quantity': 2}, user=self.user)
+        self.assertEqual(data['addToCart']['cartItem'], {'quantity': 2, 'totalPrice': 25.0})
+        self.query(ADD_TO_CART, {'productId': self.product.pk, 'quantity': 1}, user=self.user)
+        cart = self.query(MY_CART, user=self.user)['myCart']
+        self.assertEqual(cart['totalItems'], 3)
+        self.assertEqual(cart['totalAmount'], 37.5)
+        self.assertEqual(cart['items'], [{'product': {'id': str(self.product.pk)}, 'quantity': 3}])
+
+    def test_clear_cart(self):
+        self.query(ADD_TO_CART, {'productId': self.product.pk}, user=self.user)
+        self.query(CLEAR_CART, user=self.user)
+        self.assertEqual(self.query(MY_CART, user=self.user)['myCart']['totalItems'], 0)
+
+    def test_carts_are_per_user(self):
+        self.query(ADD_TO_CART, {'productId': self.product.pk}, user=self.user)
+        self.assertEqual(self.query(MY_CART, user=make_user())['myCart']['totalItems'], 0)
+
+    def test_reading_creates_no_cart(self):
+        self.assertEqual(self.query(MY_CART, user=self.user)['myCart']['totalItems'], 0)
+        self.assertFalse(Cart.objects.filter(user=self.user).exists())
+        self.query(ADD_TO_CART, {'productId': self.product.pk}, user=self.user)
+        self.assertEqual(Cart.objects.get(user=self.user).version, 1)
+
+    def test_authentication_required(self):
+        self.assertError(self.execute(MY_CART), 'Authentication required')
+
+
+class CachedCartStoreTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.product = make_product()
+        # Flushed only when a test calls flush.
+        self.store = CachedCartStore(caches['default'], 60, 24 * 60 * 60)
+        self.addCleanup(lambda: self.store._timer and self.store._timer.cancel())
+
+    def add(self, quantity=1):
+        return self.store.update(self.user.pk, [{'op': ADD, 'product_id': self.product.pk, 'quantity': quantity}])
+
+    def stored(self):
+        cart = Cart.objects.filter(user=self.user).first()
+        return cart and (cart.version, dict(cart.items.values_list('product_id', 'quantity')))
+
+    def test_updates_are_written_behind(self):
+        self.add(2)
+        self.add(1)
+        self.assertEqual(self.store.load(self.user.pk).items, {self.product.pk: 3})
+        self.assertEqual(self.stored(), (0, {}))
+        self.store.flush()
+        self.assertEqual(self.stored(), (2, {self.product.pk: 3}))
+
+    def test_conflicts(self):
+        state = self.add()
+        with self.assertRaises(CartConflict):
+            self.store.update(self.user.pk, [{'op': CLEAR}], expected_version=state.version - 1)
+        self.assertEqual(self.store.update(self.user.pk, [{'op': CLEAR}], expected_version=state.version).items, {})
+
+    def test_evicted_pointer_with_unflushed_versions(self):
+        for _ in range(10):
+            self.add()
+        caches['default'].delete(f'cart:{self.user.pk}')
+        # Well past the probe window from the database version.
+        state = self.store.load(self.user.pk)
+        self.assertEqual((state.version, state.items), (10, {self.product.pk: 10}))
+        self.assertEqual(self.add().version, 11)
+        self.store.flush()
+        self.assertEqual(self.stored(), (11, {self.product.pk: 11}))
+
+    def test_evicted_pointer_after_a_flush(self):
+        for _ in range(6):
+            self.add()
+        self.store.flush()
+        # Only the saved version and the one before it are kept.
+        self.assertIsNone(caches['default'].get(f'cart:{self.user.pk}:4'))
+        caches['default'].delete(f'cart:{self.user.pk}')
+        state = self.store.load(self.user.pk)
+        self.assertEqual((state.version, state.items), (6, {self.product.pk: 6}))
+
+    def test_evicted_cart(self):
+        self.add(4)
+        self.store.flush()
+        caches['default'].clear()
+        state = self.store.load(self.user.pk)
+        self.assertEqual((state.version, state.items), (1, {self.product.pk: 4}))
+        self.assertEqual(self.add().items, {self.product.pk: 5})
@@ -0,0 +1,104 @@
+import gzip
+import json
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+
+from src.encoding import compress, dumps, negotiate
+from src.testing import APITestCase, make_product, make_supplier, make_user
+
+SEARCH = '{ searchProducts(query: "") { items { name description } } }'
+
+
+def rows(response):
+    content = b''.join(response.streaming_content)
+    if response.get('Content-Encoding') == 'gzip':
+        content = gzip.decompress(content)
+    return [json.loads(line) for line in content.splitlines()]
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.vendor = make_supplier()
+        self.products = [make_product(seller=self.vendor, price=Decimal('5.50')) for _ in range(3)]
+        make_product()
+
+    def test_authentication_required(self):
+        self.assertEqual(self.client.get('/exports/products.ndjson').status_code, 401)
+        self.client.force_login(make_user())
+        self.assertEqual(self.client.get('/exports/users.ndjson').status_code, 403)
+
+    def test_vendors_export_their_own_products(self):
+        self.client.force_login(self.vendor)
+        response = self.client.get('/exports/products.ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        exported = rows(response)
+        self.assertEqual([row['id'] for row in exported], [product.pk for product in self.products])
+        self.assertEqual(exported[0]['sellerId'], self.vendor.pk)
+        self.assertEqual(exported[0]['price'], '5.50')
+
+    def test_staff_export_by_seller(self):
+        self.client.force_login(make_user(is_staff=True))
+        self.assertEqual(len(rows(self.client.get('/exports/products.ndjson'))), 4)
+        response = self.client.get('/exports/products.ndjson', {'seller': self.vendor.pk})
+        self.assertEqual(len(rows(response)), 3)
+        self.assertEqual(self.client.get('/exports/products.ndjson', {'seller': 'x'}).status_code, 400)
+
+    def test_small_blocks_stream_the_same_rows(self):
+        self.client.force_login(self.vendor)
+        with self.settings(EXPORTS={'CHUNK_SIZE': 1, 'FLUSH_BYTES': 1}):
+            blocks = list(self.client.get('/exports/products.ndjson').streaming_content)
+        # One block per row, each a complete line.
+        self.assertEqual([json.loads(block)['id'] for block in blocks], [product.pk for product in self.products])
+
+    def test_gzip(self):
+        self.client.force_login(self.vendor)
+        response = self.client.get('/exports/products.ndjson', HTTP_ACCEPT_ENCODING='gzip;q=0.5, br')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(len(rows(response)), 3)
+        response = self.client.get('/exports/products.ndjson', HTTP_ACCEPT_ENCODING='gzip;q=0, *')
+        self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(len(rows(response)), 3)
+
+
+class EncodingTests(APITestCase):
+    def test_negotiate(self):
+        offered = ('zstd', 'br', 'gzip')
+        self.assertEqual(negotiate('gzip, br', offered), 'br')
+        self.assertEqual(negotiate('br;q=0, gzip', offered), 'gzip')
+        self.assertEqual(negotiate('*', offered), 'zstd')
+        self.assertEqual(negotiate('*, zstd;q=0, br;q=0', offered), 'gzip')
+        self.assertIsNone(negotiate('identity', offered))
+        self.assertIsNone(negotiate('gzip;q=x', offered))
+
+    def test_compress(self):
+        data = b'x' * 4096
+        with self.settings(RESPONSE_ENCODING={'ENCODINGS': ('gzip',)}):
+            coding, compressed = compress(data, 'gzip')
+            self.assertEqual(coding, 'gzip')
+            self.assertEqual(gzip.decompress(compressed), data)
+            self.assertEqual(compress(data[:100], 'gzip'), (None, data[:100]))
+            self.assertEqual(compress(data, ''), (None, data))
+
+    def test_dumps(self):
+        moment = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=dt_timezone.utc)
+        self.assertEqual(
+            json.loads(dumps({'price': Decimal('1.50'), 'at': moment, 1: None})),
+            {'price': '1.50', 'at': '2024-05-01T12:30:15.123Z', '1': None},
+        )
+
+    def test_graphql_responses_are_compressed(self):
+        for n in range(20):
+            make_product(name=f'Product {n}', description='A long description ' * 10)
+        with self.settings(RESPONSE_ENCODING={**getattr(settings, 'RESPONSE_ENCODING', {}), 'ENCODINGS': ('gzip',)}):
+            response = self.client.post(
+                '/graphql/', {'query': SEARCH}, content_type='application/json', HTTP_ACCEPT_ENCODING='gzip',
+            )
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertIn('searchProducts', json.loads(gzip.decompress(response.content))['data'])
@@ -0,0 +1,99 @@
+"""
+Streaming NDJSON exports of whole tables.
+
+Each export is one JSON object per line, written while the rows are read:
+the queryset is walked with ``.iterator(chunk_size=...)`` (a server-side
+cursor where the database has them, ``fetchmany`` on SQLite) and encoded
+lines are flushed in blocks of about EXPORTS['FLUSH_BYTES'].  Memory stays
+at one chunk of rows and one block of output however many rows there are,
+unlike a GraphQL list field, which builds the whole response first.
+Clients that accept gzip get the stream gzipped.
+
+Keys are the GraphQL field names, so rows read like the API's objects.
+
+* ``/exports/products.ndjson``: a vendor's own catalog; staff get every
+  product, or one seller's with ``?seller=<id>``.
+* ``/exports/users.ndjson``: all users, for staff only.
+"""
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
+from graphene.utils.str_converters import to_camel_case
+
+from products.models import Product
+from src.encoding import dumps, negotiate
+
+DEFAULTS = {
+    'CHUNK_SIZE': 2000,
+    'FLUSH_BYTES': 64 * 1024,
+}
+
+PRODUCT_FIELDS = (
+    'id', 'seller_id', 'name', 'description', 'brand', 'category', 'subcategory', 'price', 'discount_price',
+    'images_url', 'tags', 'stock_quantity', 'is_active', 'created_at', 'updated_at',
+)
+USER_FIELDS = ('id', 'username', 'email', 'first_name', 'last_name', 'is_active', 'is_staff', 'date_joined')
+
+
+def export_settings():
+    return {**DEFAULTS, **getattr(settings, 'EXPORTS', {})}
+
+
+def ndjson_lines(queryset, fields):
+    """Encoded NDJSON blocks for ``fields`` of every row in ``queryset``, in primary key order."""
+    config = export_settings()
+    keys = [to_camel_case(field) for field in fields]
+    rows = queryset.order_by('pk').values_list(*fields).iterator(chunk_size=config['CHUNK_SIZE'])
+    block, size = [], 0
+    for row in rows:
+        line = dumps(dict(zip(keys, row))) + b'\n'
+        block.append(line)
+        size += len(line)
+        if size >= config['FLUSH_BYTES']:
+            yield b''.join(block)
+            block, size = [], 0
+    if block:
+        yield b''.join(block)
+
+
+def _stream(request, name, queryset, fields):
+    content = ndjson_lines(queryset, fields)
+    gzipped = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), ('gzip',)) == 'gzip'
+    if gzipped:
+        content = compress_sequence(content)
+    response = StreamingHttpResponse(content, content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="{name}.ndjson"'
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if gzipped:
+        response['Content-Encoding'] = 'gzip'
+    return response
+
+
+def _error(message, status):
+    return JsonResponse({'success': False, 'message': message}, status=status)
+
+
+def export_products(request):
+    user = request.user
+    if not user.is_authenticated:
+        return _error('Authentication required', 401)
+    products = Product.objects.all()
+    seller = request.GET.get('seller')
+    if not user.is_staff:
+        products = products.filter(seller_id=user.pk)
+    elif seller:
+        if not seller.isdigit():
+            return _error('seller must be a user id', 400)
+        products = products.filter(seller_id=int(seller))
+    return _stream(request, 'products', products, PRODUCT_FIELDS)
+
+
+def export_users(request):
+    if not request.user.is_authenticated:
+        return _error('Authentication required', 401)
+    if not request.user.is_staff:
+        return _error('Staff only', 403)
+    return _stream(request, 'users', get_user_model().objects.all(), USER_FIELDS)
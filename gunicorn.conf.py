@@ -0,0 +1,47 @@
+"""
+gunicorn settings; gunicorn reads this file from the working directory:
+
+    gunicorn src.wsgi
+
+The application, the GraphQL schema and its executor are loaded once in the
+master before it forks the workers (preload_app), so workers start in
+milliseconds with their first request as fast as any other, and share the
+pages of everything imported so far until they write to them.  Objects that
+exist at that point are moved out of the garbage collector's reach
+(``gc.freeze``), since collections in the workers would otherwise write to
+every one of them and unshare the pages.
+
+Nothing that holds a socket, thread or process may be created while
+preloading: database connections are closed after the fork, and the
+project's caches, timers and process pools are created on first use and
+check the pid (see accounts.hashing and monitoring.metrics).  Code changes
+need a restart of the master, not just a HUP of the workers.
+"""
+
+import gc
+import multiprocessing
+import os
+
+wsgi_app = 'src.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+preload_app = True
+# Idle keep-alive connections, e.g. of manage.py benchmark --url.
+keepalive = 5
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 0))
+max_requests_jitter = max_requests // 10
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    # The application is loaded by now; build what the first request would.
+    from django.db import connections
+
+    from src.executor import warm
+
+    warm()
+    # A connection opened while preloading must not be shared between workers.
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
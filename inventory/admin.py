@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from .models import Reservation, StockShard
+
+
+@admin.register(Reservation)
+class ReservationAdmin(admin.ModelAdmin):
+    list_display = ('product', 'user', 'quantity', 'status', 'expires_at')
+    list_filter = ('status',)
+    raw_id_fields = ('product', 'user')
+
+
+@admin.register(StockShard)
+class StockShardAdmin(admin.ModelAdmin):
+    list_display = ('product', 'shard', 'quantity')
+    raw_id_fields = ('product',)
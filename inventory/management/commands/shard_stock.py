@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from inventory.reservations import available_stock, shard_stock, unshard_stock
+
+
+class Command(BaseCommand):
+    help = "Spread a flash-sale product's stock over sharded counters, or fold it back with --shards 0"
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_id', type=int)
+        parser.add_argument('--shards', type=int, default=16)
+
+    def handle(self, *args, **options):
+        if options['shards']:
+            shard_stock(options['product_id'], options['shards'])
+        else:
+            unshard_stock(options['product_id'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Product {options['product_id']}: {available_stock(options['product_id'])} units "
+            f"over {options['shards'] or 'no'} shards"
+        ))
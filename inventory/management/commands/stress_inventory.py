@@ -0,0 +1,125 @@
+import multiprocessing
+import threading
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+from django.db.models import Min, Sum
+from django.utils import timezone
+
+from inventory.models import Reservation, StockShard
+from inventory.reservations import OutOfStock, available_stock, reserve, shard_stock, sweep_expired
+from products.models import Product
+
+RETRIES = 5
+
+
+def _reserve_until_sold_out(product_id, quantity, attempts, results):
+    reserved = sold_out = errors = 0
+    latencies = []
+    for _ in range(attempts):
+        for _retry in range(RETRIES):
+            started = perf_counter()
+            try:
+                reserve(product_id, quantity)
+            except OutOfStock:
+                sold_out += 1
+            except OperationalError:
+                # SQLite reports lock timeouts under heavy write contention.
+                errors += 1
+                continue
+            else:
+                reserved += 1
+            latencies.append(perf_counter() - started)
+            break
+    connections.close_all()
+    results.append((reserved, sold_out, errors, latencies))
+
+
+def _worker(product_id, quantity, attempts, threads):
+    results = []
+    workers = [
+        threading.Thread(target=_reserve_until_sold_out, args=(product_id, quantity, attempts, results))
+        for _ in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Hammer one product with concurrent reservations and check that nothing is oversold'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stock', type=int, default=5000)
+        parser.add_argument('--processes', type=int, default=4)
+        parser.add_argument('--threads', type=int, default=2)
+        parser.add_argument('--attempts', type=int, default=2000, help='Reservation attempts per thread')
+        parser.add_argument('--quantity', type=int, default=1)
+        parser.add_argument('--shards', type=int, default=0, help='Spread the stock over sharded counters')
+        parser.add_argument('--keep', action='store_true', help='Keep the test product and its reservations')
+
+    def handle(self, *args, **options):
+        seller, _ = get_user_model().objects.get_or_create(username='inventory-stress')
+        product = Product.objects.create(
+            seller=seller, name='Inventory stress test', category='Electronics', price=1,
+            stock_quantity=options['stock'], is_active=False,
+        )
+        if options['shards']:
+            shard_stock(product.pk, options['shards'])
+        try:
+            self._run(product, options)
+        finally:
+            if not options['keep']:
+                product.delete()
+
+    def _run(self, product, options):
+        # Every process opens its own connections after the fork.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        args = (product.pk, options['quantity'], options['attempts'], options['threads'])
+        started = perf_counter()
+        with context.Pool(options['processes']) as pool:
+            results = [result for batch in pool.starmap(_worker, [args] * options['processes']) for result in batch]
+        elapsed = perf_counter() - started
+
+        reserved = sum(result[0] for result in results)
+        sold_out = sum(result[1] for result in results)
+        errors = sum(result[2] for result in results)
+        latencies = sorted(latency for result in results for latency in result[3])
+        remaining = available_stock(product.pk)
+        held = Reservation.objects.filter(product=product, status=Reservation.ACTIVE).aggregate(
+            units=Sum('quantity'),
+        )['units'] or 0
+        lowest_shard = StockShard.objects.filter(product=product).aggregate(lowest=Min('quantity'))['lowest']
+
+        attempts = reserved + sold_out
+        self.stdout.write(
+            f'{attempts} reservation attempts in {elapsed:.2f}s ({attempts / elapsed:.0f}/s), '
+            f'{reserved} succeeded ({reserved / elapsed:.0f}/s), {sold_out} sold out, {errors} lock retries'
+        )
+        if latencies:
+            p50 = latencies[len(latencies) // 2]
+            p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+            self.stdout.write(f'latency p50 {p50 * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms')
+
+        units = reserved * options['quantity']
+        problems = []
+        if units + remaining != options['stock']:
+            problems.append(f'{units} reserved + {remaining} left != {options["stock"]} stocked')
+        if held != units:
+            problems.append(f'{held} units held by reservations, {units} reported reserved')
+        if remaining < 0 or (lowest_shard is not None and lowest_shard < 0):
+            problems.append('stock went negative')
+
+        Reservation.objects.filter(product=product).update(expires_at=timezone.now())
+        sweep_expired()
+        if available_stock(product.pk) != options['stock']:
+            problems.append(f'{available_stock(product.pk)} units after expiring everything, expected {options["stock"]}')
+
+        if problems:
+            raise CommandError('Oversold or lost stock: ' + '; '.join(problems))
+        self.stdout.write(self.style.SUCCESS(f'No overselling: {units} units reserved of {options["stock"]}, all returned on expiry'))
@@ -0,0 +1,21 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand
+
+from inventory.reservations import sweep_expired
+
+
+class Command(BaseCommand):
+    help = 'Expire overdue stock reservations and return their stock'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', type=float, metavar='SECONDS', help='Keep sweeping at this interval')
+
+    def handle(self, *args, **options):
+        while True:
+            expired = sweep_expired()
+            if expired or not options['loop']:
+                self.stdout.write(f'Expired {expired} reservations')
+            if not options['loop']:
+                return
+            sleep(options['loop'])
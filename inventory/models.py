@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.db import models
+
+
+class StockShard(models.Model):
+    """A slice of a flash-sale product's stock; each reservation takes from one shard."""
+
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='stock_shards')
+    shard = models.PositiveSmallIntegerField()
+    quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['product', 'shard'], name='unique_product_shard')]
+
+    def __str__(self):
+        return f'{self.product_id}/{self.shard}: {self.quantity}'
+
+
+class Reservation(models.Model):
+    ACTIVE = 'ACTIVE'
+    COMMITTED = 'COMMITTED'
+    RELEASED = 'RELEASED'
+    EXPIRED = 'EXPIRED'
+    STATUS_CHOICES = [(status, status.title()) for status in (ACTIVE, COMMITTED, RELEASED, EXPIRED)]
+
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='reservations')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='reservations'
+    )
+    # Shard the stock came from, or null when it came from the product row.
+    shard = models.PositiveSmallIntegerField(null=True, blank=True)
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=ACTIVE)
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'expires_at'])]
+
+    def __str__(self):
+        return f'{self.quantity} x {self.product_id} ({self.status})'
@@ -0,0 +1,163 @@
+"""
+Stock reservations with conditional decrements.
+
+Stock is never read and written back.  A reservation takes it with::
+
+    UPDATE products_product SET stock_quantity = stock_quantity - n
+    WHERE id = %s AND stock_quantity >= n
+
+and no matched row means there was not enough.  The database checks and
+decrements under the row lock in one statement, so concurrent checkouts
+cannot oversell, and each one holds the lock only for that statement and the
+reservation insert.  Releasing or expiring a reservation first moves it out
+of ACTIVE with a conditional UPDATE, so its stock is returned exactly once.
+
+On SQLite transactions here start with ``BEGIN IMMEDIATE``
+(``src.transactions.write_atomic``), so concurrent checkouts queue for the
+write lock instead of failing on it.
+
+Reservations hold stock for INVENTORY['RESERVATION_TTL'] seconds unless they
+are committed; ``manage.py sweep_reservations`` returns expired stock.
+
+Flash-sale products can have their stock spread over StockShard rows with
+``shard_stock``.  A reservation tries the shards that had enough stock,
+starting from a random one, so concurrent buyers mostly lock different rows.
+While sharded, the product's own stock_quantity is zero and
+``available_stock`` reports the total; ``unshard_stock`` folds it back.
+"""
+
+import random
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from products.models import Product
+from src.transactions import write_atomic
+
+from .models import Reservation, StockShard
+
+DEFAULTS = {
+    'RESERVATION_TTL': 15 * 60,
+}
+SWEEP_BATCH = 500
+
+
+class OutOfStock(Exception):
+    pass
+
+
+def inventory_settings():
+    return {**DEFAULTS, **getattr(settings, 'INVENTORY', {})}
+
+
+def _take(product_id, quantity):
+    """Decrement stock; returns the shard it came from (None for the product row)."""
+    if Product.objects.filter(pk=product_id, stock_quantity__gte=quantity).update(
+        stock_quantity=F('stock_quantity') - quantity,
+    ):
+        return None
+    # A plain read only picks the candidates; the conditional UPDATE decides.
+    shards = list(StockShard.objects.filter(product_id=product_id, quantity__gte=quantity).values_list('shard', flat=True))
+    if shards:
+        start = random.randrange(len(shards))
+        for shard in shards[start:] + shards[:start]:
+            if StockShard.objects.filter(product_id=product_id, shard=shard, quantity__gte=quantity).update(
+                quantity=F('quantity') - quantity,
+            ):
+                return shard
+    raise OutOfStock(f'Not enough stock of product {product_id}')
+
+
+def _give_back(product_id, shard, quantity):
+    if shard is not None and StockShard.objects.filter(product_id=product_id, shard=shard).update(
+        quantity=F('quantity') + quantity,
+    ):
+        return
+    # Unsharded products, and shards folded back since the reservation.
+    Product.objects.filter(pk=product_id).update(stock_quantity=F('stock_quantity') + quantity)
+
+
+def reserve(product_id, quantity=1, user=None, ttl=None):
+    """Hold ``quantity`` units for ``ttl`` seconds or raise OutOfStock."""
+    if quantity < 1:
+        raise ValueError('quantity must be positive')
+    ttl = inventory_settings()['RESERVATION_TTL'] if ttl is None else ttl
+    with write_atomic():
+        shard = _take(product_id, quantity)
+        return Reservation.objects.create(
+            product_id=product_id, user=user, shard=shard, quantity=quantity,
+            expires_at=timezone.now() + timedelta(seconds=ttl),
+        )
+
+
+def commit(reservation_id):
+    """Turn an unexpired reservation into a sale; False if it is no longer held."""
+    return bool(Reservation.objects.filter(
+        pk=reservation_id, status=Reservation.ACTIVE, expires_at__gt=timezone.now(),
+    ).update(status=Reservation.COMMITTED))
+
+
+def release(reservation_id, status=Reservation.RELEASED):
+    """Return a reservation's stock; False if it was already committed or returned."""
+    with write_atomic():
+        if not Reservation.objects.filter(pk=reservation_id, status=Reservation.ACTIVE).update(status=status):
+            return False
+        product_id, shard, quantity = Reservation.objects.values_list('product_id', 'shard', 'quantity').get(
+            pk=reservation_id,
+        )
+        _give_back(product_id, shard, quantity)
+    return True
+
+
+def sweep_expired(now=None, batch_size=SWEEP_BATCH):
+    """Expire overdue reservations and return their stock; returns how many."""
+    now = now or timezone.now()
+    expired = 0
+    while True:
+        rows = list(
+            Reservation.objects.filter(status=Reservation.ACTIVE, expires_at__lte=now)
+            .values_list('pk', 'product_id', 'shard', 'quantity')[:batch_size]
+        )
+        if not rows:
+            return expired
+        returned = Counter()
+        with write_atomic():
+            for pk, product_id, shard, quantity in rows:
+                # Claimed one by one: a concurrent release or sweep may win any row.
+                if Reservation.objects.filter(pk=pk, status=Reservation.ACTIVE).update(status=Reservation.EXPIRED):
+                    returned[product_id, shard] += quantity
+                    expired += 1
+            for (product_id, shard), quantity in sorted(returned.items(), key=lambda item: (item[0][0], item[0][1] or 0)):
+                _give_back(product_id, shard, quantity)
+
+
+def available_stock(product_id):
+    stock = Product.objects.values_list('stock_quantity', flat=True).get(pk=product_id)
+    sharded = StockShard.objects.filter(product_id=product_id).aggregate(total=Sum('quantity'))['total']
+    return stock + (sharded or 0)
+
+
+def shard_stock(product_id, shards):
+    """Spread a product's stock evenly over ``shards`` rows."""
+    with write_atomic():
+        product = Product.objects.select_for_update().get(pk=product_id)
+        existing = list(StockShard.objects.select_for_update().filter(product_id=product_id))
+        total = product.stock_quantity + sum(shard.quantity for shard in existing)
+        StockShard.objects.filter(product_id=product_id).delete()
+        StockShard.objects.bulk_create([
+            StockShard(product_id=product_id, shard=shard, quantity=total // shards + (shard < total % shards))
+            for shard in range(shards)
+        ])
+        Product.objects.filter(pk=product_id).update(stock_quantity=0)
+
+
+def unshard_stock(product_id):
+    """Move a sharded product's stock back onto the product row."""
+    with write_atomic():
+        Product.objects.select_for_update().get(pk=product_id)
+        total = StockShard.objects.filter(product_id=product_id).aggregate(total=Sum('quantity'))['total'] or 0
+        StockShard.objects.filter(product_id=product_id).delete()
+        Product.objects.filter(pk=product_id).update(stock_quantity=F('stock_quantity') + total)
@@ -0,0 +1,75 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from inventory.models import Reservation
+from inventory.reservations import (
+    OutOfStock, available_stock, commit, release, reserve, shard_stock, sweep_expired, unshard_stock,
+)
+from products.models import Product
+from src.testing import APITestCase, make_product, make_user
+
+
+def stock(product):
+    return Product.objects.values_list('stock_quantity', flat=True).get(pk=product.pk)
+
+
+class ReservationTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = make_product(stock_quantity=5)
+
+    def test_reserve_takes_stock(self):
+        reservation = reserve(self.product.pk, 3, user=make_user())
+        self.assertEqual(reservation.status, Reservation.ACTIVE)
+        self.assertEqual(stock(self.product), 2)
+
+    def test_cannot_oversell(self):
+        reserve(self.product.pk, 4)
+        with self.assertRaises(OutOfStock):
+            reserve(self.product.pk, 2)
+        self.assertEqual(stock(self.product), 1)
+        self.assertEqual(Reservation.objects.count(), 1)
+
+    def test_release_returns_stock_once(self):
+        reservation = reserve(self.product.pk, 2)
+        self.assertTrue(release(reservation.pk))
+        self.assertFalse(release(reservation.pk))
+        self.assertEqual(stock(self.product), 5)
+
+    def test_committed_reservations_keep_their_stock(self):
+        reservation = reserve(self.product.pk, 2)
+        self.assertTrue(commit(reservation.pk))
+        self.assertFalse(release(reservation.pk))
+        self.assertEqual(stock(self.product), 3)
+
+    def test_expired_reservations_cannot_be_committed(self):
+        reservation = reserve(self.product.pk, 2, ttl=0)
+        self.assertFalse(commit(reservation.pk))
+
+    def test_sweep_returns_expired_stock(self):
+        expired = reserve(self.product.pk, 2, ttl=60)
+        held = reserve(self.product.pk, 1, ttl=60 * 60)
+        self.assertEqual(sweep_expired(now=timezone.now() + timedelta(minutes=5)), 1)
+        self.assertEqual(Reservation.objects.get(pk=expired.pk).status, Reservation.EXPIRED)
+        self.assertEqual(Reservation.objects.get(pk=held.pk).status, Reservation.ACTIVE)
+        self.assertEqual(stock(self.product), 4)
+        # Returned once: the expired reservation cannot be released again.
+        self.assertFalse(release(expired.pk))
+        self.assertEqual(stock(self.product), 4)
+
+    def test_sharded_stock(self):
+        shard_stock(self.product.pk, 3)
+        self.assertEqual(stock(self.product), 0)
+        self.assertEqual(available_stock(self.product.pk), 5)
+        reservations = [reserve(self.product.pk) for _ in range(5)]
+        self.assertTrue(all(reservation.shard is not None for reservation in reservations))
+        with self.assertRaises(OutOfStock):
+            reserve(self.product.pk)
+        release(reservations[0].pk)
+        self.assertEqual(available_stock(self.product.pk), 1)
+        unshard_stock(self.product.pk)
+        self.assertEqual(stock(self.product), 1)
+        # Stock held while sharded goes back to the product row.
+        release(reservations[1].pk)
+        self.assertEqual(stock(self.product), 2)
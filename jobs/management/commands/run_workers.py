@@ -0,0 +1,97 @@
+import logging
+import multiprocessing
+import signal
+from time import monotonic, sleep
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections
+
+from jobs.queue import jobs_settings, purge, work, worker_name
+from jobs.signals import worker_stopping
+
+PURGE_INTERVAL = 10 * 60
+RESTART_DELAY = 1.0
+ERROR_BACKOFF = 1.0
+MAX_ERROR_BACKOFF = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+def _worker_loop(stop, batch_size, lease, poll_interval):
+    # Ctrl-C reaches the whole process group; only the parent reacts to it.
+    # Signal handlers only set flags: setting the Event from one could
+    # deadlock with a wait() interrupted inside it.
+    terminated = []
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda signum, frame: terminated.append(signum))
+    name = worker_name()
+    backoff = ERROR_BACKOFF
+    try:
+        while not stop.is_set() and not terminated:
+            try:
+                ran = work(name, batch_size, lease)
+            except OperationalError:
+                # e.g. "database is locked" past the busy timeout; the jobs stay queued.
+                logger.warning('Claiming jobs failed; retrying in %.1fs', backoff, exc_info=True)
+                connections.close_all()
+                stop.wait(backoff)
+                backoff = min(backoff * 2, MAX_ERROR_BACKOFF)
+                continue
+            backoff = ERROR_BACKOFF
+            if not ran:
+                stop.wait(poll_interval)
+    finally:
+        worker_stopping.send(sender=None, worker=name)
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = 'Run queued jobs in a pool of worker processes'
+
+    def add_arguments(self, parser):
+        config = jobs_settings()
+        parser.add_argument('--processes', type=int, default=2)
+        parser.add_argument('--batch-size', type=int, default=config['BATCH_SIZE'])
+        parser.add_argument('--lease', type=int, default=config['LEASE'], help='Seconds a claimed batch is held')
+        parser.add_argument('--poll-interval', type=float, default=config['POLL_INTERVAL'])
+        parser.add_argument('--once', action='store_true', help='Run the ready jobs in this process and exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            total = 0
+            while batch := work(batch_size=options['batch_size'], lease=options['lease']):
+                total += batch
+            self.stdout.write(f'Ran {total} jobs, purged {purge()} finished jobs')
+            return
+
+        # Children must not share the parent's database connections.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        stop = context.Event()
+        stopping = []
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda signum, frame: stopping.append(signum))
+        args = (stop, options['batch_size'], options['lease'], options['poll_interval'])
+
+        def start():
+            process = context.Process(target=_worker_loop, args=args, daemon=True)
+            process.start()
+            return process
+
+        processes = [start() for _ in range(options['processes'])]
+        self.stdout.write(f'Started {len(processes)} workers; Ctrl-C to stop after the current batches')
+        next_purge = monotonic()
+        while not stopping:
+            for index, process in enumerate(processes):
+                if not process.is_alive():
+                    self.stderr.write(f'Worker {process.pid} exited with {process.exitcode}; restarting')
+                    processes[index] = start()
+            if monotonic() >= next_purge:
+                purge()
+                connections.close_all()
+                next_purge = monotonic() + PURGE_INTERVAL
+            sleep(RESTART_DELAY)
+        stop.set()
+        for process in processes:
+            process.join()
+        self.stdout.write('Workers stopped')
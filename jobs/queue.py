@@ -0,0 +1,215 @@
+"""
+Transactional outbox and the workers that drain it.
+
+Side effects that do not have to finish before the response (search
+indexing, image fingerprints, analytics rollups) are registered as tasks and
+queued with ``task.enqueue(**payload)``.  That only inserts a Job row, in the
+caller's transaction: if the change rolls back the job goes with it, and once
+it commits the job is there even if the process dies a moment later.
+
+``manage.py run_workers`` claims ready jobs in batches.  On databases with
+``SELECT ... FOR UPDATE SKIP LOCKED`` (Postgres, MySQL 8) concurrent workers
+skip each other's candidate rows; elsewhere (SQLite) they may pick the same
+candidates and the conditional claim UPDATE gives each row to one of them.
+A claim is a lease: RUNNING jobs whose lease ran out, because their worker
+died, are claimed again.  Delivery is therefore at least once, and tasks
+have to be idempotent; tasks registered with ``atomic=True`` instead run in
+the transaction that marks them done, so their database writes happen once.
+
+A failed job is retried after an exponential backoff with jitter until it
+has used ``max_attempts``; then it is left DEAD for inspection and can be
+retried from the admin.  Finished jobs are deleted after JOBS['RETENTION'].
+"""
+
+import logging
+import os
+import random
+import socket
+import traceback
+import uuid
+from datetime import timedelta
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from monitoring.metrics import Counter, Histogram
+from src.transactions import write_atomic
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BATCH_SIZE': 10,
+    'LEASE': 5 * 60,
+    'POLL_INTERVAL': 1.0,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF': 10,
+    'MAX_BACKOFF': 60 * 60,
+    'RETENTION': 24 * 60 * 60,
+}
+
+JOBS_PROCESSED = Counter(
+    'jobs_processed_total',
+    'Jobs run by the workers, per task and outcome (done, retry, dead).',
+    ('task', 'outcome'),
+)
+JOB_DURATION = Histogram(
+    'job_duration_seconds',
+    'Time spent running a job, per task.',
+    ('task',),
+)
+
+_tasks = {}
+
+
+class LeaseLost(Exception):
+    """The job was claimed by another worker after its lease ran out."""
+
+
+def jobs_settings():
+    return {**DEFAULTS, **getattr(settings, 'JOBS', {})}
+
+
+class Task:
+    def __init__(self, function, name, max_attempts, atomic):
+        self.function = function
+        self.name = name
+        self.max_attempts = max_attempts
+        self.atomic = atomic
+
+    def __call__(self, **payload):
+        return self.function(**payload)
+
+    def enqueue(self, delay=0, **payload):
+        """Queue a run with the JSON-serialisable ``payload`` as keyword arguments."""
+        return Job.objects.create(
+            task=self.name, payload=payload, max_attempts=self.max_attempts,
+            run_after=timezone.now() + timedelta(seconds=delay),
+        )
+
+
+def task(name=None, max_attempts=None, atomic=False):
+    """Register a function as a task; it is queued by ``name`` (default: module.function)."""
+    def register(function):
+        registered = Task(
+            function,
+            name or f'{function.__module__}.{function.__name__}',
+            max_attempts or jobs_settings()['MAX_ATTEMPTS'],
+            atomic,
+        )
+        _tasks[registered.name] = registered
+        return registered
+    return register
+
+
+def get_task(name):
+    return _tasks.get(name)
+
+
+def backoff(attempts):
+    """Seconds to wait before retrying a job that has failed ``attempts`` times."""
+    config = jobs_settings()
+    delay = min(config['BACKOFF'] * 2 ** (attempts - 1), config['MAX_BACKOFF'])
+    # Jitter spreads out jobs that failed together on a shared outage.
+    return delay * random.uniform(0.5, 1.0)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def claim(worker, batch_size, lease):
+    """Lease up to ``batch_size`` ready jobs to ``worker``."""
+    now = timezone.now()
+    token = f'{worker}:{uuid.uuid4().hex[:8]}'
+    ready = Q(status=Job.PENDING, run_after__lte=now) | Q(status=Job.RUNNING, locked_until__lte=now)
+    # Read then write: on SQLite take the write lock first (src.transactions).
+    with write_atomic():
+        candidates = Job.objects.filter(ready).order_by('run_after', 'pk')
+        if connection.features.has_select_for_update_skip_locked:
+            candidates = candidates.select_for_update(skip_locked=True)
+        ids = list(candidates.values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return []
+        # Re-checking ``ready`` hands each row to one worker even without SKIP LOCKED.
+        Job.objects.filter(ready, pk__in=ids).update(
+            status=Job.RUNNING, locked_by=token, locked_until=now + timedelta(seconds=lease),
+            attempts=F('attempts') + 1,
+        )
+    return list(Job.objects.filter(pk__in=ids, locked_by=token).order_by('run_after', 'pk'))
+
+
+def _finish(job, **changes):
+    """Record the outcome of a claimed job; False if its lease was lost."""
+    return bool(Job.objects.filter(pk=job.pk, status=Job.RUNNING, locked_by=job.locked_by).update(
+        locked_by='', locked_until=None, **changes,
+    ))
+
+
+def _done(job):
+    return _finish(job, status=Job.DONE, finished_at=timezone.now(), last_error='')
+
+
+def _failed(job, error):
+    if job.attempts >= job.max_attempts:
+        outcome = 'dead'
+        changes = {'status': Job.DEAD, 'finished_at': timezone.now()}
+    else:
+        outcome = 'retry'
+        changes = {'status': Job.PENDING, 'run_after': timezone.now() + timedelta(seconds=backoff(job.attempts))}
+    if _finish(job, last_error=error, **changes):
+        JOBS_PROCESSED.inc((job.task, outcome))
+        logger.warning('Job %s (%s) failed, attempt %d of %d', job.pk, job.task, job.attempts, job.max_attempts)
+
+
+def run(job):
+    """Run a claimed job and record whether it is done, will be retried or is dead."""
+    registered = get_task(job.task)
+    if registered is None:
+        job.attempts = job.max_attempts
+        _failed(job, f'Unknown task {job.task}')
+        return
+    if job.attempts > job.max_attempts:
+        # Claimed again after its last attempt's lease ran out.
+        _failed(job, job.last_error or 'Lease expired on the final attempt')
+        return
+    started = perf_counter()
+    try:
+        if registered.atomic:
+            with transaction.atomic():
+                registered(**job.payload)
+                if not _done(job):
+                    raise LeaseLost
+        else:
+            registered(**job.payload)
+            if not _done(job):
+                raise LeaseLost
+    except LeaseLost:
+        logger.warning('Job %s (%s) outlived its lease and was claimed again', job.pk, job.task)
+        return
+    except Exception:
+        _failed(job, traceback.format_exc())
+        return
+    finally:
+        JOB_DURATION.observe(perf_counter() - started, (job.task,))
+    JOBS_PROCESSED.inc((job.task, 'done'))
+
+
+def work(worker=None, batch_size=None, lease=None):
+    """Claim and run one batch; returns how many jobs were claimed."""
+    config = jobs_settings()
+    jobs = claim(worker or worker_name(), batch_size or config['BATCH_SIZE'], lease or config['LEASE'])
+    for job in jobs:
+        run(job)
+    return len(jobs)
+
+
+def purge(now=None):
+    """Delete finished jobs older than JOBS['RETENTION']; DEAD jobs are kept."""
+    cutoff = (now or timezone.now()) - timedelta(seconds=jobs_settings()['RETENTION'])
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()
+    return deleted
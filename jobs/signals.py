@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent by each ``run_workers`` process before it exits, so that tasks can
+# flush what they buffer in memory; multiprocessing children skip atexit.
+worker_stopping = Signal()
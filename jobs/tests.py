@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from jobs.models import Job
+from jobs.queue import claim, run, task, work
+from src.testing import APITestCase
+
+calls = []
+
+
+@task(name='jobs.tests.record')
+def record(value):
+    calls.append(value)
+
+
+@task(name='jobs.tests.fail', max_attempts=2)
+def fail():
+    raise RuntimeError('boom')
+
+
+class QueueTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        calls.clear()
+
+    def test_jobs_run_once(self):
+        job = record.enqueue(value=1)
+        self.assertEqual(work(), 1)
+        self.assertEqual(work(), 0)
+        self.assertEqual(calls, [1])
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.locked_by), (Job.DONE, 1, ''))
+
+    def test_delayed_jobs_wait(self):
+        record.enqueue(delay=60, value=1)
+        self.assertEqual(work(), 0)
+        Job.objects.update(run_after=timezone.now())
+        self.assertEqual(work(), 1)
+
+    def test_claims_are_exclusive(self):
+        record.enqueue(value=1)
+        record.enqueue(value=2)
+        first = claim('a', 1, 60)
+        second = claim('b', 10, 60)
+        self.assertEqual(len(first), 1)
+        self.assertEqual([job.payload for job in second], [{'value': 2}])
+        self.assertEqual(claim('c', 10, 60), [])
+
+    def test_expired_leases_are_claimed_again(self):
+        record.enqueue(value=1)
+        [stale] = claim('a', 1, 60)
+        Job.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        [job] = claim('b', 1, 60)
+        self.assertEqual(job.attempts, 2)
+        # The first worker lost its lease and records nothing.
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            run(stale)
+        self.assertEqual(Job.objects.get().status, Job.RUNNING)
+        run(job)
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+        self.assertEqual(calls, [1, 1])
+
+    def test_failures_are_retried_then_dead(self):
+        job = fail.enqueue()
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertGreater(job.run_after, timezone.now())
+        self.assertIn('RuntimeError: boom', job.last_error)
+        Job.objects.update(run_after=timezone.now())
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            work()
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Job.DEAD, 2))
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(work(), 0)
+
+    def test_unknown_tasks_are_dead(self):
+        Job.objects.create(task='jobs.tests.missing', run_after=timezone.now())
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            work()
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.DEAD)
+        self.assertEqual(job.last_error, 'Unknown task jobs.tests.missing')
@@ -0,0 +1,22 @@
+from django.contrib import admin
+
+from .models import Conversation, ConversationMember, Message
+
+
+class ConversationMemberInline(admin.TabularInline):
+    model = ConversationMember
+    raw_id_fields = ('user',)
+    extra = 0
+
+
+@admin.register(Conversation)
+class ConversationAdmin(admin.ModelAdmin):
+    list_display = ('key', 'last_message_at', 'created_at')
+    raw_id_fields = ('last_message',)
+    inlines = [ConversationMemberInline]
+
+
+@admin.register(Message)
+class MessageAdmin(admin.ModelAdmin):
+    list_display = ('conversation', 'sender', 'created_at')
+    raw_id_fields = ('conversation', 'sender')
@@ -0,0 +1,125 @@
+from datetime import timedelta
+from statistics import median
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from messaging.models import Conversation, ConversationMember, Message
+from messaging.store import encode_inbox_cursor, history, inbox, pair_key, rebuild_heads
+
+PREFIX = 'inbox-bench-'
+BATCH = 50_000
+GOLDEN = 0.6180339887
+
+
+def naive_inbox(user_id, first=20):
+    """Latest message per conversation grouped at read time, which the heads replace."""
+    latest = (
+        Message.objects.filter(conversation__members__user_id=user_id).order_by()
+        .values('conversation_id').annotate(last_id=Max('id')).order_by('-last_id')[:first]
+    )
+    return list(Message.objects.filter(pk__in=[row['last_id'] for row in latest]).select_related('sender'))
+
+
+class Command(BaseCommand):
+    help = 'Time inbox and history pages as message history grows; benchmark data is kept for reuse'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--conversations', type=int, default=10_000)
+        parser.add_argument('--messages', type=int, default=10_000_000)
+        parser.add_argument('--steps', type=int, default=3, help='Measure at messages / 10**k for k = steps-1 .. 0')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--naive-repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        owner, conversation_ids = self._ensure_conversations(options['conversations'])
+        self.stdout.write(f'{len(conversation_ids)} conversations of {owner.username}')
+        targets = [options['messages'] // 10 ** step for step in reversed(range(options['steps']))]
+        for target in targets:
+            loaded = self._ensure_messages(owner, conversation_ids, target)
+            if loaded:
+                started = perf_counter()
+                rebuild_heads()
+                self.stdout.write(f'  loaded {loaded} messages, rebuilt heads in {perf_counter() - started:.1f}s')
+            self._measure(owner, conversation_ids, target, options)
+
+    def _timed(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = perf_counter()
+            function()
+            timings.append(perf_counter() - started)
+        return median(timings) * 1000
+
+    def _measure(self, owner, conversation_ids, messages, options):
+        deep_cursor = None
+        for _ in range(50):
+            page, has_next = inbox(owner.pk, 20, deep_cursor)
+            if not has_next:
+                break
+            deep_cursor = encode_inbox_cursor(page[-1])
+        # The skew in _ensure_messages makes the first conversation the busiest.
+        busiest = conversation_ids[0][0]
+        oldest = list(Message.objects.filter(conversation_id=busiest).order_by('id').values_list('id', flat=True)[:100])
+        results = {
+            'inbox': self._timed(lambda: inbox(owner.pk, 20), options['repeat']),
+            'inbox page 50': self._timed(lambda: inbox(owner.pk, 20, deep_cursor), options['repeat']),
+            'history': self._timed(lambda: history(busiest, owner.pk, 50), options['repeat']),
+            'history deep': self._timed(lambda: history(busiest, owner.pk, 50, str(oldest[-1])), options['repeat']),
+            'naive inbox': self._timed(lambda: naive_inbox(owner.pk), options['naive_repeat']),
+        }
+        self.stdout.write(f'{messages:>11,} messages: ' + ', '.join(f'{name} {ms:.2f} ms' for name, ms in results.items()))
+
+    def _ensure_conversations(self, count):
+        User = get_user_model()
+        password = make_password(None)
+        owner, _ = User.objects.get_or_create(username=f'{PREFIX}owner', defaults={'password': password})
+        existing = User.objects.filter(username__startswith=PREFIX).exclude(pk=owner.pk).count()
+        if existing < count:
+            User.objects.bulk_create(
+                [User(username=f'{PREFIX}{index}', password=password) for index in range(existing, count)],
+                batch_size=5000,
+            )
+        others = list(
+            User.objects.filter(username__startswith=PREFIX).exclude(pk=owner.pk).order_by('pk').values_list('pk', flat=True)[:count]
+        )
+        keys = {pair_key(owner.pk, other): other for other in others}
+        known = set(Conversation.objects.filter(key__in=keys).values_list('key', flat=True))
+        now = timezone.now()
+        with transaction.atomic():
+            created = Conversation.objects.bulk_create([Conversation(key=key) for key in keys if key not in known])
+            ConversationMember.objects.bulk_create([
+                ConversationMember(conversation=conversation, user_id=user_id, last_message_at=now)
+                for conversation in created
+                for user_id in (owner.pk, keys[conversation.key])
+            ], batch_size=5000)
+        ids = list(Conversation.objects.filter(key__in=keys).order_by('pk').values_list('pk', 'key'))
+        return owner, [(conversation_id, keys[key]) for conversation_id, key in ids]
+
+    def _ensure_messages(self, owner, conversations, target):
+        """Top the owner's conversations up to ``target`` messages, skewed towards the first ones."""
+        existing = Message.objects.filter(conversation__members__user=owner).count()
+        missing = target - existing
+        if missing <= 0:
+            return 0
+        table = connection.ops.quote_name(Message._meta.db_table)
+        sql = f'INSERT INTO {table} (conversation_id, sender_id, content, created_at) VALUES (%s, %s, %s, %s)'
+        created_at = Message._meta.get_field('created_at')
+        start = timezone.now() - timedelta(seconds=missing)
+        count = len(conversations)
+        for offset in range(0, missing, BATCH):
+            rows = []
+            for number in range(offset, min(offset + BATCH, missing)):
+                # A cubed golden-ratio sequence puts most messages in a few busy conversations.
+                conversation_id, other = conversations[int(count * ((number * GOLDEN) % 1) ** 3)]
+                sender = owner.pk if number % 2 else other
+                moment = created_at.get_db_prep_save(start + timedelta(seconds=number), connection)
+                rows.append((conversation_id, sender, f'Benchmark message {existing + number}', moment))
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, rows)
+        return missing
@@ -0,0 +1,50 @@
+from django.conf import settings
+from django.db import models
+
+
+class Conversation(models.Model):
+    # "<lower user id>:<higher user id>", so each pair of users has one conversation.
+    key = models.CharField(max_length=64, unique=True)
+    last_message = models.ForeignKey('Message', null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f'Conversation {self.key}'
+
+
+class ConversationMember(models.Model):
+    """A user's view of a conversation: the inbox row, with its own unread count."""
+
+    # Both foreign keys lead the composite indexes below, so they need no index of their own.
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='members', db_index=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='conversation_memberships', db_index=False
+    )
+    unread_count = models.PositiveIntegerField(default=0)
+    last_read_message_id = models.BigIntegerField(null=True, blank=True)
+    # Copied from the conversation so the inbox is one index range scan.
+    last_message_at = models.DateTimeField()
+    joined_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['conversation', 'user'], name='unique_conversation_member')]
+        indexes = [models.Index(fields=['user', '-last_message_at', '-conversation'], name='messaging_inbox_idx')]
+
+    def __str__(self):
+        return f'{self.user_id} in {self.conversation_id}'
+
+
+class Message(models.Model):
+    conversation = models.ForeignKey(Conversation, on_delete=models.CASCADE, related_name='messages', db_index=False)
+    sender = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='sent_messages')
+    content = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        # History pages are keyset scans of one conversation's slice of this index.
+        indexes = [models.Index(fields=['conversation', '-id'], name='messaging_history_idx')]
+
+    def __str__(self):
+        return f'{self.sender_id} in {self.conversation_id}: {self.content[:40]}'
@@ -0,0 +1,155 @@
+import graphene
+from django.contrib.auth import get_user_model
+from graphene_django import DjangoObjectType
+from graphql import GraphQLError
+
+from accounts.schema import current_user_id
+
+from .models import Message
+from .store import (
+    MessagingError, encode_inbox_cursor, get_or_create_conversation, history, inbox, mark_read, send_message,
+)
+
+
+class ParticipantType(DjangoObjectType):
+    # Not stored on users yet; null until profiles exist.
+    business_name = graphene.String()
+    avatar = graphene.String()
+
+    class Meta:
+        model = get_user_model()
+        fields = ('id', 'username', 'first_name', 'last_name')
+
+    def resolve_business_name(self, info):
+        return None
+
+    def resolve_avatar(self, info):
+        return None
+
+
+class MessageType(DjangoObjectType):
+    sender = graphene.Field(ParticipantType)
+    is_read = graphene.Boolean()
+
+    class Meta:
+        model = Message
+        fields = ('id', 'content', 'sender', 'created_at')
+
+
+class MessageConnection(graphene.Connection):
+    class Meta:
+        node = MessageType
+
+
+class ConversationType(graphene.ObjectType):
+    id = graphene.ID()
+    participants = graphene.List(ParticipantType)
+    last_message = graphene.Field(MessageType)
+    unread_count = graphene.Int()
+    updated_at = graphene.DateTime()
+
+
+class ConversationConnection(graphene.Connection):
+    class Meta:
+        node = ConversationType
+
+
+def page_info(edges, has_next, after):
+    return graphene.relay.PageInfo(
+        has_next_page=has_next,
+        has_previous_page=after is not None,
+        start_cursor=edges[0].cursor if edges else None,
+        end_cursor=edges[-1].cursor if edges else None,
+    )
+
+
+def conversation_type(member):
+    return ConversationType(
+        id=member.conversation_id,
+        participants=member.participants,
+        last_message=member.conversation.last_message,
+        unread_count=member.unread_count,
+        updated_at=member.last_message_at,
+    )
+
+
+class Query(graphene.ObjectType):
+    my_conversations = graphene.Field(ConversationConnection, first=graphene.Int(default_value=20), after=graphene.String())
+    conversation_messages = graphene.Field(
+        MessageConnection, conversation_id=graphene.ID(required=True),
+        first=graphene.Int(default_value=50), after=graphene.String(),
+    )
+
+    def resolve_my_conversations(self, info, first=20, after=None):
+        try:
+            members, has_next = inbox(current_user_id(info), first, after)
+        except MessagingError as error:
+            raise GraphQLError(str(error))
+        edges = [
+            ConversationConnection.Edge(node=conversation_type(member), cursor=encode_inbox_cursor(member))
+            for member in members
+        ]
+        return ConversationConnection(edges=edges, page_info=page_info(edges, has_next, after))
+
+    def resolve_conversation_messages(self, info, conversation_id, first=50, after=None):
+        user_id = current_user_id(info)
+        if not str(conversation_id).isdigit():
+            raise GraphQLError('Conversation not found')
+        try:
+            messages, has_next = history(int(conversation_id), user_id, first, after)
+        except MessagingError as error:
+            raise GraphQLError(str(error))
+        if after is None:
+            # Opening a conversation reads it.
+            mark_read(int(conversation_id), user_id)
+        edges = [MessageConnection.Edge(node=message, cursor=str(message.pk)) for message in messages]
+        return MessageConnection(edges=edges, page_info=page_info(edges, has_next, after))
+
+
+class SendMessage(graphene.Mutation):
+    class Arguments:
+        conversation_id = graphene.ID(required=True)
+        content = graphene.String(required=True)
+
+    sent_message = graphene.Field(MessageType)
+    success = graphene.Boolean()
+    message = graphene.String()
+
+    def mutate(self, info, conversation_id, content):
+        current_user_id(info)
+        if not str(conversation_id).isdigit():
+            return SendMessage(success=False, message='Conversation not found')
+        try:
+            sent = send_message(int(conversation_id), info.context.user, content)
+        except MessagingError as error:
+            return SendMessage(success=False, message=str(error))
+        sent.is_read = False
+        return SendMessage(sent_message=sent, success=True, message='Message sent')
+
+
+class CreateConversation(graphene.Mutation):
+    class Arguments:
+        participant_id = graphene.ID(required=True)
+
+    conversation = graphene.Field(ConversationType)
+    success = graphene.Boolean()
+    message = graphene.String()
+
+    def mutate(self, info, participant_id):
+        user_id = current_user_id(info)
+        User = get_user_model()
+        if not str(participant_id).isdigit() or not User.objects.filter(pk=participant_id, is_active=True).exists():
+            return CreateConversation(success=False, message='User not found')
+        try:
+            conversation = get_or_create_conversation(user_id, int(participant_id))
+        except MessagingError as error:
+            return CreateConversation(success=False, message=str(error))
+        member = conversation.members.get(user_id=user_id)
+        member.conversation = conversation
+        member.participants = [item.user for item in conversation.members.select_related('user')]
+        return CreateConversation(conversation=conversation_type(member), success=True, message='Conversation ready')
+
+
+class Mutation(graphene.ObjectType):
+    send_message = SendMessage.Field()
+    create_conversation = CreateConversation.Field()
@@ -0,0 +1,201 @@
+"""
+Conversations and messages with heads maintained on write.
+
+Finding each conversation's latest message at read time groups the whole
+message table, which gets slower as history grows.  Instead, sending a
+message also updates, in the same transaction, the conversation's
+``last_message`` and every member's ConversationMember row: the sender's is
+marked read and the others get ``unread_count + 1``.  Each member row also
+has a copy of ``last_message_at``.
+
+So an inbox page is an index range scan over ``(user, -last_message_at,
+-conversation)``.  The conversations, last messages and participants then
+take one query each, and the cost depends on the page size only, not on
+how many messages exist.
+
+History pages are keyset scans of ``(conversation, -id)``.  The cursor is
+the last message id seen, so deep pages cost the same as the first, and
+every query stays within one conversation's slice of the index.
+
+``rebuild_heads`` recomputes the denormalised columns from the messages,
+for bulk imports and repairs.
+"""
+
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+
+from notifications.fanout import publish
+from notifications.models import Notification
+
+from .models import Conversation, ConversationMember, Message
+
+MAX_PAGE = 100
+MAX_LENGTH = 5000
+
+
+class MessagingError(Exception):
+    pass
+
+
+def pair_key(user_id, other_id):
+    low, high = sorted((int(user_id), int(other_id)))
+    return f'{low}:{high}'
+
+
+def get_or_create_conversation(user_id, participant_id):
+    """The one-to-one conversation between two users, created on first use."""
+    if int(user_id) == int(participant_id):
+        raise MessagingError('You cannot start a conversation with yourself')
+    key = pair_key(user_id, participant_id)
+    conversation = Conversation.objects.filter(key=key).first()
+    if conversation is not None:
+        return conversation
+    now = timezone.now()
+    try:
+        with transaction.atomic():
+            conversation = Conversation.objects.create(key=key)
+            ConversationMember.objects.bulk_create([
+                ConversationMember(conversation=conversation, user_id=member, last_message_at=now)
+                for member in (user_id, participant_id)
+            ])
+    except IntegrityError:
+        # Both users started it at once; the other request created it.
+        conversation = Conversation.objects.get(key=key)
+    return conversation
+
+
+def send_message(conversation_id, sender, content):
+    content = (content or '').strip()
+    if not content:
+        raise MessagingError('Message is empty')
+    if len(content) > MAX_LENGTH:
+        raise MessagingError(f'Messages are limited to {MAX_LENGTH} characters')
+    with transaction.atomic():
+        recipients = list(
+            ConversationMember.objects.filter(conversation_id=conversation_id).values_list('user_id', flat=True)
+        )
+        if sender.pk not in recipients:
+            raise MessagingError('Conversation not found')
+        recipients.remove(sender.pk)
+        message = Message.objects.create(conversation_id=conversation_id, sender=sender, content=content)
+        sent_at = message.created_at
+        # Guarded so a slower concurrent send cannot move the head backwards.
+        Conversation.objects.filter(
+            Q(last_message__isnull=True) | Q(last_message_id__lt=message.pk), pk=conversation_id,
+        ).update(last_message=message, last_message_at=sent_at, updated_at=sent_at)
+        members = ConversationMember.objects.filter(conversation_id=conversation_id)
+        members.exclude(user_id=sender.pk).update(
+            unread_count=F('unread_count') + 1, last_message_at=Greatest('last_message_at', sent_at),
+        )
+        members.filter(user_id=sender.pk).update(
+            unread_count=0, last_read_message_id=message.pk, last_message_at=Greatest('last_message_at', sent_at),
+        )
+        if recipients:
+            publish(
+                Notification.MESSAGE, 'users', f'New message from {sender.get_full_name() or sender.username}',
+                content[:200], data={'conversationId': conversation_id, 'messageId': message.pk},
+                group_key=f'conversation:{conversation_id}', user_ids=recipients,
+            )
+    return message
+
+
+def mark_read(conversation_id, user_id):
+    """Mark everything up to the conversation's last message as read."""
+    return ConversationMember.objects.filter(
+        conversation_id=conversation_id, user_id=user_id, unread_count__gt=0,
+    ).update(
+        unread_count=0,
+        last_read_message_id=Subquery(Conversation.objects.filter(pk=conversation_id).values('last_message_id')),
+    )
+
+
+def encode_inbox_cursor(member):
+    return f'{member.last_message_at.isoformat()}|{member.conversation_id}'
+
+
+def decode_inbox_cursor(cursor):
+    try:
+        moment, conversation_id = cursor.rsplit('|', 1)
+        return datetime.fromisoformat(moment), int(conversation_id)
+    except ValueError:
+        raise MessagingError('Invalid cursor')
+
+
+def inbox(user_id, first=20, after=None):
+    """``(member rows, has_next)`` for a page of the user's conversations, most recent first.
+
+    Each member row has ``conversation`` (with ``last_message`` and its
+    sender) and ``participants`` attached.
+    """
+    first = max(1, min(20 if first is None else first, MAX_PAGE))
+    members = ConversationMember.objects.filter(user_id=user_id).order_by('-last_message_at', '-conversation_id')
+    if after:
+        moment, conversation_id = decode_inbox_cursor(after)
+        # The ``lte`` bound is what lets the index seek straight to the cursor.
+        members = members.filter(last_message_at__lte=moment).filter(
+            Q(last_message_at__lt=moment) | Q(conversation_id__lt=conversation_id)
+        )
+    rows = list(members[:first + 1])
+    page = rows[:first]
+    ids = [member.conversation_id for member in page]
+    conversations = Conversation.objects.select_related('last_message__sender').in_bulk(ids)
+    participants = {}
+    for member in ConversationMember.objects.filter(conversation_id__in=ids).select_related('user'):
+        participants.setdefault(member.conversation_id, []).append(member.user)
+    for member in page:
+        member.conversation = conversations[member.conversation_id]
+        member.participants = participants.get(member.conversation_id, [])
+    return page, len(rows) > first
+
+
+def history(conversation_id, user_id, first=50, after=None):
+    """``(messages, has_next)``, newest first, with ``is_read`` set on each message."""
+    first = max(1, min(50 if first is None else first, MAX_PAGE))
+    members = {
+        member_id: last_read or 0
+        for member_id, last_read in ConversationMember.objects.filter(conversation_id=conversation_id)
+        .values_list('user_id', 'last_read_message_id')
+    }
+    if user_id not in members:
+        raise MessagingError('Conversation not found')
+    messages = Message.objects.filter(conversation_id=conversation_id).select_related('sender').order_by('-id')
+    if after:
+        if not str(after).isdigit():
+            raise MessagingError('Invalid cursor')
+        messages = messages.filter(id__lt=int(after))
+    rows = list(messages[:first + 1])
+    others_read = min((last_read for member_id, last_read in members.items() if member_id != user_id), default=0)
+    for message in rows:
+        # Our own messages are read once everyone else has read them.
+        message.is_read = message.id <= (others_read if message.sender_id == user_id else members[user_id])
+    return rows[:first], len(rows) > first
+
+
+def rebuild_heads(conversation_ids=None):
+    """Recompute last messages, unread counts and inbox order from the messages table."""
+    conversations = Conversation.objects.all()
+    members = ConversationMember.objects.all()
+    if conversation_ids is not None:
+        conversations = conversations.filter(pk__in=conversation_ids)
+        members = members.filter(conversation_id__in=conversation_ids)
+    latest = Message.objects.filter(conversation_id=OuterRef('pk')).order_by('-id')
+    unread = (
+        Message.objects.filter(conversation_id=OuterRef('conversation_id'))
+        .filter(id__gt=Coalesce(OuterRef('last_read_message_id'), 0))
+        .exclude(sender_id=OuterRef('user_id'))
+        .order_by().values('conversation_id').annotate(count=Count('id')).values('count')
+    )
+    head = Conversation.objects.filter(pk=OuterRef('conversation_id'))
+    with transaction.atomic():
+        conversations.update(
+            last_message_id=Subquery(latest.values('id')[:1]),
+            last_message_at=Subquery(latest.values('created_at')[:1]),
+        )
+        members.update(
+            last_message_at=Coalesce(Subquery(head.values('last_message_at')), F('joined_at')),
+            unread_count=Coalesce(Subquery(unread), 0),
+        )
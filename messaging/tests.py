@@ -0,0 +1,89 @@
+from messaging.store import get_or_create_conversation, send_message
+from src.testing import APITestCase, make_user
+
+CONVERSATIONS = '''
+query($first: Int, $after: String) {
+  myConversations(first: $first, after: $after) {
+    edges { cursor node { id unreadCount lastMessage { content } } }
+    pageInfo { hasNextPage endCursor }
+  }
+}
+'''
+MESSAGES = '''
+query($id: ID!, $first: Int, $after: String) {
+  conversationMessages(conversationId: $id, first: $first, after: $after) {
+    edges { node { content isRead } }
+    pageInfo { hasNextPage endCursor }
+  }
+}
+'''
+SEND = '''
+mutation($id: ID!, $content: String!) { sendMessage(conversationId: $id, content: $content) { success message } }
+'''
+
+
+class MessagingTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.other = make_user()
+        self.conversation = get_or_create_conversation(self.user.pk, self.other.pk)
+
+    def messages(self, user, first=None, after=None):
+        data = self.query(MESSAGES, {'id': self.conversation.pk, 'first': first, 'after': after}, user=user)
+        page = data['conversationMessages']
+        return [edge['node'] for edge in page['edges']], page['pageInfo']
+
+    def test_history_pages(self):
+        for n in range(5):
+            send_message(self.conversation.pk, self.user, f'message {n}')
+        contents, after = [], None
+        while True:
+            messages, page_info = self.messages(self.user, first=2, after=after)
+            contents += [message['content'] for message in messages]
+            if not page_info['hasNextPage']:
+                break
+            after = page_info['endCursor']
+        self.assertEqual(contents, [f'message {n}' for n in reversed(range(5))])
+
+    def test_reading_marks_messages_read(self):
+        send_message(self.conversation.pk, self.user, 'hello')
+        inbox = self.query(CONVERSATIONS, user=self.other)['myConversations']['edges']
+        self.assertEqual(inbox[0]['node']['unreadCount'], 1)
+        messages, _ = self.messages(self.user)
+        self.assertEqual(messages, [{'content': 'hello', 'isRead': False}])
+        self.messages(self.other)
+        inbox = self.query(CONVERSATIONS, user=self.other)['myConversations']['edges']
+        self.assertEqual(inbox[0]['node']['unreadCount'], 0)
+        messages, _ = self.messages(self.user)
+        self.assertEqual(messages, [{'content': 'hello', 'isRead': True}])
+
+    def test_inbox_pages_most_recent_first(self):
+        others = [make_user() for _ in range(3)]
+        for other in others:
+            conversation = get_or_create_conversation(self.user.pk, other.pk)
+            send_message(conversation.pk, other, f'from {other.pk}')
+        # The oldest conversation moves to the top with a new message.
+        send_message(self.conversation.pk, self.other, 'latest')
+        contents, after = [], None
+        while True:
+            data = self.query(CONVERSATIONS, {'first': 3, 'after': after}, user=self.user)['myConversations']
+            contents += [edge['node']['lastMessage']['content'] for edge in data['edges']]
+            if not data['pageInfo']['hasNextPage']:
+                break
+            after = data['pageInfo']['endCursor']
+        self.assertEqual(contents, ['latest'] + [f'from {other.pk}' for other in reversed(others)])
+
+    def test_send_message(self):
+        data = self.query(SEND, {'id': self.conversation.pk, 'content': 'hi'}, user=self.other)['sendMessage']
+        self.assertEqual(data, {'success': True, 'message': 'Message sent'})
+        data = self.query(SEND, {'id': self.conversation.pk, 'content': '  '}, user=self.other)['sendMessage']
+        self.assertEqual(data, {'success': False, 'message': 'Message is empty'})
+
+    def test_conversations_are_private(self):
+        outsider = make_user()
+        result = self.execute(MESSAGES, {'id': self.conversation.pk}, user=outsider)
+        self.assertError(result, 'Conversation not found')
+        data = self.query(SEND, {'id': self.conversation.pk, 'content': 'hi'}, user=outsider)['sendMessage']
+        self.assertEqual(data, {'success': False, 'message': 'Conversation not found'})
+        self.assertError(self.execute(MESSAGES, {'id': self.conversation.pk, 'after': 'x'}, user=self.user), 'Invalid cursor')
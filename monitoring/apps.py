@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        # Register metric definitions and the connection signal handler in
+        # every process, so /metrics can render values written by any worker.
+        from . import instrumentation, tracing  # noqa: F401
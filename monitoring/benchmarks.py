@@ -0,0 +1,300 @@
+"""
+End-to-end benchmarks of the API hot paths, with a history and a baseline.
+
+Scenarios send real requests, either through the full middleware stack in
+this process (``InProcessTransport``) or over HTTP to a running local
+server (``HTTPTransport``), from BENCHMARKS['CONCURRENCY'] threads.  The
+server must use the same database as the command: the fixed dataset, the
+benchmark vendor and the clean-up afterwards all go through the ORM here.
+It must also run with RATE_LIMITS_ENABLED=0: every request comes from one
+client, which the rate limits would soon answer with 429s.  In process, the
+command turns the limits off itself.
+
+Every run is appended to BENCHMARKS['HISTORY'] as one JSON line.  A run
+fails when a scenario's p95 is more than BENCHMARKS['THRESHOLD'] (a
+fraction) and BENCHMARKS['MIN_DELTA_MS'] above the one in
+BENCHMARKS['BASELINE'], which ``manage.py benchmark --save-baseline``
+writes.  Baselines only compare on the machine and dataset they were taken
+on; the dataset is recorded with each run and a mismatch is reported.
+"""
+
+import http.client
+import json
+import os
+import subprocess
+import threading
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from time import perf_counter
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections
+from django.test import Client
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+
+DEFAULTS = {
+    'HISTORY': os.path.join('var', 'benchmarks', 'history.jsonl'),
+    'BASELINE': os.path.join('var', 'benchmarks', 'baseline.json'),
+    'THRESHOLD': 0.2,
+    'MIN_DELTA_MS': 2.0,
+    'CONCURRENCY': 4,
+}
+
+VENDOR_EMAIL = 'bench-vendor@example.com'
+VENDOR_PASSWORD = 'bench-Password-1'
+PRODUCT_PREFIX = 'bench-product-'
+
+
+def benchmark_settings():
+    return {**DEFAULTS, **getattr(settings, 'BENCHMARKS', {})}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+class InProcessTransport:
+    """Requests through Django's handler and middleware, without sockets."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    @property
+    def client(self):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = Client(SERVER_NAME='localhost')
+        return client
+
+    def request(self, method, path, body=None, content_type=None, headers=None):
+        extra = {f'HTTP_{name.upper().replace("-", "_")}': value for name, value in (headers or {}).items()}
+        response = self.client.generic(method, path, body or b'', content_type or 'application/octet-stream', **extra)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response.status_code, content
+
+
+class HTTPTransport:
+    """Requests to a running server, over one keep-alive connection per thread."""
+
+    def __init__(self, url):
+        parts = urlsplit(url)
+        self.host, self.port = parts.hostname, parts.port or 80
+        self._local = threading.local()
+
+    def request(self, method, path, body=None, content_type=None, headers=None):
+        headers = dict(headers or {})
+        if content_type:
+            headers['Content-Type'] = content_type
+        if isinstance(body, str):
+            body = body.encode()
+        for attempt in range(2):
+            connection = getattr(self._local, 'connection', None)
+            if connection is None:
+                connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, ConnectionError):
+                # The server closed the idle connection; retry once on a new one.
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+
+
+def graphql(transport, query, variables=None, token=None):
+    headers = {'Authorization': f'Bearer {token}'} if token else None
+    status, content = transport.request(
+        'POST', '/graphql/', json.dumps({'query': query, 'variables': variables or {}}), 'application/json', headers,
+    )
+    body = json.loads(content) if status in (200, 400) else None
+    ok = status == 200 and not (body or {}).get('errors')
+    return ok, body
+
+
+USERS = '{ users { id username email firstName lastName } }'
+LOGIN = 'mutation($email: String!, $password: String!) { login(email: $email, password: $password) { token } }'
+CREATE_PRODUCT = '''
+mutation($name: String!, $price: Float!, $category: String!) {
+  createProduct(name: $name, price: $price, category: $category, stockQuantity: 10) { success product { id } }
+}
+'''
+SEARCH = '''
+query($query: String) {
+  searchProducts(query: $query, pageCount: 20) { totalCount items { id name price } facets { category count } }
+}
+'''
+SEARCH_TERMS = ('phone', 'shoes', 'lamp', 'garden', 'pro', 'book', 'camera', 'chair')
+
+
+class Context:
+    """State shared by the scenarios of one run."""
+
+    def __init__(self, transport, upload_size):
+        self.transport = transport
+        self.upload_size = upload_size
+        # Incompressible bytes of a typical photo's size; the upload view stores them as they are.
+        self.upload_body = encode_multipart(
+            BOUNDARY, {'image': ContentFile(os.urandom(upload_size), name='bench.jpg')},
+        )
+        self.token = None
+        self.uploaded = []
+        self.lock = threading.Lock()
+
+
+def users_list(context, n):
+    return graphql(context.transport, USERS)[0]
+
+
+def login(context, n):
+    return graphql(context.transport, LOGIN, {'email': VENDOR_EMAIL, 'password': VENDOR_PASSWORD})[0]
+
+
+def create_product(context, n):
+    ok, body = graphql(
+        context.transport, CREATE_PRODUCT,
+        {'name': f'{PRODUCT_PREFIX}{uuid.uuid4().hex[:12]}', 'price': 10 + n % 90, 'category': 'Electronics'},
+        context.token,
+    )
+    return ok and body['data']['createProduct']['success']
+
+
+def search(context, n):
+    return graphql(context.transport, SEARCH, {'query': SEARCH_TERMS[n % len(SEARCH_TERMS)]})[0]
+
+
+def upload(context, n):
+    status, content = context.transport.request('POST', '/api/upload-image/', context.upload_body, MULTIPART_CONTENT)
+    if status != 200:
+        return False
+    context.uploaded.append(urlsplit(json.loads(content)['image_url']).path)
+    return True
+
+
+def media(context, n):
+    with context.lock:
+        # When run without the upload scenario, serve a file of its own.
+        if not context.uploaded and not upload(context, n):
+            return False
+    status, content = context.transport.request('GET', context.uploaded[n % len(context.uploaded)])
+    return status == 200 and len(content) == context.upload_size
+
+
+# name -> (function, requests per run); media serves what upload stored.
+SCENARIOS = {
+    'users': (users_list, 100),
+    'login': (login, 20),
+    'create_product': (create_product, 200),
+    'search': (search, 400),
+    'upload': (upload, 200),
+    'media': (media, 400),
+}
+
+
+def run_scenario(context, function, requests, concurrency):
+    """Latency percentiles and throughput of ``requests`` calls spread over ``concurrency`` threads."""
+    latencies, failures, errors = [], [], set()
+    counter = iter(range(requests))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                n = next(counter, None)
+            if n is None:
+                # In-process requests open a connection per thread.
+                connections.close_all()
+                return
+            started = perf_counter()
+            try:
+                ok = function(context, n)
+            except Exception as exc:
+                ok = False
+                errors.add(repr(exc))
+            elapsed = perf_counter() - started
+            (latencies if ok else failures).append(elapsed)
+
+    threads = [threading.Thread(target=worker) for _ in range(max(1, min(concurrency, requests)))]
+    started = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = perf_counter() - started
+    return {
+        'requests': requests,
+        'failures': len(failures),
+        'errors': sorted(errors)[:3],
+        'rps': round(len(latencies) / wall, 1) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def new_run(target, dataset, concurrency):
+    return {
+        'started_at': datetime.now(dt_timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'target': target,
+        'dataset': dataset,
+        'concurrency': concurrency,
+        'scenarios': {},
+    }
+
+
+def _path(name):
+    return os.path.join(settings.BASE_DIR, benchmark_settings()[name])
+
+
+def append_history(run):
+    path = _path('HISTORY')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a') as f:
+        f.write(json.dumps(run) + '\n')
+    return path
+
+
+def load_baseline():
+    try:
+        with open(_path('BASELINE')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(run):
+    path = _path('BASELINE')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(run, f, indent=2)
+    os.replace(temporary, path)
+    return path
+
+
+def regressions(run, baseline):
+    """``(scenario, baseline p95, p95)`` for every scenario whose p95 regressed beyond the threshold."""
+    config = benchmark_settings()
+    found = []
+    for name, result in run['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            continue
+        limit = max(previous['p95_ms'] * (1 + config['THRESHOLD']), previous['p95_ms'] + config['MIN_DELTA_MS'])
+        if result['p95_ms'] > limit:
+            found.append((name, previous['p95_ms'], result['p95_ms']))
+    return found
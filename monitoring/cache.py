@@ -0,0 +1,38 @@
+"""
+Cache backends that count hits and misses.
+"""
+
+from django.core.cache.backends import locmem, redis
+
+from .instrumentation import CACHE_REQUESTS
+
+_MISSING = object()
+
+
+class MeasuredCacheMixin:
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        backend = type(self).__name__
+        if value is _MISSING:
+            CACHE_REQUESTS.inc((backend, 'miss'))
+            return default
+        CACHE_REQUESTS.inc((backend, 'hit'))
+        return value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        backend = type(self).__name__
+        if found:
+            CACHE_REQUESTS.inc((backend, 'hit'), len(found))
+        if len(keys) > len(found):
+            CACHE_REQUESTS.inc((backend, 'miss'), len(keys) - len(found))
+        return found
+
+
+class LocMemCache(MeasuredCacheMixin, locmem.LocMemCache):
+    pass
+
+
+class RedisCache(MeasuredCacheMixin, redis.RedisCache):
+    pass
@@ -0,0 +1,76 @@
+"""
+Minimal flamegraph renderer for collapsed stacks.
+"""
+
+from html import escape
+from zlib import crc32
+
+FRAME_HEIGHT = 16
+FONT_SIZE = 11
+CHAR_WIDTH = FONT_SIZE * 0.59
+
+
+def _build_tree(stacks):
+    root = {'name': 'all', 'count': 0, 'children': {}}
+    for stack, count in stacks.items():
+        root['count'] += count
+        node = root
+        for name in stack.split(';'):
+            child = node['children'].get(name)
+            if child is None:
+                child = node['children'][name] = {'name': name, 'count': 0, 'children': {}}
+            child['count'] += count
+            node = child
+    return root
+
+
+def _color(name):
+    # Stable warm palette keyed on the frame's module.
+    seed = crc32(name.split(':', 1)[0].encode())
+    return f'rgb({205 + seed % 50},{(seed >> 8) % 180},{(seed >> 16) % 55})'
+
+
+def render_svg(stacks, title='Flame Graph', width=1200, min_width=0.5):
+    """Render a ``{stack: count}`` mapping as a standalone SVG flamegraph."""
+    root = _build_tree(stacks)
+    total = root['count'] or 1
+    scale = (width - 20) / total
+    rects = []
+    depth_max = 0
+
+    def place(node, x, depth):
+        nonlocal depth_max
+        node_width = node['count'] * scale
+        if node_width < min_width:
+            return
+        depth_max = max(depth_max, depth)
+        rects.append((node, x, depth, node_width))
+        child_x = x
+        for child in sorted(node['children'].values(), key=lambda child: child['name']):
+            place(child, child_x, depth + 1)
+            child_x += child['count'] * scale
+
+    place(root, 10, 0)
+    height = (depth_max + 1) * FRAME_HEIGHT + 50
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'font-family="Verdana" font-size="{FONT_SIZE}">',
+        f'<rect width="100%" height="100%" fill="#f8f8f8"/>',
+        f'<text x="{width / 2}" y="20" text-anchor="middle" font-size="15">{escape(title)}</text>',
+    ]
+    for node, x, depth, node_width in rects:
+        y = height - 10 - (depth + 1) * FRAME_HEIGHT
+        percent = 100.0 * node['count'] / total
+        label = escape(f"{node['name']} ({node['count']} samples, {percent:.2f}%)")
+        parts.append(
+            f'<g><title>{label}</title>'
+            f'<rect x="{x:.1f}" y="{y}" width="{node_width:.1f}" height="{FRAME_HEIGHT - 1}" '
+            f'fill="{_color(node["name"])}" rx="2"/>'
+        )
+        max_chars = int((node_width - 6) / CHAR_WIDTH)
+        if max_chars >= 3:
+            text = node['name'] if len(node['name']) <= max_chars else node['name'][:max_chars - 2] + '..'
+            parts.append(f'<text x="{x + 3:.1f}" y="{y + FRAME_HEIGHT - 4}">{escape(text)}</text>')
+        parts.append('</g>')
+    parts.append('</svg>')
+    return '\n'.join(parts)
@@ -0,0 +1,83 @@
+"""
+HTTP, database, cache and upload metrics.
+"""
+
+from time import perf_counter
+
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .metrics import Counter, Histogram
+
+HTTP_REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'Time spent handling a request, per URL pattern.',
+    ('route', 'method'),
+)
+HTTP_RESPONSES = Counter(
+    'http_responses_total',
+    'Responses sent, per URL pattern and status code.',
+    ('route', 'method', 'status'),
+)
+HTTP_REQUEST_BYTES = Counter(
+    'http_request_body_bytes_total',
+    'Request body bytes received, per URL pattern.',
+    ('route',),
+)
+HTTP_RESPONSE_BYTES = Counter(
+    'http_response_body_bytes_total',
+    'Response body bytes sent, per URL pattern.',
+    ('route',),
+)
+DB_QUERY_DURATION = Histogram(
+    'db_query_duration_seconds',
+    'Time spent executing SQL, per database alias and statement type.',
+    ('alias', 'statement'),
+)
+DB_CONNECTIONS_OPENED = Counter(
+    'db_connections_opened_total',
+    'Database connections opened, per alias.',
+    ('alias',),
+)
+CACHE_REQUESTS = Counter(
+    'cache_requests_total',
+    'Cache lookups per backend and result; hit ratio is hit / (hit + miss).',
+    ('backend', 'result'),
+)
+UPLOADED_FILES = Counter(
+    'uploaded_files_total',
+    'Files accepted by the upload endpoints.',
+    ('kind',),
+)
+UPLOADED_BYTES = Counter(
+    'uploaded_bytes_total',
+    'Bytes accepted by the upload endpoints.',
+    ('kind',),
+)
+
+_STATEMENTS = {'SELECT', 'INSERT', 'UPDATE', 'DELETE'}
+
+
+def _statement_type(sql):
+    keyword = sql[:16].lstrip().split(None, 1)
+    keyword = keyword[0].upper() if keyword else ''
+    return keyword if keyword in _STATEMENTS else 'OTHER'
+
+
+def observe_query(execute, sql, params, many, context):
+    """Database execute wrapper recording query latency."""
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        DB_QUERY_DURATION.observe(
+            perf_counter() - start,
+            (context['connection'].alias, _statement_type(sql)),
+        )
+
+
+@receiver(connection_created)
+def instrument_connection(sender, connection, **kwargs):
+    DB_CONNECTIONS_OPENED.inc((connection.alias,))
+    if observe_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(observe_query)
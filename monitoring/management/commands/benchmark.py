@@ -0,0 +1,125 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from accounts.models import AccountProfile
+from jobs.models import Job
+from monitoring import benchmarks
+from products.models import Product
+
+# Fixed dataset, generated by manage.py seed with this seed when missing.
+DATASET = {'suppliers': 100, 'customers': 5000, 'products': 20_000, 'orders': 20_000, 'seed': 4242}
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the API hot paths, record the run in the history and fail on p95 regressions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help='Base URL of a running local server, started with RATE_LIMITS_ENABLED=0 since every request comes '
+                 'from one client; requests run in-process if omitted',
+        )
+        parser.add_argument('--only', nargs='+', choices=list(benchmarks.SCENARIOS), help='Scenarios to run')
+        parser.add_argument('--requests', type=int, help='Requests per scenario instead of each one\'s default')
+        parser.add_argument('--concurrency', type=int, help='Client threads (default BENCHMARKS["CONCURRENCY"])')
+        parser.add_argument('--upload-size', type=int, default=256 * 1024)
+        parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline to compare with')
+        parser.add_argument('--no-check', action='store_true', help='Record the run without comparing with the baseline')
+
+    def handle(self, *args, **options):
+        config = benchmarks.benchmark_settings()
+        concurrency = options['concurrency'] or config['CONCURRENCY']
+        self._ensure_dataset()
+        dataset = {'users': get_user_model().objects.count(), 'products': Product.objects.count()}
+        if options['url']:
+            transport, target = benchmarks.HTTPTransport(options['url']), options['url']
+            throttling = None
+        else:
+            transport, target = benchmarks.InProcessTransport(), 'in-process'
+            # Every scenario comes from one client, which the limiter would soon refuse.
+            throttling = override_settings(RATE_LIMITS={**getattr(settings, 'RATE_LIMITS', {}), 'ENABLED': False})
+            throttling.enable()
+        context = benchmarks.Context(transport, options['upload_size'])
+        run = benchmarks.new_run(target, dataset, concurrency)
+        try:
+            ok, body = benchmarks.graphql(
+                transport, benchmarks.LOGIN, {'email': benchmarks.VENDOR_EMAIL, 'password': benchmarks.VENDOR_PASSWORD},
+            )
+            if not ok:
+                raise CommandError(f'Benchmark vendor could not log in at {target}: {body}')
+            context.token = body['data']['login']['token']
+            self.stdout.write(f'{target}, {dataset["users"]:,} users, {dataset["products"]:,} products, {concurrency} clients')
+            for name, (function, requests) in benchmarks.SCENARIOS.items():
+                if options['only'] and name not in options['only']:
+                    continue
+                result = benchmarks.run_scenario(context, function, options['requests'] or requests, concurrency)
+                run['scenarios'][name] = result
+                self.stdout.write(
+                    f'  {name:<15} {result["rps"]:8.1f} req/s  p50 {result["p50_ms"]:8.2f} ms  '
+                    f'p95 {result["p95_ms"]:8.2f} ms  p99 {result["p99_ms"]:8.2f} ms'
+                    + (f'  {result["failures"]} failed' if result['failures'] else '')
+                )
+                for error in result['errors']:
+                    self.stderr.write(f'    {error}')
+        finally:
+            if throttling is not None:
+                throttling.disable()
+            self._clean_up(context)
+        self.stdout.write(f'Recorded in {benchmarks.append_history(run)}')
+        failed = [name for name, result in run['scenarios'].items() if result['failures']]
+        if failed:
+            # 429s here usually mean the server's rate limits are on.
+            raise CommandError(
+                f'Requests failed in {", ".join(failed)}; results are not comparable'
+                + (' (is the server running with RATE_LIMITS_ENABLED=0?)' if options['url'] else '')
+            )
+        if options['save_baseline']:
+            self.stdout.write(f'Saved as baseline in {benchmarks.save_baseline(run)}')
+            return
+        if options['no_check']:
+            return
+        self._compare(run, config)
+
+    def _compare(self, run, config):
+        baseline = benchmarks.load_baseline()
+        if baseline is None:
+            self.stdout.write('No baseline yet; store one with --save-baseline')
+            return
+        if baseline['dataset'] != run['dataset'] or baseline['target'] != run['target']:
+            self.stderr.write(
+                f'Baseline was taken on {baseline["target"]} with {baseline["dataset"]}; '
+                f'this run used {run["target"]} with {run["dataset"]}'
+            )
+        regressed = benchmarks.regressions(run, baseline)
+        if regressed:
+            raise CommandError(
+                f'p95 regressed by more than {config["THRESHOLD"]:.0%} against {baseline["revision"] or "the baseline"}: '
+                + ', '.join(f'{name} {before:.2f} -> {after:.2f} ms' for name, before, after in regressed)
+            )
+        self.stdout.write(self.style.SUCCESS(f'No p95 regressions against {baseline["revision"] or "the baseline"}'))
+
+    def _ensure_dataset(self):
+        User = get_user_model()
+        vendor = User.objects.filter(email=benchmarks.VENDOR_EMAIL).first()
+        if vendor is not None:
+            return
+        self.stdout.write('Generating the benchmark dataset')
+        call_command('seed', stdout=self.stdout, **DATASET)
+        call_command('rebuild_search_index', stdout=self.stdout)
+        vendor = User(username=benchmarks.VENDOR_EMAIL, email=benchmarks.VENDOR_EMAIL)
+        vendor.set_password(benchmarks.VENDOR_PASSWORD)
+        vendor.save()
+        AccountProfile.objects.create(user=vendor, account_type=AccountProfile.SUPPLIER)
+
+    def _clean_up(self, context):
+        Product.objects.filter(
+            seller__email=benchmarks.VENDOR_EMAIL, name__startswith=benchmarks.PRODUCT_PREFIX,
+        ).delete()
+        names = [path.removeprefix(settings.MEDIA_URL) for path in context.uploaded]
+        Job.objects.filter(task='search.tasks.fingerprint_upload', payload__path__in=names).delete()
+        for name in names:
+            default_storage.delete(name)
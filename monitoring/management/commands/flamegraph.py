@@ -0,0 +1,55 @@
+import glob
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from monitoring.flamegraph import render_svg
+from monitoring.profiler import profiler_settings, read_collapsed
+
+
+class Command(BaseCommand):
+    help = 'Merge collapsed stacks written by the slow-request profiler and render a flamegraph'
+
+    def add_arguments(self, parser):
+        parser.add_argument('label', nargs='?', help='URL pattern or graphql.<operation> slug; all profiles if omitted')
+        parser.add_argument('--dir', help='Profile directory (defaults to SLOW_REQUEST_PROFILER["OUTPUT_DIR"])')
+        parser.add_argument('--output', '-o', help='SVG file to write (defaults to <label>.svg)')
+        parser.add_argument('--collapsed', help='Also write the merged collapsed stacks to this file')
+        parser.add_argument('--list', action='store_true', help='List available labels and sample counts')
+        parser.add_argument('--clear', action='store_true', help='Delete the merged input files afterwards')
+
+    def handle(self, *args, **options):
+        directory = options['dir'] or os.path.join(settings.BASE_DIR, profiler_settings()['OUTPUT_DIR'])
+        paths = sorted(glob.glob(os.path.join(directory, '*.collapsed')))
+
+        if options['list']:
+            labels = {}
+            for path in paths:
+                label = os.path.basename(path).rsplit('.', 2)[0]
+                labels[label] = labels.get(label, 0) + sum(read_collapsed([path]).values())
+            for label, count in sorted(labels.items(), key=lambda item: -item[1]):
+                self.stdout.write(f'{count:>10}  {label}')
+            return
+
+        label = options['label']
+        if label:
+            paths = [path for path in paths if os.path.basename(path).rsplit('.', 2)[0] == label]
+        if not paths:
+            raise CommandError(f'No collapsed stacks found in {directory}')
+
+        stacks = read_collapsed(paths)
+        title = f'Slow requests: {label}' if label else 'Slow requests'
+        output = options['output'] or f'{label or "all"}.svg'
+        with open(output, 'w') as f:
+            f.write(render_svg(stacks, title=title))
+        if options['collapsed']:
+            with open(options['collapsed'], 'w') as f:
+                f.writelines(f'{stack} {count}\n' for stack, count in stacks.most_common())
+
+        if options['clear']:
+            for path in paths:
+                os.remove(path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Merged {sum(stacks.values())} samples from {len(paths)} files into {output}'
+        ))
@@ -0,0 +1,41 @@
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from monitoring import startup
+
+
+class Command(BaseCommand):
+    help = 'Report how long a worker takes to start, its peak RSS and the imports it spends the time on'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=25, help='Modules and packages to list')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed start-ups; the fastest is reported')
+        parser.add_argument(
+            '--no-warm', action='store_true', help='Only load the WSGI application, not the GraphQL schema and executor',
+        )
+
+    def handle(self, *args, **options):
+        timings, peak_rss_kib, imports = startup.measure(warm=not options['no_warm'], repeat=options['repeat'])
+        self.stdout.write(
+            f'Start-up (best of {max(1, options["repeat"])}): {timings["load"] * 1000:.0f} ms loading the application'
+            + ('' if options['no_warm'] else f', {timings["warm"] * 1000:.0f} ms building the GraphQL executor')
+            + f'; peak RSS {peak_rss_kib / 1024:.1f} MiB'
+        )
+        packages = startup.project_packages()
+        # Where each package was first pulled in from, rather than every module along its way.
+        entries = [entry for entry in imports if entry.parent is None or entry.parent.package != entry.package]
+        self.stdout.write(f'\nSlowest imports under -X importtime ({len(imports)} modules):')
+        self.stdout.write(f'  {"module":<44} {"total ms":>9} {"self ms":>8}  imported by')
+        for entry in sorted(entries, key=lambda entry: entry.cumulative_us, reverse=True)[:options['top']]:
+            self.stdout.write(
+                f'  {entry.name:<44} {entry.cumulative_us / 1000:9.1f} {entry.self_us / 1000:8.1f}  '
+                f'{startup.importer(entry, packages) or "-"}'
+            )
+        by_package = defaultdict(int)
+        for entry in imports:
+            by_package[entry.package] += entry.self_us
+        self.stdout.write('\nImport time by top-level package (self ms; * this project):')
+        for package, total in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:options['top']]:
+            marker = '*' if package in packages else ' '
+            self.stdout.write(f'  {marker} {package:<42} {total / 1000:9.1f}')
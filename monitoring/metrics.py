@@ -0,0 +1,282 @@
+"""
+Lightweight counters and histograms rendered in the Prometheus text format.
+
+Values live in a per-process store.  When the METRICS_MULTIPROC_DIR setting
+points at a directory, every process writes its
+values into its own mmap-backed file there and the /metrics view sums the
+files of all gunicorn workers; otherwise a plain in-memory dict is used.
+"""
+
+import bisect
+import json
+import mmap
+import os
+import struct
+import threading
+
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+_HEADER = struct.Struct('<I4x')
+_KEY_LENGTH = struct.Struct('<I')
+_VALUE = struct.Struct('<d')
+_INITIAL_FILE_SIZE = 1 << 20
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class LocalValues:
+    """Values of the current process only."""
+
+    def __init__(self):
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, increments):
+        with self._lock:
+            for key, amount in increments:
+                self._values[key] = self._values.get(key, 0) + amount
+
+    def collect(self):
+        with self._lock:
+            return dict(self._values)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class MmapValues:
+    """
+    Values shared between processes through one mmap'd file per pid.
+
+    Each file is an append-only sequence of ``key length, JSON key, double``
+    records behind a header holding the number of bytes in use.  Only the
+    owning process writes to a file, so no cross-process locking is needed;
+    readers tolerate a record being appended while they scan.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._pid = None
+        self._file = None
+        self._mmap = None
+        self._used = 0
+        self._offsets = {}
+
+    def _open(self):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'metrics_{os.getpid()}.db')
+        self._file = open(path, 'a+b')
+        if os.fstat(self._file.fileno()).st_size < _INITIAL_FILE_SIZE:
+            self._file.truncate(_INITIAL_FILE_SIZE)
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        self._pid = os.getpid()
+        self._offsets = {}
+        self._used = _HEADER.size
+        for key, offset, _value in _read_records(self._mmap):
+            self._offsets[_decode_key(key)] = offset
+            self._used = offset + _VALUE.size
+        _HEADER.pack_into(self._mmap, 0, self._used)
+
+    def _grow(self, needed):
+        size = len(self._mmap)
+        while size < needed:
+            size *= 2
+        self._mmap.close()
+        self._file.truncate(size)
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+
+    def _append(self, key):
+        encoded = json.dumps([key[0], list(key[1]), key[2]]).encode()
+        # Pad the key so the value that follows stays 8-byte aligned.
+        padded = len(encoded) + (-(_KEY_LENGTH.size + len(encoded)) % 8)
+        offset = self._used + _KEY_LENGTH.size + padded
+        end = offset + _VALUE.size
+        if end > len(self._mmap):
+            self._grow(end)
+        _KEY_LENGTH.pack_into(self._mmap, self._used, len(encoded))
+        self._mmap[self._used + _KEY_LENGTH.size:self._used + _KEY_LENGTH.size + len(encoded)] = encoded
+        _VALUE.pack_into(self._mmap, offset, 0.0)
+        self._used = end
+        _HEADER.pack_into(self._mmap, 0, self._used)
+        self._offsets[key] = offset
+        return offset
+
+    def inc(self, increments):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked workers must not keep writing into the parent's file.
+                self._open()
+            for key, amount in increments:
+                offset = self._offsets.get(key)
+                if offset is None:
+                    offset = self._append(key)
+                value, = _VALUE.unpack_from(self._mmap, offset)
+                _VALUE.pack_into(self._mmap, offset, value + amount)
+
+    def collect(self):
+        totals = {}
+        for name in os.listdir(self.directory) if os.path.isdir(self.directory) else ():
+            if not (name.startswith('metrics_') and name.endswith('.db')):
+                continue
+            with open(os.path.join(self.directory, name), 'rb') as f:
+                data = f.read()
+            for key, _offset, value in _read_records(data):
+                key = _decode_key(key)
+                totals[key] = totals.get(key, 0) + value
+        return totals
+
+    def clear(self):
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._file.close()
+            self._pid = None
+            for name in os.listdir(self.directory) if os.path.isdir(self.directory) else ():
+                if name.startswith('metrics_') and name.endswith('.db'):
+                    os.remove(os.path.join(self.directory, name))
+
+
+def _read_records(buffer):
+    used = min(_HEADER.unpack_from(buffer, 0)[0], len(buffer)) if len(buffer) >= _HEADER.size else 0
+    position = _HEADER.size
+    while position + _KEY_LENGTH.size <= used:
+        length, = _KEY_LENGTH.unpack_from(buffer, position)
+        start = position + _KEY_LENGTH.size
+        offset = start + length + (-(_KEY_LENGTH.size + length) % 8)
+        if offset + _VALUE.size > used:
+            break
+        key = bytes(buffer[start:start + length]).decode()
+        value, = _VALUE.unpack_from(buffer, offset)
+        yield key, offset, value
+        position = offset + _VALUE.size
+
+
+def _decode_key(key):
+    metric, labelvalues, slot = json.loads(key)
+    return metric, tuple(labelvalues), slot
+
+
+def _default_store():
+    from django.conf import settings
+
+    directory = getattr(settings, 'METRICS_MULTIPROC_DIR', None)
+    return MmapValues(str(directory)) if directory else LocalValues()
+
+
+class Registry:
+    """Collection of metrics exposed together on the /metrics view."""
+
+    def __init__(self, store=None):
+        self._metrics = {}
+        self._lock = threading.Lock()
+        self._store = store
+
+    @property
+    def store(self):
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = _default_store()
+        return self._store
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric {metric.name} is already registered')
+            self._metrics[metric.name] = metric
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def render(self):
+        by_metric = {}
+        for (name, labelvalues, slot), value in self.store.collect().items():
+            by_metric.setdefault(name, {}).setdefault(labelvalues, {})[slot] = value
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for suffix, labels, value in metric.samples(by_metric.get(metric.name, {})):
+                lines.append(f'{metric.name}{suffix}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    type = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=(), registry=REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._registry = registry or Registry(LocalValues())
+        if registry is not None:
+            registry.register(self)
+
+
+class Counter(Metric):
+    """Monotonically increasing value per label set."""
+
+    type = 'counter'
+
+    def inc(self, labelvalues=(), amount=1):
+        self._registry.store.inc((((self.name, labelvalues, 0), amount),))
+
+    def samples(self, values):
+        for labelvalues, slots in values.items():
+            yield '', _format_labels(self.labelnames, labelvalues), slots.get(0, 0)
+
+
+class Histogram(Metric):
+    """Cumulative bucketed observations per label set."""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, labelvalues=()):
+        # Slots: one per bucket plus +Inf, followed by sum and count.
+        self._registry.store.inc((
+            ((self.name, labelvalues, bisect.bisect_left(self.buckets, value)), 1),
+            ((self.name, labelvalues, len(self.buckets) + 1), value),
+            ((self.name, labelvalues, len(self.buckets) + 2), 1),
+        ))
+
+    def samples(self, values):
+        bounds = self.buckets + (float('inf'),)
+        for labelvalues, slots in values.items():
+            cumulative = 0
+            for index, bound in enumerate(bounds):
+                cumulative += slots.get(index, 0)
+                yield '_bucket', _format_labels(self.labelnames, labelvalues, (('le', _format_value(float(bound))),)), cumulative
+            yield '_sum', _format_labels(self.labelnames, labelvalues), slots.get(len(bounds), 0)
+            yield '_count', _format_labels(self.labelnames, labelvalues), slots.get(len(bounds) + 1, 0)
+
+
+def render_prometheus(registry=REGISTRY):
+    """Render every registered metric in the Prometheus exposition format."""
+    return registry.render()
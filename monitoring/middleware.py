@@ -0,0 +1,88 @@
+import os
+import random
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .instrumentation import (
+    HTTP_REQUEST_BYTES,
+    HTTP_REQUEST_DURATION,
+    HTTP_RESPONSE_BYTES,
+    HTTP_RESPONSES,
+)
+from .profiler import Sampler, profiler_settings, write_profile
+from .tracing import operation_label
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status and body sizes per URL pattern.
+
+    Requests are labelled with the matched route (``graphql/``,
+    ``^media/(?P<path>.*)$``...) rather than the raw path so the number of
+    series stays bounded.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = perf_counter()
+        response = self.get_response(request)
+        elapsed = perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match is not None else '<unmatched>'
+        method = request.method
+        HTTP_REQUEST_DURATION.observe(elapsed, (route, method))
+        HTTP_RESPONSES.inc((route, method, str(response.status_code)))
+
+        request_bytes = request.META.get('CONTENT_LENGTH')
+        if request_bytes and request_bytes.isdigit():
+            HTTP_REQUEST_BYTES.inc((route,), int(request_bytes))
+
+        if response.has_header('Content-Length'):
+            HTTP_RESPONSE_BYTES.inc((route,), int(response['Content-Length']))
+        elif not response.streaming:
+            HTTP_RESPONSE_BYTES.inc((route,), len(response.content))
+        return response
+
+
+class SlowRequestProfilerMiddleware:
+    """
+    Samples the stacks of requests running longer than
+    SLOW_REQUEST_PROFILER['THRESHOLD'] and writes them as collapsed stacks
+    named after the GraphQL operation or URL pattern.  Operation names go
+    through the same bounded labels as the tracing metrics, so clients cannot
+    create any number of files.
+    """
+
+    def __init__(self, get_response):
+        config = profiler_settings()
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.threshold = config['THRESHOLD']
+        self.request_rate = config['REQUEST_RATE']
+        self.output_dir = os.path.join(settings.BASE_DIR, config['OUTPUT_DIR'])
+        self.sampler = Sampler(1.0 / config['HZ'], config['MAX_DEPTH'])
+
+    def __call__(self, request):
+        if self.request_rate < 1.0 and random.random() >= self.request_rate:
+            return self.get_response(request)
+
+        profile = self.sampler.start(self.threshold)
+        try:
+            return self.get_response(request)
+        finally:
+            self.sampler.stop(profile)
+            if profile.samples:
+                write_profile(self.output_dir, self.request_label(request), profile.samples)
+
+    def request_label(self, request):
+        trace = getattr(request, '_graphql_trace', None)
+        if trace is not None and trace.operation:
+            return f'graphql.{operation_label(trace.operation)}'
+        match = getattr(request, 'resolver_match', None)
+        return match.route if match is not None else 'unmatched'
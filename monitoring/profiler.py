@@ -0,0 +1,150 @@
+"""
+Sampling profiler for slow requests.
+
+Requests are registered with a per-process sampler thread when they start.
+Once a request has been running for longer than the configured threshold the
+sampler snapshots its thread's stack at SLOW_REQUEST_PROFILER['HZ'] using
+``sys._current_frames()``; fast requests are never sampled, so the sampler
+sleeps until the earliest threshold is due.  Stacks of requests that finish
+over the threshold are appended, in collapsed-stack format, to one file per
+URL pattern or GraphQL operation name; ``manage.py flamegraph`` merges and
+renders them.
+
+A thread is used rather than SIGPROF/SIGALRM: signals are only delivered to
+the main thread and interrupt blocking calls inside database drivers, while
+reading frames from another thread works under both sync and threaded workers.
+"""
+
+import os
+import re
+import sys
+import threading
+from collections import Counter
+from time import perf_counter
+
+from django.conf import settings
+
+DEFAULTS = {
+    'ENABLED': False,
+    'THRESHOLD': 0.5,
+    'HZ': 1000,
+    'REQUEST_RATE': 1.0,
+    'MAX_DEPTH': 128,
+    'OUTPUT_DIR': 'profiles',
+}
+
+_code_labels = {}
+# Request threads of one process append to the same files.
+_write_lock = threading.Lock()
+
+
+def profiler_settings():
+    return {**DEFAULTS, **getattr(settings, 'SLOW_REQUEST_PROFILER', {})}
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    label = _code_labels.get(code)
+    if label is None:
+        module = frame.f_globals.get('__name__', '?')
+        label = _code_labels[code] = f'{module}:{code.co_qualname}'.replace(';', ':').replace(' ', '_')
+    return label
+
+
+def collapse_stack(frame, max_depth):
+    """Stack as ``root;...;leaf`` frame labels, the collapsed-stack format."""
+    labels = []
+    while frame is not None and len(labels) < max_depth:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(labels))
+
+
+def profile_filename(label):
+    slug = re.sub(r'[^A-Za-z0-9_.-]+', '_', label).strip('_.') or 'root'
+    return f'{slug}.{os.getpid()}.collapsed'
+
+
+class RequestProfile:
+    __slots__ = ('thread_id', 'started', 'sample_from', 'samples')
+
+    def __init__(self, thread_id, threshold):
+        self.thread_id = thread_id
+        self.started = perf_counter()
+        self.sample_from = self.started + threshold
+        self.samples = Counter()
+
+
+class Sampler:
+    """Per-process thread sampling the stacks of registered slow requests."""
+
+    def __init__(self, interval, max_depth):
+        self.interval = interval
+        self.max_depth = max_depth
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pid = None
+
+    def _ensure_thread(self):
+        if self._pid != os.getpid():
+            # Threads do not survive fork; start one in every worker.
+            self._pid = os.getpid()
+            self._active.clear()
+            thread = threading.Thread(target=self._run, name='slow-request-sampler', daemon=True)
+            thread.start()
+
+    def start(self, threshold):
+        profile = RequestProfile(threading.get_ident(), threshold)
+        with self._lock:
+            self._ensure_thread()
+            self._active[profile.thread_id] = profile
+        self._wakeup.set()
+        return profile
+
+    def stop(self, profile):
+        with self._lock:
+            self._active.pop(profile.thread_id, None)
+
+    def _run(self):
+        while True:
+            self._wakeup.clear()
+            with self._lock:
+                profiles = list(self._active.values())
+            if not profiles:
+                self._wakeup.wait()
+                continue
+            now = perf_counter()
+            due = [profile for profile in profiles if now >= profile.sample_from]
+            if due:
+                # Sample under the lock so stop() never sees a profile mid-update.
+                with self._lock:
+                    frames = sys._current_frames()
+                    for profile in due:
+                        frame = frames.get(profile.thread_id)
+                        if frame is not None and self._active.get(profile.thread_id) is profile:
+                            profile.samples[collapse_stack(frame, self.max_depth)] += 1
+                    del frames
+                timeout = self.interval
+            else:
+                timeout = min(profile.sample_from for profile in profiles) - now
+            self._wakeup.wait(timeout)
+
+
+def write_profile(directory, label, samples):
+    os.makedirs(directory, exist_ok=True)
+    lines = [f'{stack} {count}\n' for stack, count in samples.items()]
+    with _write_lock, open(os.path.join(directory, profile_filename(label)), 'a') as f:
+        f.writelines(lines)
+
+
+def read_collapsed(paths):
+    """Merge collapsed-stack files into a ``{stack: count}`` Counter."""
+    stacks = Counter()
+    for path in paths:
+        with open(path) as f:
+            for line in f:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                if stack and count.isdigit():
+                    stacks[stack] += int(count)
+    return stacks
@@ -0,0 +1,104 @@
+"""
+What a server process spends its start-up on.
+
+``measure`` starts fresh interpreters that load the WSGI application, as
+every gunicorn worker does without preload_app, and then optionally build
+the GraphQL schema and executor (``src.executor.warm``), which the first
+request would otherwise pay for.  It reports the time of both phases, the
+best of several runs, and the process's peak RSS.  One more run under
+``python -X importtime`` gives the imports, which ``parse`` turns into
+Import records with their importer, so a slow third-party import can be
+traced back to the module of this project that pulled it in.
+"""
+
+import json
+import os
+import re
+import subprocess
+import sys
+
+from django.apps import apps
+from django.conf import settings
+
+PROBE = '''
+import json, os, resource, sys, time
+started = time.perf_counter()
+os.environ['DJANGO_SETTINGS_MODULE'] = {settings_module!r}
+from src.wsgi import application
+loaded = time.perf_counter()
+if {warm!r}:
+    from src.executor import warm
+    warm()
+finished = time.perf_counter()
+sys.stdout.write(json.dumps({{
+    'load': loaded - started, 'warm': finished - loaded,
+    # KiB on Linux.
+    'peak_rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+}}))
+'''
+
+_line = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$')
+
+
+class Import:
+    __slots__ = ('name', 'self_us', 'cumulative_us', 'depth', 'parent')
+
+    def __init__(self, name, self_us, cumulative_us, depth):
+        self.name = name
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.depth = depth
+        self.parent = None
+
+    @property
+    def package(self):
+        return self.name.partition('.')[0]
+
+
+def parse(text):
+    """Imports listed in ``-X importtime`` output, in the order they finished."""
+    imports = []
+    pending = []
+    for line in text.splitlines():
+        match = _line.match(line)
+        if match is None:
+            continue
+        entry = Import(match[4], int(match[1]), int(match[2]), (len(match[3]) - 1) // 2)
+        # A module is listed after everything it imported, one level deeper.
+        while pending and pending[-1].depth > entry.depth:
+            pending.pop().parent = entry
+        pending.append(entry)
+        imports.append(entry)
+    return imports
+
+
+def project_packages():
+    base = str(settings.BASE_DIR)
+    return {'src'} | {config.name.partition('.')[0] for config in apps.get_app_configs() if str(config.path).startswith(base)}
+
+
+def importer(entry, packages):
+    """The nearest module of ``packages`` that (indirectly) imported ``entry``, if known."""
+    parent = entry.parent
+    while parent is not None:
+        if parent.package in packages:
+            return parent.name
+        parent = parent.parent
+    return None
+
+
+def _probe(warm, importtime=False):
+    code = PROBE.format(settings_module=os.environ.get('DJANGO_SETTINGS_MODULE', 'src.settings'), warm=warm)
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    result = subprocess.run(command, cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=120)
+    if result.returncode:
+        raise RuntimeError(f'Start-up probe failed:\n{result.stderr[-2000:]}')
+    return json.loads(result.stdout), result.stderr
+
+
+def measure(warm=True, repeat=5):
+    """``(best timings, peak RSS in KiB, imports)`` of starting the application ``repeat`` times."""
+    runs = [_probe(warm)[0] for _ in range(max(1, repeat))]
+    _, trace = _probe(warm, importtime=True)
+    best = min(runs, key=lambda run: run['load'] + run['warm'])
+    return best, max(run['peak_rss_kib'] for run in runs), parse(trace)
@@ -0,0 +1,275 @@
+"""
+Per-resolver timing and SQL accounting for GraphQL requests.
+
+The view opens a RequestTrace for every operation and installs a database
+execute wrapper; ResolverTracingMiddleware keeps a stack of active resolvers
+so every query is charged to the resolver that issued it.  Totals are folded
+into histograms per operation name and resolver path once the request ends.
+
+Both labels are kept to a bounded set, since clients choose operation names
+and aliases: paths are built from schema field names, not aliases, and
+deeper than MAX_PATH_DEPTH become ``Type.field``; operation names outside
+GRAPHQL_TRACING['OPERATIONS'] (or, without that list, beyond the first
+MAX_OPERATIONS seen by the process) are reported as ``other``.
+"""
+
+import functools
+from contextlib import ExitStack
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+from graphene.types import resolver as graphene_resolver
+from graphene_django import DjangoObjectType
+from graphql import get_named_type, is_leaf_type
+
+from .metrics import Counter, Histogram
+
+SQL_QUERY_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250)
+
+OPERATION_DURATION = Histogram(
+    'graphql_operation_duration_seconds',
+    'Wall time spent executing a GraphQL operation.',
+    ('operation',),
+)
+OPERATION_SQL_QUERIES = Histogram(
+    'graphql_operation_sql_queries',
+    'SQL queries issued while executing a GraphQL operation.',
+    ('operation',),
+    buckets=SQL_QUERY_BUCKETS,
+)
+RESOLVER_DURATION = Histogram(
+    'graphql_resolver_duration_seconds',
+    'Wall time spent in a resolver path per request, children included.',
+    ('operation', 'path'),
+)
+RESOLVER_SQL_QUERIES = Histogram(
+    'graphql_resolver_sql_queries',
+    'SQL queries issued directly by a resolver path per request.',
+    ('operation', 'path'),
+    buckets=SQL_QUERY_BUCKETS,
+)
+RESOLVER_SQL_SECONDS = Counter(
+    'graphql_resolver_sql_seconds_total',
+    'Time spent in SQL issued directly by a resolver path.',
+    ('operation', 'path'),
+)
+
+_DEFAULT_RESOLVERS = {
+    graphene_resolver.attr_resolver,
+    graphene_resolver.dict_resolver,
+    graphene_resolver.dict_or_attr_resolver,
+    DjangoObjectType.resolve_id,
+}
+
+# Cache of (parent type, field name) -> whether the field is worth timing.
+_traced_fields = {}
+_operations = set()
+
+
+def tracing_settings():
+    return getattr(settings, 'GRAPHQL_TRACING', {})
+
+
+def tracing_enabled():
+    return tracing_settings().get('ENABLED', False)
+
+
+def operation_label(name):
+    """``name`` as a metrics label: ``anonymous``, the name itself or ``other``."""
+    if name is None:
+        return 'anonymous'
+    config = tracing_settings()
+    allowed = config.get('OPERATIONS')
+    if allowed:
+        return name if name in allowed else 'other'
+    if name in _operations:
+        return name
+    if len(_operations) < config.get('MAX_OPERATIONS', 100):
+        _operations.add(name)
+        return name
+    return 'other'
+
+
+def _is_traced_field(info):
+    """
+    Scalar fields served by plain attribute resolvers are skipped: they cannot
+    issue queries on their own and timing thousands of them per list response
+    is where most of the overhead would come from.
+    """
+    field = info.parent_type.fields.get(info.field_name)
+    if field is None:
+        # Introspection fields (__schema, __type, __typename) are not traced.
+        _traced_fields[(info.parent_type, info.field_name)] = False
+        return False
+    resolve = field.resolve
+    while isinstance(resolve, functools.partial):
+        resolve = resolve.func
+    is_root = info.parent_type in (info.schema.query_type, info.schema.mutation_type)
+    traced = (
+        is_root
+        or not is_leaf_type(get_named_type(field.type))
+        or resolve not in _DEFAULT_RESOLVERS
+    )
+    _traced_fields[(info.parent_type, info.field_name)] = traced
+    return traced
+
+
+def _path_key(trace, info):
+    """
+    Resolver path by field name with list indices dropped, e.g.
+    ``users.vendor.name``; aliases of the same field share a path.
+    """
+    parent = info.path.prev
+    while parent is not None and isinstance(parent.key, int):
+        parent = parent.prev
+    if parent is None:
+        key = info.field_name
+    else:
+        prefix = trace.paths.get(parent)
+        if prefix is None or prefix.count('.') + 1 >= tracing_settings().get('MAX_PATH_DEPTH', 5):
+            # Below an untraced field (e.g. introspection) or too deep to keep apart.
+            key = f'{info.parent_type.name}.{info.field_name}'
+        else:
+            key = f'{prefix}.{info.field_name}'
+    trace.paths[info.path] = key
+    return key
+
+
+class RequestTrace:
+    """Timing and SQL totals collected while one GraphQL operation runs."""
+
+    __slots__ = (
+        'operation', 'expose', 'started', 'duration', 'stack', 'paths', 'resolvers', 'sql_count', 'sql_time',
+    )
+
+    def __init__(self, operation=None, expose=False):
+        self.operation = operation
+        self.expose = expose
+        self.started = perf_counter()
+        self.duration = None
+        self.stack = []
+        # graphql Path -> its key, so children can extend their parent's key.
+        self.paths = {}
+        # path -> [calls, wall time, sql count, sql time]
+        self.resolvers = {}
+        self.sql_count = 0
+        self.sql_time = 0.0
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            self.sql_count += 1
+            self.sql_time += elapsed
+            if self.stack:
+                frame = self.stack[-1]
+                frame[0] += 1
+                frame[1] += elapsed
+
+    def record(self, path, elapsed, frame):
+        totals = self.resolvers.get(path)
+        if totals is None:
+            self.resolvers[path] = [1, elapsed, frame[0], frame[1]]
+        else:
+            totals[0] += 1
+            totals[1] += elapsed
+            totals[2] += frame[0]
+            totals[3] += frame[1]
+
+    def finish(self):
+        self.duration = perf_counter() - self.started
+        operation = operation_label(self.operation)
+        OPERATION_DURATION.observe(self.duration, (operation,))
+        OPERATION_SQL_QUERIES.observe(self.sql_count, (operation,))
+        for path, (calls, wall, sql_count, sql_time) in self.resolvers.items():
+            labels = (operation, path)
+            RESOLVER_DURATION.observe(wall, labels)
+            RESOLVER_SQL_QUERIES.observe(sql_count, labels)
+            if sql_time:
+                RESOLVER_SQL_SECONDS.inc(labels, sql_time)
+
+    def as_dict(self):
+        return {
+            'operation': self.operation or 'anonymous',
+            'duration': self.duration,
+            'sqlCount': self.sql_count,
+            'sqlTime': self.sql_time,
+            'resolvers': [
+                {
+                    'path': path,
+                    'calls': calls,
+                    'duration': wall,
+                    'sqlCount': sql_count,
+                    'sqlTime': sql_time,
+                }
+                for path, (calls, wall, sql_count, sql_time) in self.resolvers.items()
+            ],
+        }
+
+
+class ResolverTracingMiddleware:
+    """Graphene middleware timing resolvers of requests that carry a trace."""
+
+    def resolve(self, next, root, info, **args):
+        trace = getattr(info.context, '_graphql_trace', None)
+        if trace is None:
+            return next(root, info, **args)
+        traced = _traced_fields.get((info.parent_type, info.field_name))
+        if traced is None:
+            traced = _is_traced_field(info)
+        if not traced:
+            return next(root, info, **args)
+        if trace.operation is None and info.operation.name is not None:
+            trace.operation = info.operation.name.value
+
+        frame = [0, 0.0]
+        trace.stack.append(frame)
+        start = perf_counter()
+        try:
+            # QuerySets are returned unevaluated, as without tracing; their
+            # query counts towards the operation but may be charged to
+            # whichever resolver runs while the list is completed.
+            return next(root, info, **args)
+        finally:
+            elapsed = perf_counter() - start
+            trace.stack.pop()
+            trace.record(_path_key(trace, info), elapsed, frame)
+
+
+class TracingGraphQLViewMixin:
+    """Opens a RequestTrace around execution and reports it in ``extensions``."""
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        if not tracing_enabled() or not query:
+            return super().execute_graphql_request(
+                request, data, query, variables, operation_name, show_graphiql
+            )
+
+        trace = RequestTrace(operation_name, expose=self.should_expose_trace(request))
+        request._graphql_trace = trace
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(trace.execute_wrapper))
+                return super().execute_graphql_request(
+                    request, data, query, variables, operation_name, show_graphiql
+                )
+        finally:
+            trace.finish()
+
+    def should_expose_trace(self, request):
+        header = tracing_settings().get('EXPOSE_HEADER', 'HTTP_X_GRAPHQL_TRACE')
+        if not request.META.get(header):
+            return False
+        user = getattr(request, 'user', None)
+        return settings.DEBUG or bool(user is not None and user.is_staff)
+
+    def json_encode(self, request, d, pretty=False):
+        trace = getattr(request, '_graphql_trace', None)
+        if trace is not None and trace.expose and trace.duration is not None:
+            d = dict(d)
+            d.setdefault('extensions', {})['tracing'] = trace.as_dict()
+        return super().json_encode(request, d, pretty)
@@ -0,0 +1,24 @@
+from ipaddress import ip_address, ip_network
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+
+from .metrics import render_prometheus
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _is_allowed(request):
+    try:
+        remote = ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    allowed = getattr(settings, 'METRICS_ALLOWED_NETWORKS', ['127.0.0.1/32', '::1/128'])
+    return any(remote in ip_network(network) for network in allowed)
+
+
+def metrics(request):
+    """Prometheus scrape endpoint, only reachable from local networks."""
+    if not _is_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from .models import Notification, NotificationPreferences
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ('user', 'type', 'title', 'count', 'is_read', 'updated_at')
+    list_filter = ('type', 'is_read')
+    raw_id_fields = ('user',)
+
+
+@admin.register(NotificationPreferences)
+class NotificationPreferencesAdmin(admin.ModelAdmin):
+    list_display = ('user', 'push_notifications', 'email_notifications', 'sms_notifications')
+    raw_id_fields = ('user',)
@@ -0,0 +1,178 @@
+"""
+Notification fan-out.
+
+``publish`` queues one event for an *audience*: a registered function that
+pages through the recipients' user ids in ascending order, e.g. everyone
+with a product in their cart.  The fan-out job handles one chunk of
+NOTIFICATIONS['CHUNK_SIZE'] recipients and queues the next chunk in the
+same transaction, so a price drop with 100k recipients is a series of short
+jobs rather than one that outlives its lease, and a failed chunk is retried
+on its own.
+
+Each chunk costs a fixed handful of queries whatever its size: one to find
+the recipients' unread notifications with the event's ``group_key`` inside
+NOTIFICATIONS['COALESCE_WINDOW'], one UPDATE folding the event into those
+(latest text, ``count`` + 1, no new push), one bulk INSERT for everyone
+else, and one to find who opted out of push for this type.  The transport
+then gets the notification once with the list of users to push it to.
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from cart.models import CartItem
+from wishlist.models import WishlistItem
+
+from .models import Notification, NotificationPreferences
+
+DEFAULTS = {
+    'TRANSPORT': 'notifications.transports.LogTransport',
+    'CHUNK_SIZE': 2000,
+    'COALESCE_WINDOW': 15 * 60,
+}
+
+# Preference that has to be on, besides push_notifications, to get a push.
+PUSH_PREFERENCES = {
+    Notification.ORDER: 'push_orders',
+    Notification.PRICE_DROP: 'push_promotions',
+    Notification.RESTOCK: 'push_promotions',
+    Notification.MESSAGE: 'push_messages',
+    Notification.PROMOTION: 'push_promotions',
+    Notification.SYSTEM: None,
+}
+
+_audiences = {}
+_transport = None
+
+
+def notification_settings():
+    return {**DEFAULTS, **getattr(settings, 'NOTIFICATIONS', {})}
+
+
+def get_transport():
+    global _transport
+    if _transport is None:
+        _transport = import_string(notification_settings()['TRANSPORT'])()
+    return _transport
+
+
+def audience(name):
+    """Register ``function(after, limit, **params)`` returning ascending user ids above ``after``."""
+    def register(function):
+        _audiences[name] = function
+        return function
+    return register
+
+
+@audience('users')
+def listed_users(after, limit, user_ids):
+    return sorted(user_id for user_id in set(user_ids) if user_id > after)[:limit]
+
+
+@audience('active_users')
+def active_users(after, limit):
+    return list(
+        get_user_model().objects.filter(is_active=True, pk__gt=after).order_by('pk').values_list('pk', flat=True)[:limit]
+    )
+
+
+@audience('cart_holders')
+def cart_holders(after, limit, product_id):
+    return list(
+        CartItem.objects.filter(product_id=product_id, cart__user_id__gt=after)
+        .order_by('cart__user_id').values_list('cart__user_id', flat=True)[:limit]
+    )
+
+
+@audience('product_watchers')
+def product_watchers(after, limit, product_id):
+    """Users with the product in their cart or on their wishlist."""
+    wishers = (
+        WishlistItem.objects.filter(product_id=product_id, user_id__gt=after)
+        .order_by('user_id').values_list('user_id', flat=True)[:limit]
+    )
+    # Each side's first ``limit`` ids include the first ``limit`` of the union.
+    return sorted(set(cart_holders(after, limit, product_id)).union(wishers))[:limit]
+
+
+def publish(type, audience, title, message, data=None, group_key='', **params):
+    """Queue a notification for everyone in ``audience``, in the caller's transaction."""
+    from .tasks import fan_out
+
+    if audience not in _audiences:
+        raise ValueError(f'Unknown audience {audience}')
+    return fan_out.enqueue(event={
+        'type': type, 'audience': audience, 'params': params,
+        'title': title, 'message': message, 'data': data or {}, 'group_key': group_key,
+    })
+
+
+def push_recipients(type, user_ids):
+    """The subset of ``user_ids`` that allow push notifications of ``type``."""
+    opted_out = Q(push_notifications=False)
+    if PUSH_PREFERENCES[type]:
+        opted_out |= Q(**{PUSH_PREFERENCES[type]: False})
+    # Users without a preferences row have the defaults, which allow push.
+    return set(user_ids) - set(
+        NotificationPreferences.objects.filter(opted_out, user_id__in=user_ids).values_list('user_id', flat=True)
+    )
+
+
+def insert(notification, user_ids):
+    """Save a copy of ``notification`` for each of ``user_ids``.
+
+    Every column but user_id is the same, so values are prepared once and
+    the rows go out in one executemany; ``bulk_create`` spends most of its
+    time building and preparing a model instance per row.
+    """
+    fields = [field for field in Notification._meta.concrete_fields if field.name not in ('id', 'user')]
+    values = [field.get_db_prep_save(getattr(notification, field.attname), connection) for field in fields]
+    columns = [Notification._meta.get_field('user').column] + [field.column for field in fields]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(Notification._meta.db_table),
+        ', '.join(map(connection.ops.quote_name, columns)),
+        ', '.join(['%s'] * len(columns)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, [(user_id, *values) for user_id in user_ids])
+
+
+def deliver(event, user_ids, now=None):
+    """Notify ``user_ids`` of ``event``; returns (created, coalesced) counts."""
+    now = now or timezone.now()
+    content = {'title': event['title'], 'message': event['message'], 'data': event['data']}
+    coalesced = {}
+    if event['group_key']:
+        cutoff = now - timedelta(seconds=notification_settings()['COALESCE_WINDOW'])
+        coalesced = dict(
+            Notification.objects.filter(
+                group_key=event['group_key'], user_id__in=user_ids, is_read=False, updated_at__gte=cutoff,
+            ).values_list('user_id', 'pk')
+        )
+        if coalesced:
+            Notification.objects.filter(pk__in=coalesced.values()).update(
+                count=F('count') + 1, updated_at=now, **content,
+            )
+    notification = Notification(type=event['type'], group_key=event['group_key'], created_at=now, updated_at=now, **content)
+    recipients = [user_id for user_id in user_ids if user_id not in coalesced]
+    if recipients:
+        insert(notification, recipients)
+    push = push_recipients(event['type'], recipients)
+    if push:
+        get_transport().send(notification, sorted(push))
+    return len(recipients), len(coalesced)
+
+
+def fan_out_chunk(event, after=0, chunk_size=None):
+    """Deliver ``event`` to the next chunk of its audience; returns the last user id, or None when done."""
+    chunk_size = chunk_size or notification_settings()['CHUNK_SIZE']
+    user_ids = _audiences[event['audience']](after, chunk_size, **event['params'])
+    if user_ids:
+        deliver(event, user_ids)
+    return user_ids[-1] if len(user_ids) == chunk_size else None
@@ -0,0 +1,78 @@
+from time import perf_counter
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from notifications.fanout import audience, fan_out_chunk, notification_settings
+from notifications.models import Notification
+from notifications.transports import LocalTransport
+
+PREFIX = 'notify-bench-'
+
+
+@audience('benchmark')
+def benchmark_users(after, limit):
+    return list(
+        get_user_model().objects.filter(username__startswith=PREFIX, pk__gt=after)
+        .order_by('pk').values_list('pk', flat=True)[:limit]
+    )
+
+
+class Command(BaseCommand):
+    help = 'Time a notification fan-out to N users, fresh and coalesced; benchmark users are kept for reuse'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipients', type=int, default=100_000)
+        parser.add_argument('--chunk-size', type=int, default=notification_settings()['CHUNK_SIZE'])
+
+    def handle(self, *args, **options):
+        self._ensure_users(options['recipients'])
+        event = {
+            'type': Notification.PROMOTION, 'audience': 'benchmark', 'params': {},
+            'title': 'Benchmark', 'message': 'Fan-out benchmark', 'data': {}, 'group_key': 'benchmark',
+        }
+        transport = LocalTransport()
+        Notification.objects.filter(group_key='benchmark').delete()
+        try:
+            for label in ('fresh', 'coalesced'):
+                LocalTransport.outbox = []
+                elapsed = self._fan_out(event, options['chunk_size'], transport)
+                recipients = Notification.objects.filter(group_key='benchmark').count()
+                per_100k = elapsed * 100_000 / max(recipients, 1)
+                self.stdout.write(
+                    f'{label:10} {recipients} recipients in {elapsed:.2f}s ({recipients / elapsed:,.0f}/s, '
+                    f'{per_100k:.2f}s per 100k), {sum(len(user_ids) for _, user_ids in LocalTransport.outbox)} pushed'
+                )
+        finally:
+            LocalTransport.outbox = []
+            Notification.objects.filter(group_key='benchmark').delete()
+
+    def _fan_out(self, event, chunk_size, transport):
+        from notifications import fanout
+
+        # Deliver through the local stand-in whatever TRANSPORT is configured.
+        configured, fanout._transport = fanout._transport, transport
+        started = perf_counter()
+        after = 0
+        try:
+            while after is not None:
+                # One transaction per chunk, as in the queued fan-out job.
+                with transaction.atomic():
+                    after = fan_out_chunk(event, after, chunk_size)
+        finally:
+            fanout._transport = configured
+        return perf_counter() - started
+
+    def _ensure_users(self, count):
+        User = get_user_model()
+        existing = User.objects.filter(username__startswith=PREFIX).count()
+        if existing >= count:
+            return
+        password = make_password(None)
+        User.objects.bulk_create(
+            [User(username=f'{PREFIX}{index}', password=password) for index in range(existing, count)],
+            batch_size=5000,
+        )
+        self.stdout.write(f'Created {count - existing} benchmark users')
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationPreferences',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('push_notifications', models.BooleanField(default=True)),
+                ('push_orders', models.BooleanField(default=True)),
+                ('push_promotions', models.BooleanField(default=True)),
+                ('push_messages', models.BooleanField(default=True)),
+                ('push_reviews', models.BooleanField(default=True)),
+                ('email_notifications', models.BooleanField(default=True)),
+                ('email_orders', models.BooleanField(default=True)),
+                ('email_promotions', models.BooleanField(default=False)),
+                ('email_messages', models.BooleanField(default=True)),
+                ('email_reviews', models.BooleanField(default=True)),
+                ('email_newsletter', models.BooleanField(default=False)),
+                ('sms_notifications', models.BooleanField(default=False)),
+                ('sms_orders', models.BooleanField(default=False)),
+                ('sms_promotions', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='notification_preferences', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'notification preferences',
+            },
+        ),
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('ORDER', 'Order'), ('PRICE_DROP', 'Price Drop'), ('RESTOCK', 'Restock'), ('MESSAGE', 'Message'), ('PROMOTION', 'Promotion'), ('SYSTEM', 'System')], max_length=16)),
+                ('title', models.CharField(max_length=255)),
+                ('message', models.TextField()),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('group_key', models.CharField(blank=True, max_length=100)),
+                ('count', models.PositiveIntegerField(default=1)),
+                ('is_read', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', '-id'], name='notificatio_user_id_c81de2_idx'), models.Index(fields=['group_key', 'user', 'updated_at'], name='notificatio_group_k_0cc16b_idx')],
+            },
+        ),
+    ]
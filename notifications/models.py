@@ -0,0 +1,61 @@
+from django.conf import settings
+from django.db import models
+
+
+class Notification(models.Model):
+    ORDER = 'ORDER'
+    PRICE_DROP = 'PRICE_DROP'
+    RESTOCK = 'RESTOCK'
+    MESSAGE = 'MESSAGE'
+    PROMOTION = 'PROMOTION'
+    SYSTEM = 'SYSTEM'
+    TYPE_CHOICES = [(kind, kind.replace('_', ' ').title()) for kind in (ORDER, PRICE_DROP, RESTOCK, MESSAGE, PROMOTION, SYSTEM)]
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
+    type = models.CharField(max_length=16, choices=TYPE_CHOICES)
+    title = models.CharField(max_length=255)
+    message = models.TextField()
+    data = models.JSONField(default=dict, blank=True)
+    # Events with the same key inside the coalescing window update one row.
+    group_key = models.CharField(max_length=100, blank=True)
+    count = models.PositiveIntegerField(default=1)
+    is_read = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-id']),
+            models.Index(fields=['group_key', 'user', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f'{self.type} for {self.user_id}: {self.title}'
+
+
+class NotificationPreferences(models.Model):
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notification_preferences'
+    )
+    push_notifications = models.BooleanField(default=True)
+    push_orders = models.BooleanField(default=True)
+    push_promotions = models.BooleanField(default=True)
+    push_messages = models.BooleanField(default=True)
+    push_reviews = models.BooleanField(default=True)
+    email_notifications = models.BooleanField(default=True)
+    email_orders = models.BooleanField(default=True)
+    email_promotions = models.BooleanField(default=False)
+    email_messages = models.BooleanField(default=True)
+    email_reviews = models.BooleanField(default=True)
+    email_newsletter = models.BooleanField(default=False)
+    sms_notifications = models.BooleanField(default=False)
+    sms_orders = models.BooleanField(default=False)
+    sms_promotions = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'notification preferences'
+
+    def __str__(self):
+        return f'Notification preferences of {self.user_id}'
@@ -0,0 +1,138 @@
+import graphene
+from graphene.types.generic import GenericScalar
+from graphene_django import DjangoObjectType
+from graphql import GraphQLError
+
+from accounts.schema import current_user_id
+
+from .models import Notification, NotificationPreferences
+
+MAX_PAGE = 100
+PREFERENCE_FIELDS = (
+    'push_notifications', 'push_orders', 'push_promotions', 'push_messages', 'push_reviews',
+    'email_notifications', 'email_orders', 'email_promotions', 'email_messages', 'email_reviews',
+    'email_newsletter', 'sms_notifications', 'sms_orders', 'sms_promotions',
+)
+
+
+class NotificationType(DjangoObjectType):
+    data = GenericScalar()
+
+    class Meta:
+        model = Notification
+        convert_choices_to_enum = False
+        fields = ('id', 'type', 'title', 'message', 'data', 'count', 'is_read', 'created_at', 'updated_at')
+
+
+class NotificationConnection(graphene.Connection):
+    class Meta:
+        node = NotificationType
+
+    unread_count = graphene.Int()
+
+
+class NotificationPreferencesType(DjangoObjectType):
+    class Meta:
+        model = NotificationPreferences
+        fields = ('id', *PREFERENCE_FIELDS, 'created_at', 'updated_at')
+
+
+def preferences_for(user_id):
+    preferences, _ = NotificationPreferences.objects.get_or_create(user_id=user_id)
+    return preferences
+
+
+class Query(graphene.ObjectType):
+    my_notifications = graphene.Field(
+        NotificationConnection, first=graphene.Int(default_value=20), after=graphene.String(), type=graphene.String(),
+    )
+    my_notification_preferences = graphene.Field(NotificationPreferencesType)
+
+    def resolve_my_notifications(self, info, first=20, after=None, type=None):
+        user_id = current_user_id(info)
+        first = max(1, min(20 if first is None else first, MAX_PAGE))
+        # Newest first; the cursor is the id of the last row seen.
+        queryset = Notification.objects.filter(user_id=user_id).order_by('-id')
+        if type:
+            queryset = queryset.filter(type=type)
+        if after:
+            if not after.isdigit():
+                raise GraphQLError('Invalid cursor')
+            queryset = queryset.filter(id__lt=int(after))
+        rows = list(queryset[:first + 1])
+        edges = [NotificationConnection.Edge(node=row, cursor=str(row.pk)) for row in rows[:first]]
+        return NotificationConnection(
+            edges=edges,
+            page_info=graphene.relay.PageInfo(
+                has_next_page=len(rows) > first,
+                has_previous_page=after is not None,
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+            ),
+            unread_count=Notification.objects.filter(user_id=user_id, is_read=False).count(),
+        )
+
+    def resolve_my_notification_preferences(self, info):
+        return preferences_for(current_user_id(info))
+
+
+class MarkNotificationRead(graphene.Mutation):
+    class Arguments:
+        notification_id = graphene.ID(required=True)
+
+    success = graphene.Boolean()
+    message = graphene.String()
+
+    def mutate(self, info, notification_id):
+        user_id = current_user_id(info)
+        updated = str(notification_id).isdigit() and Notification.objects.filter(
+            pk=notification_id, user_id=user_id,
+        ).update(is_read=True)
+        if not updated:
+            return MarkNotificationRead(success=False, message='Notification not found')
+        return MarkNotificationRead(success=True, message='Notification marked as read')
+
+
+class MarkAllNotificationsRead(graphene.Mutation):
+    success = graphene.Boolean()
+    message = graphene.String()
+
+    def mutate(self, info):
+        count = Notification.objects.filter(user_id=current_user_id(info), is_read=False).update(is_read=True)
+        return MarkAllNotificationsRead(success=True, message=f'{count} notifications marked as read')
+
+
+class UpdateNotificationPreferences(graphene.Mutation):
+    class Arguments:
+        push_notifications = graphene.Boolean()
+        push_orders = graphene.Boolean()
+        push_promotions = graphene.Boolean()
+        push_messages = graphene.Boolean()
+        push_reviews = graphene.Boolean()
+        email_notifications = graphene.Boolean()
+        email_orders = graphene.Boolean()
+        email_promotions = graphene.Boolean()
+        email_messages = graphene.Boolean()
+        email_reviews = graphene.Boolean()
+        email_newsletter = graphene.Boolean()
+        sms_notifications = graphene.Boolean()
+        sms_orders = graphene.Boolean()
+        sms_promotions = graphene.Boolean()
+
+    preferences = graphene.Field(NotificationPreferencesType)
+    success = graphene.Boolean()
+    message = graphene.String()
+
+    def mutate(self, info, **changes):
+        preferences = preferences_for(current_user_id(info))
+        for field, value in changes.items():
+            if value is not None:
+                setattr(preferences, field, value)
+        preferences.save()
+        return UpdateNotificationPreferences(preferences=preferences, success=True, message='Preferences updated')
+
+
+class Mutation(graphene.ObjectType):
+    mark_notification_read = MarkNotificationRead.Field()
+    mark_all_notifications_read = MarkAllNotificationsRead.Field()
+    update_notification_preferences = UpdateNotificationPreferences.Field()
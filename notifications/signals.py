@@ -0,0 +1,52 @@
+from django.db.models.signals import post_save, pre_save
+from django.dispatch import receiver
+
+from orders.models import Order
+from products.models import Product
+
+from .fanout import publish
+from .models import Notification
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_offer', None)
+    instance._loaded_offer = (instance.current_price, instance.stock_quantity)
+    if created or loaded is None or not instance.is_active:
+        return
+    price, stock = loaded
+    data = {'productId': instance.pk}
+    if instance.current_price < price:
+        publish(
+            Notification.PRICE_DROP, 'product_watchers', f'Price drop on {instance.name}',
+            f'{instance.name} is now {instance.current_price} (was {price}).',
+            data={**data, 'price': str(instance.current_price), 'previousPrice': str(price)},
+            group_key=f'price:{instance.pk}', product_id=instance.pk,
+        )
+    if stock == 0 and instance.stock_quantity > 0:
+        publish(
+            Notification.RESTOCK, 'product_watchers', f'{instance.name} is back in stock',
+            f'{instance.name} is available again.', data=data,
+            group_key=f'restock:{instance.pk}', product_id=instance.pk,
+        )
+
+
+@receiver(pre_save, sender=Order)
+def order_status_loaded(sender, instance, **kwargs):
+    # Read before save: the analytics receiver moves _loaded_status on post_save.
+    instance._status_changed = (
+        instance._state.adding or getattr(instance, '_loaded_status', instance.status) != instance.status
+    )
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, **kwargs):
+    if not getattr(instance, '_status_changed', False):
+        return
+    status = 'placed' if created else instance.get_status_display().lower()
+    publish(
+        Notification.ORDER, 'users', f'Order {instance.order_number} {status}',
+        f'Your order {instance.order_number} is {status}.',
+        data={'orderId': instance.pk, 'status': instance.status},
+        group_key=f'order:{instance.pk}', user_ids=[instance.customer_id],
+    )
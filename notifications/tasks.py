@@ -0,0 +1,10 @@
+from jobs.queue import task
+
+from .fanout import fan_out_chunk
+
+
+@task(atomic=True)
+def fan_out(event, after=0):
+    last = fan_out_chunk(event, after)
+    if last is not None:
+        fan_out.enqueue(event=event, after=last)
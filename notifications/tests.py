@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.db import transaction
+
+from notifications.fanout import publish
+from notifications.models import Notification, NotificationPreferences
+from notifications.transports import LocalTransport
+from src.testing import APITestCase, make_user, run_jobs
+
+MY_NOTIFICATIONS = '''
+query($first: Int, $after: String) {
+  myNotifications(first: $first, after: $after) {
+    unreadCount edges { node { title count } } pageInfo { hasNextPage endCursor }
+  }
+}
+'''
+
+
+def announce(title, group_key='', **params):
+    return publish(Notification.SYSTEM, 'users', title, 'Details', group_key=group_key, **params)
+
+
+class FanOutTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.users = [make_user() for _ in range(5)]
+        self.user_ids = [user.pk for user in self.users]
+
+    def test_fan_out_in_chunks(self):
+        with self.settings(NOTIFICATIONS={**settings.NOTIFICATIONS, 'CHUNK_SIZE': 2}):
+            announce('Maintenance', user_ids=self.user_ids)
+            # One job per chunk, each queueing the next.
+            self.assertEqual(run_jobs(), 3)
+        self.assertEqual(
+            sorted(Notification.objects.filter(title='Maintenance').values_list('user_id', flat=True)), self.user_ids,
+        )
+        self.assertEqual([sorted(user_ids) for _, user_ids in LocalTransport.outbox], [
+            self.user_ids[:2], self.user_ids[2:4], self.user_ids[4:],
+        ])
+
+    def test_events_with_a_group_key_coalesce(self):
+        announce('First', group_key='sale', user_ids=self.user_ids[:2])
+        run_jobs()
+        LocalTransport.outbox.clear()
+        announce('Second', group_key='sale', user_ids=self.user_ids)
+        run_jobs()
+        rows = dict(Notification.objects.filter(group_key='sale').values_list('user_id', 'count'))
+        self.assertEqual(rows, {user_id: 2 if user_id in self.user_ids[:2] else 1 for user_id in self.user_ids})
+        self.assertEqual(set(Notification.objects.values_list('title', flat=True)), {'Second'})
+        # Only the new recipients are pushed to again.
+        [(_, pushed)] = LocalTransport.outbox
+        self.assertEqual(sorted(pushed), self.user_ids[2:])
+
+    def test_push_preferences(self):
+        NotificationPreferences.objects.create(user=self.users[0], push_notifications=False)
+        NotificationPreferences.objects.create(user=self.users[1], push_promotions=False)
+        publish(Notification.PROMOTION, 'users', 'Sale', 'Details', user_ids=self.user_ids)
+        run_jobs()
+        [(_, pushed)] = LocalTransport.outbox
+        self.assertEqual(sorted(pushed), self.user_ids[2:])
+        # Everyone still gets the notification itself.
+        self.assertEqual(Notification.objects.count(), len(self.users))
+
+    def test_rolled_back_events_are_not_sent(self):
+        try:
+            with transaction.atomic():
+                announce('Never', user_ids=self.user_ids)
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(run_jobs(), 0)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_my_notifications_pages(self):
+        user = self.users[0]
+        for n in range(3):
+            announce(f'Notice {n}', user_ids=[user.pk])
+        run_jobs()
+        data = self.query(MY_NOTIFICATIONS, {'first': 2}, user=user)['myNotifications']
+        self.assertEqual(data['unreadCount'], 3)
+        self.assertEqual([edge['node']['title'] for edge in data['edges']], ['Notice 2', 'Notice 1'])
+        after = data['pageInfo']['endCursor']
+        data = self.query(MY_NOTIFICATIONS, {'first': 2, 'after': after}, user=user)['myNotifications']
+        self.assertEqual([edge['node']['title'] for edge in data['edges']], ['Notice 0'])
+        self.assertFalse(data['pageInfo']['hasNextPage'])
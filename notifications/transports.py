@@ -0,0 +1,34 @@
+"""
+Delivery transports for notifications.
+
+NOTIFICATIONS['TRANSPORT'] names the class that pushes new notifications to
+devices.  A fan-out sends the same notification to many users, so ``send``
+gets it once with the ids of the users who allow push for its type, much as
+push providers take one message for many device tokens.  Raising from
+``send`` has the whole chunk retried.
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class BaseTransport:
+    def send(self, notification, user_ids):
+        raise NotImplementedError
+
+
+class LogTransport(BaseTransport):
+    """Logs deliveries; the default until a push provider is configured."""
+
+    def send(self, notification, user_ids):
+        logger.info('Notify %d users: %s', len(user_ids), notification.title)
+
+
+class LocalTransport(BaseTransport):
+    """Keeps ``(notification, user_ids)`` sends in ``LocalTransport.outbox``, for tests and benchmarks."""
+
+    outbox = []
+
+    def send(self, notification, user_ids):
+        LocalTransport.outbox.append((notification, user_ids))
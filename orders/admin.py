@@ -0,0 +1,18 @@
+from django.contrib import admin
+
+from .models import Order, OrderItem
+
+
+class OrderItemInline(admin.TabularInline):
+    model = OrderItem
+    raw_id_fields = ('product',)
+    extra = 0
+
+
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_display = ('order_number', 'vendor', 'customer', 'total_amount', 'status', 'payment_status', 'created_at')
+    list_filter = ('status', 'payment_status')
+    search_fields = ('order_number',)
+    raw_id_fields = ('customer', 'vendor')
+    inlines = [OrderItemInline]
@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import models
+
+
+class Order(models.Model):
+    """A customer's order from one vendor; multi-vendor checkouts create one per vendor."""
+
+    PENDING = 'PENDING'
+    CONFIRMED = 'CONFIRMED'
+    SHIPPED = 'SHIPPED'
+    DELIVERED = 'DELIVERED'
+    CANCELLED = 'CANCELLED'
+    REFUNDED = 'REFUNDED'
+    STATUS_CHOICES = [(status, status.title()) for status in (PENDING, CONFIRMED, SHIPPED, DELIVERED, CANCELLED, REFUNDED)]
+    # Orders in these states do not count as sales.
+    VOID_STATUSES = (CANCELLED, REFUNDED)
+
+    PAYMENT_STATUS_CHOICES = [(status, status.title()) for status in ('PENDING', 'PAID', 'FAILED', 'REFUNDED')]
+
+    order_number = models.CharField(max_length=32, unique=True)
+    customer = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name='orders')
+    vendor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, related_name='vendor_orders')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    payment_status = models.CharField(max_length=16, choices=PAYMENT_STATUS_CHOICES, default='PENDING')
+    total_amount = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['vendor', '-created_at']),
+            models.Index(fields=['customer', '-created_at']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        order = super().from_db(db, field_names, values)
+        # Remembered so status changes can be told apart on save.
+        order._loaded_status = order.__dict__.get('status')
+        return order
+
+    @property
+    def counts_as_sale(self):
+        return self.status not in self.VOID_STATUSES
+
+    def __str__(self):
+        return self.order_number
+
+
+class OrderItem(models.Model):
+    order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
+    product = models.ForeignKey('products.Product', null=True, on_delete=models.SET_NULL, related_name='order_items')
+    product_name = models.CharField(max_length=255)
+    quantity = models.PositiveIntegerField()
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    total_price = models.DecimalField(max_digits=12, decimal_places=2)
+
+    def __str__(self):
+        return f'{self.quantity} x {self.product_name}'
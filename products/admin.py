@@ -0,0 +1,11 @@
+from django.contrib import admin
+
+from .models import Product
+
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ('name', 'seller', 'category', 'price', 'stock_quantity', 'is_active')
+    list_filter = ('category', 'is_active')
+    search_fields = ('name', 'brand')
+    raw_id_fields = ('seller', 'duplicate_of')
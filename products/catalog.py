@@ -0,0 +1,61 @@
+"""
+Product categories and sample data generators shared by the backend and the
+seeding scripts (scripts/populate_backend.py, ``manage.py seed``).
+
+The generators take a Faker instance (or anything with the same methods)
+and a ``random.Random``, so seeded callers get the same data every run.
+"""
+
+import random
+
+CATEGORIES = [
+    "Electronics", "Clothing", "Home & Garden", "Sports", "Beauty", 
+    "Books", "Toys", "Automotive", "Health", "Office Supplies"
+]
+
+PRODUCT_TYPES = {
+    "Electronics": ["Smartphone", "Laptop", "Headphones", "Camera", "Tablet", "Smartwatch", "Speaker", "Charger", "Cable", "Adapter"],
+    "Clothing": ["T-Shirt", "Jeans", "Dress", "Jacket", "Sweater", "Shoes", "Hat", "Scarf", "Belt", "Socks"],
+    "Home & Garden": ["Lamp", "Chair", "Table", "Plant", "Tool", "Decor", "Kitchen", "Bathroom", "Bedroom", "Living Room"],
+    "Sports": ["Ball", "Racket", "Shoes", "Equipment", "Gear", "Apparel", "Accessories", "Training", "Outdoor", "Fitness"],
+    "Beauty": ["Skincare", "Makeup", "Hair", "Fragrance", "Tools", "Bath", "Body", "Face", "Lips", "Eyes"],
+    "Books": ["Fiction", "Non-Fiction", "Textbook", "Comic", "Magazine", "Journal", "Guide", "Manual", "Reference", "Children"],
+    "Toys": ["Action Figure", "Doll", "Game", "Puzzle", "Educational", "Outdoor", "Electronic", "Building", "Art", "Music"],
+    "Automotive": ["Part", "Accessory", "Tool", "Maintenance", "Interior", "Exterior", "Engine", "Electrical", "Safety", "Performance"],
+    "Health": ["Supplement", "Equipment", "Monitor", "Therapy", "Fitness", "Medical", "Wellness", "Nutrition", "Care", "Treatment"],
+    "Office Supplies": ["Pen", "Paper", "Folder", "Binder", "Desk", "Chair", "Computer", "Printer", "Storage", "Organization"]
+}
+
+
+def generate_supplier_data(fake):
+    """Generate realistic supplier data"""
+    return {
+        "first_name": fake.first_name(),
+        "last_name": fake.last_name(),
+        "email": fake.email(),
+        "password": fake.password(length=12, special_chars=True, digits=True, upper_case=True, lower_case=True),
+    }
+
+
+def generate_product_data(category, fake, rng=random):
+    """Generate realistic product data"""
+    product_type = rng.choice(PRODUCT_TYPES[category])
+    brand = fake.company()
+    model = fake.bothify(text='??-####', letters='ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+
+    # Generate realistic pricing
+    base_price = round(rng.uniform(10, 500), 2)
+    discount_price = round(base_price * rng.uniform(0.1, 0.3), 2) if rng.random() < 0.3 else None
+
+    return {
+        "name": f"{brand} {product_type} {model}",
+        "brand": brand,
+        "description": fake.paragraph(nb_sentences=3),
+        "price": base_price,
+        "discount_price": discount_price,
+        # Placeholder images
+        "images": [f"https://picsum.photos/400/400?random={rng.randint(1, 1000)}" for _ in range(3)],
+        "category": category,
+        "subcategory": product_type,
+        "stock_quantity": rng.randint(10, 1000),
+    }
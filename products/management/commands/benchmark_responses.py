@@ -0,0 +1,101 @@
+import json
+import random
+from decimal import Decimal
+from statistics import median
+from time import process_time
+
+import graphene
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from products.catalog import CATEGORIES, PRODUCT_TYPES
+from products.models import Product
+from products.schema import ProductType
+from src import encoding
+
+QUERY = '''
+query($count: Int!) {
+  products(count: $count) {
+    id name description brand category subcategory price discountPrice
+    imagesUrl tags stockQuantity createdAt
+  }
+}
+'''
+
+
+def make_products(count, seed=0):
+    """Unsaved products shaped like the catalog, so no database is needed."""
+    rng = random.Random(seed)
+    now = timezone.now()
+    products = []
+    for pk in range(1, count + 1):
+        category = rng.choice(CATEGORIES)
+        kind = rng.choice(PRODUCT_TYPES[category])
+        price = Decimal(rng.randrange(199, 99999)) / 100
+        products.append(Product(
+            pk=pk, seller_id=rng.randrange(1, 500), name=f'{kind} {rng.randrange(1000, 9999)}',
+            description=f'A {kind.lower()} for everyday use in the {category.lower()} range, model {pk}.',
+            brand=rng.choice(['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli']), category=category,
+            subcategory=kind, price=price, discount_price=price * Decimal('0.9') if rng.random() < 0.3 else None,
+            images_url=[f'https://cdn.example.com/products/{pk}/{n}.jpg' for n in range(rng.randrange(1, 4))],
+            tags=rng.sample(['new', 'sale', 'popular', 'eco', 'gift', 'premium', 'bundle'], 3),
+            stock_quantity=rng.randrange(0, 500), created_at=now,
+        ))
+    return products
+
+
+class Query(graphene.ObjectType):
+    products = graphene.List(ProductType, count=graphene.Int(required=True))
+
+    def resolve_products(self, info, count):
+        return info.context.products[:count]
+
+
+class Context:
+    def __init__(self, products):
+        self.products = products
+
+
+class Command(BaseCommand):
+    help = 'CPU time and response size of product list payloads, per JSON encoder and compression'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10_000])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        schema = graphene.Schema(query=Query)
+        context = Context(make_products(max(options['sizes'])))
+        config = encoding.encoding_settings()
+        self.stdout.write(
+            f'orjson {"installed" if encoding.orjson else "not installed"}; '
+            f'compression: {", ".join(sorted(encoding.COMPRESSORS))}'
+        )
+        for size in options['sizes']:
+            result = schema.execute(QUERY, variables={'count': size}, context_value=context)
+            assert not result.errors, result.errors
+            payload = {'data': result.data}
+            stdlib = json.dumps(payload, separators=(',', ':')).encode()
+            content = encoding.dumps(payload)
+            rows = [
+                ('json.dumps', self._cpu(lambda: json.dumps(payload, separators=(',', ':')), options['repeat']), len(stdlib)),
+                ('encoding.dumps', self._cpu(lambda: encoding.dumps(payload), options['repeat']), len(content)),
+            ]
+            for coding, compressor in sorted(encoding.COMPRESSORS.items()):
+                level = config['LEVELS'][coding]
+                compressed = compressor(content, level)
+                rows.append((
+                    f'  + {coding} {level}', self._cpu(lambda: compressor(content, level), options['repeat']),
+                    len(compressed),
+                ))
+            self.stdout.write(f'{size:>6,} products:')
+            for name, ms, length in rows:
+                self.stdout.write(f'  {name:<16} {ms:8.2f} ms CPU  {length:>11,} bytes')
+
+    def _cpu(self, function, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = process_time()
+            function()
+            timings.append(process_time() - started)
+        return median(timings) * 1000
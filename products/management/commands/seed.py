@@ -0,0 +1,126 @@
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from orders.models import Order
+from products import seeding
+from products.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the local database with generated suppliers, customers, products and orders; '
+        'the same --seed gives the same data'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--suppliers', type=int, default=100)
+        parser.add_argument('--customers', type=int, default=10_000)
+        parser.add_argument('--products', type=int, default=20_000)
+        parser.add_argument('--orders', type=int, default=50_000)
+        parser.add_argument('--days', type=int, default=365, help='Spread creation times over this many past days')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch', type=int, default=5000, help='Rows per generated batch and transaction')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count() or 1, help='Generating processes; 0 generates inline',
+        )
+        parser.add_argument('--password', default='seed-Password-1', help='Password of every seeded user')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args, **options):
+        if seeding.Faker is None:
+            raise CommandError('manage.py seed needs Faker: pip install Faker')
+        if options['suppliers'] < 1 or (options['orders'] and (options['customers'] < 1 or options['products'] < 1)):
+            raise CommandError('Orders need at least one supplier, customer and product')
+        if options['batch'] < 1:
+            raise CommandError('--batch must be positive')
+        database = options['database']
+        first_ids = tuple(
+            (model.objects.using(database).aggregate(last=Max('pk'))['last'] or 0) + 1
+            for model in (get_user_model(), Product, Order)
+        )
+        plan = seeding.Plan(
+            options['seed'], options['suppliers'], options['customers'], options['products'], options['orders'],
+            first_ids, timezone.now(), options['days'],
+            # Hashed once: hashing every user's password would take longer than the rest put together.
+            make_password(options['password']), database,
+        )
+        self.batch = options['batch']
+        self.workers = options['workers']
+        executor = None
+        if self.workers:
+            executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context('spawn'),
+                initializer=seeding.init_worker, initargs=(plan.seed,),
+            )
+        else:
+            seeding.init_worker(plan.seed, setup=False)
+        try:
+            self._table('users', executor, seeding.user_rows, plan, plan.suppliers + plan.customers)
+            self._table('products', executor, seeding.product_rows, plan, plan.products)
+            self._table('orders', executor, seeding.order_rows, plan, plan.orders)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+        # Rows were inserted with explicit ids, which sequences (e.g. PostgreSQL's) do not see.
+        connection = connections[database]
+        models = [apps.get_model(label) for label in (settings.AUTH_USER_MODEL, 'products.Product', 'orders.Order')]
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+        self.stdout.write(
+            'Model signals were bypassed; run rebuild_search_index, build_suggest_index and '
+            f'compact_rollups --rebuild-days {options["days"]} to index the new rows, and '
+            f'find_duplicates --since {first_ids[1] - 1} to check the new products against the catalogue.'
+        )
+
+    def _batches(self, executor, function, plan, count):
+        """Results of ``function`` over consecutive batches, in order, with a bounded number in flight."""
+        ranges = ((start, min(start + self.batch, count)) for start in range(0, count, self.batch))
+        if executor is None:
+            for start, stop in ranges:
+                yield seeding.generate(function, plan, start, stop)
+            return
+        pending = deque()
+        for start, stop in ranges:
+            pending.append(executor.submit(seeding.generate, function, plan, start, stop))
+            # Generation runs ahead of the writer by at most two batches per worker.
+            if len(pending) >= 2 * self.workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def _table(self, name, executor, function, plan, count):
+        if not count:
+            return
+        connection = connections[plan.database]
+        started = perf_counter()
+        written = 0
+        for tables in self._batches(executor, function, plan, count):
+            with transaction.atomic(using=plan.database), connection.cursor() as cursor:
+                # Tables in dependency order, e.g. orders before their items.
+                for label, (columns, values) in tables.items():
+                    table = apps.get_model(label)._meta.db_table
+                    cursor.executemany(
+                        f'INSERT INTO {connection.ops.quote_name(table)} '
+                        f'({", ".join(connection.ops.quote_name(column) for column in columns)}) '
+                        f'VALUES ({", ".join(["%s"] * len(columns))})',
+                        values,
+                    )
+            written += len(next(iter(tables.values()))[1])
+            self.stdout.write(f'\r  {name}: {written:,}', ending='')
+            self.stdout.flush()
+        elapsed = perf_counter() - started
+        self.stdout.write(f'\r  {name}: {written:,} rows in {elapsed:.1f}s ({written / elapsed:,.0f} rows/s)')
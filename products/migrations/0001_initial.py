@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True)),
+                ('brand', models.CharField(blank=True, max_length=255)),
+                ('category', models.CharField(choices=[('Electronics', 'Electronics'), ('Clothing', 'Clothing'), ('Home & Garden', 'Home & Garden'), ('Sports', 'Sports'), ('Beauty', 'Beauty'), ('Books', 'Books'), ('Toys', 'Toys'), ('Automotive', 'Automotive'), ('Health', 'Health'), ('Office Supplies', 'Office Supplies')], max_length=64)),
+                ('subcategory', models.CharField(blank=True, max_length=64)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('discount_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('images_url', models.JSONField(blank=True, default=list)),
+                ('tags', models.JSONField(blank=True, default=list)),
+                ('stock_quantity', models.PositiveIntegerField(default=0)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='products', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['category', '-created_at'], name='products_pr_categor_4d32d3_idx'), models.Index(fields=['seller', '-created_at'], name='products_pr_seller__d25fb8_idx')],
+            },
+        ),
+    ]
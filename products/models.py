@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.db import models
+
+from .catalog import CATEGORIES
+
+
+class Product(models.Model):
+    seller = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='products')
+    name = models.CharField(max_length=255)
+    description = models.TextField(blank=True)
+    brand = models.CharField(max_length=255, blank=True)
+    category = models.CharField(max_length=64, choices=[(category, category) for category in CATEGORIES])
+    subcategory = models.CharField(max_length=64, blank=True)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    discount_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    images_url = models.JSONField(default=list, blank=True)
+    tags = models.JSONField(default=list, blank=True)
+    stock_quantity = models.PositiveIntegerField(default=0)
+    is_active = models.BooleanField(default=True)
+    duplicate_of = models.ForeignKey('self', null=True, blank=True, on_delete=models.SET_NULL, related_name='duplicates')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['category', '-created_at']),
+            models.Index(fields=['seller', '-created_at']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        product = super().from_db(db, field_names, values)
+        # Remembered so price drops and restocks can be told apart on save.
+        if {'price', 'discount_price', 'stock_quantity'} <= product.__dict__.keys():
+            product._loaded_offer = (product.current_price, product.stock_quantity)
+        return product
+
+    @property
+    def current_price(self):
+        return self.discount_price or self.price
+
+    def __str__(self):
+        return self.name
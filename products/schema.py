@@ -0,0 +1,76 @@
+from decimal import Decimal
+
+import graphene
+from django.core.exceptions import ValidationError
+from graphene_django import DjangoObjectType
+from graphql import GraphQLError
+
+from .models import Product
+from .signals import product_viewed
+
+
+class ProductType(DjangoObjectType):
+    images_url = graphene.List(graphene.String)
+    tags = graphene.List(graphene.String)
+    price = graphene.Float()
+    discount_price = graphene.Float()
+
+    class Meta:
+        model = Product
+        convert_choices_to_enum = False
+        fields = (
+            "id", "seller", "name", "description", "brand", "category", "subcategory",
+            "price", "discount_price", "images_url", "tags", "stock_quantity", "created_at",
+        )
+
+
+class Query(graphene.ObjectType):
+    product = graphene.Field(ProductType, id=graphene.Int(required=True))
+
+    def resolve_product(self, info, id):
+        product = Product.objects.filter(is_active=True).select_related('seller').filter(pk=id).first()
+        if product is not None:
+            product_viewed.send(sender=Product, product=product, user=info.context.user)
+        return product
+
+
+class CreateProduct(graphene.Mutation):
+    class Arguments:
+        name = graphene.String(required=True)
+        description = graphene.String()
+        price = graphene.Float(required=True)
+        discount_price = graphene.Float()
+        images_url = graphene.List(graphene.String)
+        category = graphene.String(required=True)
+        subcategory = graphene.String()
+        brand = graphene.String()
+        stock_quantity = graphene.Int()
+        tags = graphene.List(graphene.String)
+
+    success = graphene.Boolean()
+    message = graphene.String()
+    product = graphene.Field(ProductType)
+
+    def mutate(self, info, name, price, category, description='', discount_price=None, images_url=None,
+               subcategory='', brand='', stock_quantity=0, tags=None):
+        user = info.context.user
+        if not user.is_authenticated:
+            raise GraphQLError('Authentication required')
+        product = Product(
+            seller=user, name=name, description=description or '', category=category, subcategory=subcategory or '',
+            brand=brand or '', price=Decimal(str(price)),
+            discount_price=Decimal(str(discount_price)) if discount_price is not None else None,
+            images_url=images_url or [], tags=tags or [], stock_quantity=stock_quantity or 0,
+        )
+        try:
+            product.full_clean(exclude=['seller'])
+        except ValidationError as error:
+            return CreateProduct(success=False, message='; '.join(
+                f'{field}: {" ".join(messages)}' for field, messages in error.message_dict.items()
+            ))
+        product.save()
+        return CreateProduct(success=True, message='Product created', product=product)
+
+
+class Mutation(graphene.ObjectType):
+    create_product = CreateProduct.Field()
@@ -0,0 +1,228 @@
+"""
+Row generation for ``manage.py seed``.
+
+Every row is a pure function of the seed, its table and its index: the
+command lays out primary keys up front (suppliers, then customers, products
+and orders, each a contiguous range), so products can name their seller and
+orders their customer, vendor and products without reading anything back.
+Batches can therefore be generated by any worker in any order and the
+result is the same.
+
+Workers also turn rows into database values (``prepare``), which is most of
+what ``bulk_create`` spends its time on, so the writing process only runs
+``executemany`` and is rarely the bottleneck.  Model signals and
+auto_now/auto_now_add are bypassed, so the generated timestamps are kept.
+
+Faker is slow next to the inserts (a company name alone takes ~150 us), so
+SampledFaker asks Faker for a pool of values per method once per process,
+seeded by the method and its arguments, and then draws from the pool with
+each row's own ``random.Random``.
+"""
+
+import random
+import re
+from datetime import timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+
+from .catalog import CATEGORIES, generate_product_data, generate_supplier_data
+
+try:
+    from faker import Faker
+except ImportError:  # Seeding is unavailable without Faker.
+    Faker = None
+
+POOL_SIZE = 2000
+MAX_ITEMS = 4
+# Weighted like a shop's order history: most orders delivered, some still moving, a few void.
+STATUSES = (
+    ('DELIVERED', 'PAID', 60), ('SHIPPED', 'PAID', 12), ('CONFIRMED', 'PAID', 10),
+    ('PENDING', 'PENDING', 8), ('CANCELLED', 'FAILED', 6), ('REFUNDED', 'REFUNDED', 4),
+)
+_STATUS_WEIGHTS = [weight for _, _, weight in STATUSES]
+_unsafe = re.compile(r'[^a-z0-9]+')
+
+
+class SampledFaker:
+    """Faker look-alike drawing each method's values from a fixed pool, using ``rng``."""
+
+    def __init__(self, fake, seed, pool_size=POOL_SIZE):
+        self._fake = fake
+        self._seed = seed
+        self._pool_size = pool_size
+        self._pools = {}
+        self.rng = random.Random()
+
+    def __getattr__(self, name):
+        method = getattr(self._fake, name)
+
+        def sample(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            pool = self._pools.get(key)
+            if pool is None:
+                # Seeded per pool, so pools do not depend on the order they are first used in.
+                self._fake.seed_instance(f'{self._seed}:{key}')
+                pool = self._pools[key] = [method(*args, **kwargs) for _ in range(self._pool_size)]
+            return self.rng.choice(pool)
+
+        return sample
+
+
+class Plan:
+    """Counts, seed and first primary key of each seeded table."""
+
+    def __init__(self, seed, suppliers, customers, products, orders, first_ids, now, days, password, database):
+        self.seed = seed
+        self.suppliers = suppliers
+        self.customers = customers
+        self.products = products
+        self.orders = orders
+        self.first_user_id, self.first_product_id, self.first_order_id = first_ids
+        self.now = now
+        self.days = days
+        self.password = password
+        self.database = database
+
+    def rng(self, table, index):
+        return random.Random(f'{self.seed}:{table}:{index}')
+
+    def moment(self, rng):
+        return self.now - timedelta(seconds=rng.random() * self.days * 86400)
+
+    def seller_index(self, product):
+        return product % self.suppliers
+
+    def products_of(self, supplier):
+        return len(range(supplier, self.products, self.suppliers))
+
+
+_fake = None
+
+
+def init_worker(seed, setup=True):
+    global _fake
+    if setup:
+        import django
+
+        django.setup()
+    if Faker is None:
+        raise RuntimeError('Seeding needs Faker (pip install Faker)')
+    _fake = SampledFaker(Faker(), seed)
+
+
+def _sampled(rng):
+    if _fake is None:
+        raise RuntimeError('init_worker() has not run in this process')
+    _fake.rng = rng
+    return _fake
+
+
+def user_rows(plan, start, stop):
+    """Users ``start``..``stop``: the first ``plan.suppliers`` are suppliers, the rest customers."""
+    users, profiles = [], []
+    for index in range(start, stop):
+        rng = plan.rng('user', index)
+        data = generate_supplier_data(_sampled(rng))
+        pk = plan.first_user_id + index
+        name, _, domain = data['email'].partition('@')
+        # The primary key keeps sampled addresses unique.
+        email = f"{_unsafe.sub('.', name.lower()).strip('.')}.{pk}@{domain}"
+        joined = plan.moment(rng)
+        users.append({
+            'id': pk, 'username': email, 'email': email, 'password': plan.password,
+            'first_name': data['first_name'], 'last_name': data['last_name'], 'date_joined': joined,
+        })
+        profiles.append({
+            'user_id': pk, 'account_type': 'SUPPLIER' if index < plan.suppliers else 'CUSTOMER',
+            'terms_accepted_at': joined,
+        })
+    return {settings.AUTH_USER_MODEL: users, 'accounts.AccountProfile': profiles}
+
+
+def product_row(plan, index):
+    rng = plan.rng('product', index)
+    data = generate_product_data(rng.choice(CATEGORIES), _sampled(rng), rng)
+    created = plan.moment(rng)
+    return {
+        'id': plan.first_product_id + index,
+        'seller_id': plan.first_user_id + plan.seller_index(index),
+        'name': data['name'][:255], 'description': data['description'], 'brand': data['brand'][:255],
+        'category': data['category'], 'subcategory': data['subcategory'],
+        'price': Decimal(str(data['price'])),
+        'discount_price': None if data['discount_price'] is None else Decimal(str(data['discount_price'])),
+        'images_url': data['images'], 'tags': [data['subcategory'].lower(), data['category'].lower()],
+        'stock_quantity': data['stock_quantity'], 'created_at': created, 'updated_at': created,
+    }
+
+
+def product_rows(plan, start, stop):
+    return {'products.Product': [product_row(plan, index) for index in range(start, stop)]}
+
+
+def order_rows(plan, start, stop):
+    """Orders ``start``..``stop`` and their items; each order is from one vendor."""
+    orders, items = [], []
+    # Sales are skewed, so the same products come up again and again.
+    products = {}
+    for index in range(start, stop):
+        rng = plan.rng('order', index)
+        # Squaring skews sales towards the low product indices, so some vendors sell far more.
+        first = int(plan.products * rng.random() ** 2)
+        supplier = plan.seller_index(first)
+        chosen = {first}
+        for _ in range(rng.randint(1, MAX_ITEMS) - 1):
+            chosen.add(supplier + rng.randrange(plan.products_of(supplier)) * plan.suppliers)
+        order_id = plan.first_order_id + index
+        total = Decimal('0.00')
+        for product in sorted(chosen):
+            row = products.get(product)
+            if row is None:
+                row = products[product] = product_row(plan, product)
+            quantity = rng.randint(1, 5)
+            unit_price = row['discount_price'] or row['price']
+            items.append({
+                'order_id': order_id, 'product_id': row['id'], 'product_name': row['name'],
+                'quantity': quantity, 'unit_price': unit_price, 'total_price': unit_price * quantity,
+            })
+            total += unit_price * quantity
+        status, payment_status, _ = rng.choices(STATUSES, _STATUS_WEIGHTS)[0]
+        created = plan.moment(rng)
+        orders.append({
+            'id': order_id, 'order_number': f'S{plan.seed}-{order_id}',
+            'customer_id': plan.first_user_id + plan.suppliers + rng.randrange(plan.customers),
+            'vendor_id': plan.first_user_id + supplier, 'status': status, 'payment_status': payment_status,
+            'total_amount': total, 'created_at': created, 'updated_at': created,
+        })
+    return {'orders.Order': orders, 'orders.OrderItem': items}
+
+
+def prepare(tables, database):
+    """
+    ``{label: (columns, value tuples)}`` ready for ``executemany``.
+
+    Rows are keyed by attname (``seller_id``, not ``seller``); fields they
+    leave out get their defaults, evaluated once per batch.
+    """
+    connection = connections[database]
+    prepared = {}
+    for label, rows in tables.items():
+        if not rows:
+            continue
+        model = apps.get_model(label)
+        pk = model._meta.pk
+        # Rows without a primary key get theirs from the database.
+        fields = [field for field in model._meta.concrete_fields if field is not pk or pk.attname in rows[0]]
+        defaults = {field.attname: field.get_default() for field in fields if field.attname not in rows[0]}
+        values = []
+        for row in rows:
+            row = {**defaults, **row}
+            values.append(tuple(field.get_db_prep_save(row[field.attname], connection) for field in fields))
+        prepared[label] = ([field.column for field in fields], values)
+    return prepared
+
+
+def generate(function, plan, start, stop):
+    return prepare(function(plan, start, stop), plan.database)
@@ -0,0 +1,4 @@
+from django.dispatch import Signal
+
+# Sent with ``product`` and the viewing ``user`` when a product's detail is viewed.
+product_viewed = Signal()
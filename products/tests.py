@@ -0,0 +1,40 @@
+from src.testing import APITestCase, make_product, make_supplier
+
+CREATE_PRODUCT = '''
+mutation($name: String!, $price: Float!, $category: String!) {
+  createProduct(name: $name, price: $price, category: $category, stockQuantity: 5) {
+    success message product { id name price seller { id } }
+  }
+}
+'''
+PRODUCT = 'query($id: Int!) { product(id: $id) { id name price discountPrice } }'
+
+
+class CreateProductTests(APITestCase):
+    def test_create_product(self):
+        supplier = make_supplier()
+        data = self.query(CREATE_PRODUCT, {'name': 'Desk lamp', 'price': 24.5, 'category': 'Electronics'}, user=supplier)
+        self.assertTrue(data['createProduct']['success'])
+        self.assertEqual(data['createProduct']['product']['price'], 24.5)
+        self.assertEqual(data['createProduct']['product']['seller']['id'], str(supplier.pk))
+
+    def test_invalid_category(self):
+        data = self.query(CREATE_PRODUCT, {'name': 'Lamp', 'price': 1, 'category': 'Nope'}, user=make_supplier())
+        self.assertFalse(data['createProduct']['success'])
+        self.assertIn('category', data['createProduct']['message'])
+
+    def test_authentication_required(self):
+        result = self.execute(CREATE_PRODUCT, {'name': 'Lamp', 'price': 1, 'category': 'Electronics'})
+        self.assertError(result, 'Authentication required')
+
+
+class ProductQueryTests(APITestCase):
+    def test_product(self):
+        product = make_product(name='Kettle', price='30.00', discount_price='25.00')
+        self.assertEqual(self.query(PRODUCT, {'id': product.pk})['product'], {
+            'id': str(product.pk), 'name': 'Kettle', 'price': 30.0, 'discountPrice': 25.0,
+        })
+
+    def test_inactive_product_is_hidden(self):
+        product = make_product(is_active=False)
+        self.assertIsNone(self.query(PRODUCT, {'id': product.pk})['product'])
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class RatelimitConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'ratelimit'
+
+    def ready(self):
+        # Registers the rate-limit metric so /metrics shows it from any worker.
+        from . import limiter  # noqa: F401
@@ -0,0 +1,174 @@
+"""
+Sliding-window rate limiting.
+
+A limit is a rate like ``'60/m'``: at most 60 units per rolling minute for
+one key, e.g. one user or IP on one rule.  Counts are kept per fixed window
+(the current minute and the one before), and the rolling count is estimated
+as
+
+    previous * (1 - elapsed fraction of the current window) + current
+
+which avoids the burst a fixed window allows at its boundary while storing
+only two integers per key.  A refused hit is not counted, and its
+Retry-After is the time until the estimate has room for it.
+
+CacheCounters keeps the counters in the cache named by RATE_LIMITS['CACHE']:
+one ``get_many`` and one ``incr`` per hit.  Two concurrent hits may both
+read the count before either increments it, so a limit can be exceeded by
+the number of concurrent requests, which is fine for throttling.
+LocalCounters keeps them in process memory, with no round trips.  That
+stands in when there is no shared cache, with limits then applying per
+process.
+"""
+
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from monitoring.metrics import Counter
+
+DEFAULTS = {
+    'ENABLED': True,
+    'BACKEND': 'local',
+    'CACHE': 'default',
+    'IP_HEADER': 'REMOTE_ADDR',
+    'PROXY_HOPS': 1,
+    'EXEMPT_PATHS': ('/metrics', '/static/'),
+    'DEFAULT': None,
+    'PATHS': {},
+    'GRAPHQL': None,
+    'COSTS': {},
+    'OPERATIONS': {},
+}
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+
+RATE_LIMITED = Counter(
+    'rate_limited_requests_total',
+    'Requests refused by the rate limiter, per rule.',
+    ('rule',),
+)
+
+
+def ratelimit_settings():
+    return {**DEFAULTS, **getattr(settings, 'RATE_LIMITS', {})}
+
+
+def parse_rate(rate):
+    """``'100/m'`` -> ``(100, 60)``; also accepts ``'10/5s'``."""
+    count, _, period = rate.partition('/')
+    multiplier = period[:-1] or '1'
+    if not count.isdigit() or not multiplier.isdigit() or period[-1:] not in PERIODS:
+        raise ValueError(f'Invalid rate {rate!r}; expected e.g. "100/m"')
+    return int(count), int(multiplier) * PERIODS[period[-1]]
+
+
+def retry_after(previous, current, limit, window, elapsed, cost):
+    """Whole seconds until ``cost`` more units fit, or 0 if they fit now."""
+    fraction = elapsed / window
+    if previous * (1 - fraction) + current + cost <= limit:
+        return 0
+    if current + cost > limit or not previous:
+        # Not before the current window has become the previous one.
+        wait = window - elapsed
+    else:
+        wait = (1 - (limit - current - cost) / previous - fraction) * window
+    return max(1, math.ceil(wait))
+
+
+class LocalCounters:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+        self._next_prune = 0.0
+
+    def hit(self, key, limit, window, cost=1, now=None):
+        now = time.time() if now is None else now
+        index, elapsed = divmod(now, window)
+        index = int(index)
+        with self._lock:
+            if now >= self._next_prune:
+                self._prune(now)
+            current = self._counts.get((key, window, index), 0)
+            previous = self._counts.get((key, window, index - 1), 0)
+            wait = retry_after(previous, current, limit, window, elapsed, cost)
+            if not wait:
+                self._counts[(key, window, index)] = current + cost
+        return wait
+
+    def _prune(self, now):
+        # Only the current and previous window of each key are ever read.
+        self._counts = {
+            (key, window, index): count for (key, window, index), count in self._counts.items()
+            if index >= now // window - 1
+        }
+        self._next_prune = now + 60
+
+
+class CacheCounters:
+    def __init__(self, cache):
+        self.cache = cache
+
+    def hit(self, key, limit, window, cost=1, now=None):
+        now = time.time() if now is None else now
+        index, elapsed = divmod(now, window)
+        index = int(index)
+        current_key, previous_key = f'rl:{key}:{window}:{index}', f'rl:{key}:{window}:{index - 1}'
+        counts = self.cache.get_many([current_key, previous_key])
+        wait = retry_after(counts.get(previous_key, 0), counts.get(current_key, 0), limit, window, elapsed, cost)
+        if not wait:
+            if current_key in counts:
+                try:
+                    self.cache.incr(current_key, cost)
+                    return 0
+                except ValueError:
+                    pass  # Expired since the read.
+            # Kept through the next window, where it is the previous count.
+            if not self.cache.add(current_key, cost, 2 * window):
+                self.cache.incr(current_key, cost)
+        return wait
+
+
+_counters = None
+
+
+def get_counters():
+    global _counters
+    if _counters is None:
+        config = ratelimit_settings()
+        _counters = CacheCounters(caches[config['CACHE']]) if config['BACKEND'] == 'cache' else LocalCounters()
+    return _counters
+
+
+_rates = {}
+
+
+def hit(rule, rate, ident, cost=1):
+    """Count ``cost`` units for ``ident`` under ``rule``; returns Retry-After seconds, 0 if allowed."""
+    parsed = _rates.get(rate)
+    if parsed is None:
+        parsed = _rates[rate] = parse_rate(rate)
+    wait = get_counters().hit(f'{rule}:{ident}', *parsed, cost=cost)
+    if wait:
+        RATE_LIMITED.inc((rule,))
+    return wait
+
+
+def client_id(request, ip_header, proxy_hops=1):
+    """The authenticated user, else the client IP.
+
+    With IP_HEADER set to e.g. ``HTTP_X_FORWARDED_FOR``, the address is the
+    one ``proxy_hops`` entries from the right: each of our proxies appends
+    the address it saw, and anything to the left of those was sent by the
+    client, which can put any address there.
+    """
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    addresses = [
+        address.strip() for address in (request.META.get(ip_header) or request.META.get('REMOTE_ADDR', '')).split(',')
+    ]
+    return f'ip:{addresses[-min(max(proxy_hops, 1), len(addresses))]}'
@@ -0,0 +1,83 @@
+from django.http import JsonResponse
+from graphql import GraphQLError
+
+from .limiter import client_id, hit, ratelimit_settings
+
+MESSAGE = 'Too many requests; retry later'
+
+
+def _too_many(request, wait):
+    if request.path.startswith('/graphql'):
+        body = {'errors': [{'message': MESSAGE, 'extensions': {'code': 'RATE_LIMITED', 'retryAfter': wait}}]}
+    else:
+        body = {'success': False, 'message': MESSAGE}
+    response = JsonResponse(body, status=429)
+    response['Retry-After'] = str(wait)
+    return response
+
+
+class RateLimitMiddleware:
+    """
+    Per-client limits on whole requests: RATE_LIMITS['DEFAULT'] for every
+    request and RATE_LIMITS['PATHS'] for endpoints with a budget of their
+    own.  Clients are users when authenticated, else IPs, so this goes after
+    the authentication middlewares.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = ratelimit_settings()
+        self.enabled = config['ENABLED']
+        self.ip_header = config['IP_HEADER']
+        self.proxy_hops = config['PROXY_HOPS']
+        self.exempt = tuple(config['EXEMPT_PATHS'])
+        self.default = config['DEFAULT']
+        self.paths = config['PATHS']
+
+    def __call__(self, request):
+        if self.enabled and not request.path.startswith(self.exempt):
+            ident = client_id(request, self.ip_header, self.proxy_hops)
+            wait = self.default and hit('default', self.default, ident)
+            rate = self.paths.get(request.path)
+            if not wait and rate:
+                wait = hit(f'path:{request.path}', rate, ident)
+            if wait:
+                return _too_many(request, wait)
+        return self.get_response(request)
+
+
+class OperationRateLimitMiddleware:
+    """
+    Graphene middleware limiting GraphQL root fields per client.
+
+    Each root field costs RATE_LIMITS['COSTS'] units (1 if not listed)
+    against RATE_LIMITS['GRAPHQL'], and fields in RATE_LIMITS['OPERATIONS']
+    also have a budget of their own, e.g. ``{'login': '10/m'}``.  Root field
+    names come from the parsed query, so unlike ``operationName`` clients
+    cannot choose them.  A refused field fails with a RATE_LIMITED error and
+    the view answers 429 with Retry-After.
+    """
+
+    def __init__(self):
+        config = ratelimit_settings()
+        self.enabled = config['ENABLED']
+        self.ip_header = config['IP_HEADER']
+        self.proxy_hops = config['PROXY_HOPS']
+        self.budget = config['GRAPHQL']
+        self.costs = config['COSTS']
+        self.operations = config['OPERATIONS']
+
+    def resolve(self, next, root, info, **args):
+        if not self.enabled or info.path.prev is not None:
+            return next(root, info, **args)
+        request = info.context
+        ident = client_id(request, self.ip_header, self.proxy_hops)
+        wait = self.budget and hit('graphql', self.budget, ident, self.costs.get(info.field_name, 1))
+        rate = self.operations.get(info.field_name)
+        if not wait and rate:
+            wait = hit(f'operation:{info.field_name}', rate, ident)
+        if wait:
+            # Read by the GraphQL view, which then answers 429 with Retry-After.
+            request.retry_after = max(wait, getattr(request, 'retry_after', None) or 0)
+            raise GraphQLError(MESSAGE, extensions={'code': 'RATE_LIMITED', 'retryAfter': wait})
+        return next(root, info, **args)
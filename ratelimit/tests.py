@@ -0,0 +1,103 @@
+import itertools
+
+from django.conf import settings
+from django.test import override_settings
+
+from ratelimit.limiter import LocalCounters, client_id, parse_rate
+from src.testing import APITestCase, make_user
+
+LOGIN = 'mutation { login(email: "nobody@example.com", password: "wrong") { token } }'
+
+_addresses = (f'10.0.0.{n}' for n in itertools.count(1))
+
+
+def limits(**overrides):
+    return override_settings(RATE_LIMITS={**settings.RATE_LIMITS, 'ENABLED': True, **overrides})
+
+
+class CounterTests(APITestCase):
+    def test_parse_rate(self):
+        self.assertEqual(parse_rate('100/m'), (100, 60))
+        self.assertEqual(parse_rate('10/5s'), (10, 5))
+        with self.assertRaises(ValueError):
+            parse_rate('10/fortnight')
+
+    def test_sliding_window(self):
+        counters = LocalCounters()
+        for _ in range(10):
+            self.assertEqual(counters.hit('key', 10, 60, now=60.0), 0)
+        self.assertEqual(counters.hit('key', 10, 60, now=60.0), 60)
+        # Half way through the next window, half of the previous one still counts.
+        self.assertEqual(counters.hit('key', 10, 60, cost=5, now=150.0), 0)
+        self.assertGreater(counters.hit('key', 10, 60, now=150.0), 0)
+        self.assertEqual(counters.hit('other', 10, 60, now=150.0), 0)
+
+
+class MiddlewareTests(APITestCase):
+    def test_path_limit(self):
+        user = make_user(is_staff=True)
+        self.client.force_login(user)
+        with limits(PATHS={'/exports/users.ndjson': '2/m'}):
+            for _ in range(2):
+                self.assertEqual(self.client.get('/exports/users.ndjson').status_code, 200)
+            response = self.client.get('/exports/users.ndjson')
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(response.json(), {'success': False, 'message': 'Too many requests; retry later'})
+
+    def test_exempt_paths(self):
+        address = next(_addresses)
+        with limits(DEFAULT='1/m'):
+            for _ in range(3):
+                self.assertNotEqual(self.client.get('/metrics', REMOTE_ADDR=address).status_code, 429)
+
+    def test_disabled(self):
+        address = next(_addresses)
+        with override_settings(RATE_LIMITS={**settings.RATE_LIMITS, 'DEFAULT': '1/m'}):
+            for _ in range(3):
+                self.assertEqual(self.client.get('/metrics/missing', REMOTE_ADDR=address).status_code, 404)
+
+
+class OperationLimitTests(APITestCase):
+    def test_operation_limit(self):
+        request = self.request(REMOTE_ADDR=next(_addresses))
+        with limits(OPERATIONS={'login': '2/m'}):
+            for _ in range(2):
+                self.assertError(self.execute(LOGIN, request=request), 'Please enter valid credentials')
+            error = self.assertError(self.execute(LOGIN, request=request), code='RATE_LIMITED')
+        self.assertGreater(error.extensions['retryAfter'], 0)
+        self.assertEqual(request.retry_after, error.extensions['retryAfter'])
+
+    def test_costs_count_against_the_budget(self):
+        request = self.request(REMOTE_ADDR=next(_addresses))
+        with limits(GRAPHQL='10/m', COSTS={'login': 6}, OPERATIONS={}):
+            self.assertError(self.execute(LOGIN, request=request), 'Please enter valid credentials')
+            self.assertError(self.execute(LOGIN, request=request), code='RATE_LIMITED')
+
+    def test_limits_are_per_client(self):
+        with limits(OPERATIONS={'login': '1/m'}):
+            for _ in range(2):
+                request = self.request(REMOTE_ADDR=next(_addresses))
+                self.assertError(self.execute(LOGIN, request=request), 'Please enter valid credentials')
+
+    def test_graphql_view_answers_429(self):
+        with limits(OPERATIONS={'login': '1/m'}):
+            address = next(_addresses)
+            self.client.post('/graphql/', {'query': LOGIN}, content_type='application/json', REMOTE_ADDR=address)
+            response = self.client.post(
+                '/graphql/', {'query': LOGIN}, content_type='application/json', REMOTE_ADDR=address,
+            )
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(response['Retry-After'])
+        self.assertEqual(response.json()['errors'][0]['extensions']['code'], 'RATE_LIMITED')
+
+
+class ClientIdTests(APITestCase):
+    def test_forwarded_for_is_read_from_the_right(self):
+        request = self.request(HTTP_X_FORWARDED_FOR='1.2.3.4, 203.0.113.7', REMOTE_ADDR='10.0.0.1')
+        # The first entry is whatever the client sent.
+        self.assertEqual(client_id(request, 'HTTP_X_FORWARDED_FOR'), 'ip:203.0.113.7')
+        self.assertEqual(client_id(request, 'HTTP_X_FORWARDED_FOR', proxy_hops=2), 'ip:1.2.3.4')
+        self.assertEqual(client_id(request, 'HTTP_X_FORWARDED_FOR', proxy_hops=5), 'ip:1.2.3.4')
+        self.assertEqual(client_id(self.request(REMOTE_ADDR='10.0.0.1'), 'HTTP_X_FORWARDED_FOR'), 'ip:10.0.0.1')
+        self.assertEqual(client_id(self.request(make_user()), 'HTTP_X_FORWARDED_FOR').split(':')[0], 'user')
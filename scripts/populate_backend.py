@@ -4,12 +4,17 @@ Script to populate the backend with 100 suppliers and 20 products each.
 This will create 2000 products total across 100 suppliers.
 """
 
+import os
+import sys
 import requests
 import json
 import random
 import time
 from faker import Faker
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from products import catalog
+
 # Initialize Faker for generating realistic data
 fake = Faker()
 
@@ -22,23 +27,8 @@ HEADERS = {
 }
 
 # Product categories and sample data
-CATEGORIES = [
-    "Electronics", "Clothing", "Home & Garden", "Sports", "Beauty", 
-    "Books", "Toys", "Automotive", "Health", "Office Supplies"
-]
-
-PRODUCT_TYPES = {
-    "Electronics": ["Smartphone", "Laptop", "Headphones", "Camera", "Tablet", "Smartwatch", "Speaker", "Charger", "Cable", "Adapter"],
-    "Clothing": ["T-Shirt", "Jeans", "Dress", "Jacket", "Sweater", "Shoes", "Hat", "Scarf", "Belt", "Socks"],
-    "Home & Garden": ["Lamp", "Chair", "Table", "Plant", "Tool", "Decor", "Kitchen", "Bathroom", "Bedroom", "Living Room"],
-    "Sports": ["Ball", "Racket", "Shoes", "Equipment", "Gear", "Apparel", "Accessories", "Training", "Outdoor", "Fitness"],
-    "Beauty": ["Skincare", "Makeup", "Hair", "Fragrance", "Tools", "Bath", "Body", "Face", "Lips", "Eyes"],
-    "Books": ["Fiction", "Non-Fiction", "Textbook", "Comic", "Magazine", "Journal", "Guide", "Manual", "Reference", "Children"],
-    "Toys": ["Action Figure", "Doll", "Game", "Puzzle", "Educational", "Outdoor", "Electronic", "Building", "Art", "Music"],
-    "Automotive": ["Part", "Accessory", "Tool", "Maintenance", "Interior", "Exterior", "Engine", "Electrical", "Safety", "Performance"],
-    "Health": ["Supplement", "Equipment", "Monitor", "Therapy", "Fitness", "Medical", "Wellness", "Nutrition", "Care", "Treatment"],
-    "Office Supplies": ["Pen", "Paper", "Folder", "Binder", "Desk", "Chair", "Computer", "Printer", "Storage", "Organization"]
-}
+CATEGORIES = catalog.CATEGORIES
+PRODUCT_TYPES = catalog.PRODUCT_TYPES
 
 def make_graphql_request(query, variables=None):
     """Make a GraphQL request to the backend"""
@@ -198,52 +188,6 @@ def create_product(token, name, description, price, discount_price, images_url,
         print(f"❌ Product creation failed: {e}")
         return None
 
-def generate_supplier_data():
-    """Generate realistic supplier data"""
-    first_name = fake.first_name()
-    last_name = fake.last_name()
-    email = fake.email()
-    password = fake.password(length=12, special_chars=True, digits=True, upper_case=True, lower_case=True)
-    
-    return {
-        "first_name": first_name,
-        "last_name": last_name,
-        "email": email,
-        "password": password
-    }
-
-def generate_product_data(supplier_name, category):
-    """Generate realistic product data"""
-    product_type = random.choice(PRODUCT_TYPES[category])
-    brand = fake.company()
-    model = fake.bothify(text='??-####', letters='ABCDEFGHIJKLMNOPQRSTUVWXYZ')
-    
-    name = f"{brand} {product_type} {model}"
-    description = fake.paragraph(nb_sentences=3)
-    
-    # Generate realistic pricing
-    base_price = round(random.uniform(10, 500), 2)
-    discount_price = round(base_price * random.uniform(0.1, 0.3), 2) if random.random() < 0.3 else None
-    
-    # Generate product images (using placeholder service)
-    images = [
-        f"https://picsum.photos/400/400?random={random.randint(1, 1000)}",
-        f"https://picsum.photos/400/400?random={random.randint(1, 1000)}",
-        f"https://picsum.photos/400/400?random={random.randint(1, 1000)}"
-    ]
-    
-    stock_quantity = random.randint(10, 1000)
-    
-    return {
-        "name": name,
-        "description": description,
-        "price": base_price,
-        "discount_price": discount_price,
-        "images": images,
-        "category": category,
-        "stock_quantity": stock_quantity
-    }
-
 def main():
     """Main function to populate the backend"""
     print("🚀 Starting backend population...")
@@ -259,7 +203,7 @@ def main():
         print(f"\n🔄 Processing Supplier {supplier_num}/1...")
         
         # Generate supplier data
-        supplier_data = generate_supplier_data()
+        supplier_data = catalog.generate_supplier_data(fake)
         print(f"   📝 Name: {supplier_data['first_name']} {supplier_data['last_name']}")
         print(f"   📧 Email: {supplier_data['email']}")
         
@@ -300,7 +244,7 @@ def main():
         
         for product_num in range(1, 2):  # Test with 1 product first
             category = random.choice(CATEGORIES)
-            product_data = generate_product_data(supplier_name, category)
+            product_data = catalog.generate_product_data(category, fake)
             
             product_result = create_product(
                 token,
@@ -0,0 +1,206 @@
+"""
+Product search backends.
+
+The SQLite backend keeps an FTS5 table (``search_product_fts``) in step with
+``products_product`` and ranks with BM25; the Postgres backend queries a GIN
+expression index over the same weighted columns.  Both take the user's text,
+match the last word as a prefix for typeahead, and return product ids in
+rank order together with per-category facet counts.
+"""
+
+import re
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils.module_loading import import_string
+
+from products.models import Product
+
+FTS_TABLE = 'search_product_fts'
+
+# Column weights: name, brand, category, description, tags.  Postgres has
+# only four weights, so tags share category's.
+BM25_WEIGHTS = (10.0, 4.0, 2.0, 1.0, 2.0)
+
+POSTGRES_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(brand, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(category, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(tags, '[]'::jsonb)), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'D')"
+)
+
+
+@dataclass
+class SearchResults:
+    ids: list
+    total: int
+    facets: dict = field(default_factory=dict)
+
+
+def tokenize(text):
+    return re.findall(r'\w+', (text or '').lower())
+
+
+class BaseSearchBackend:
+    def search(self, text, category=None, min_price=None, max_price=None, limit=20, offset=0):
+        terms = tokenize(text)
+        if not terms:
+            return self.browse(category, min_price, max_price, limit, offset)
+        return self.search_terms(terms, category, min_price, max_price, limit, offset)
+
+    def browse(self, category, min_price, max_price, limit, offset):
+        """Newest-first listing used when the query has no searchable words."""
+        queryset = Product.objects.filter(is_active=True)
+        if min_price is not None:
+            queryset = queryset.filter(price__gte=min_price)
+        if max_price is not None:
+            queryset = queryset.filter(price__lte=max_price)
+        facets = dict(
+            queryset.order_by().values_list('category').annotate(count=Count('id'))
+        )
+        if category:
+            queryset = queryset.filter(category=category)
+        ids = list(queryset.values_list('id', flat=True)[offset:offset + limit])
+        total = facets.get(category, 0) if category else sum(facets.values())
+        return SearchResults(ids=ids, total=total, facets=facets)
+
+    def search_terms(self, terms, category, min_price, max_price, limit, offset):
+        raise NotImplementedError
+
+    def index(self, products):
+        pass
+
+    def remove(self, product_ids):
+        pass
+
+    def rebuild(self):
+        pass
+
+
+def _filters(min_price, max_price):
+    clauses, params = ['p.is_active'], []
+    if min_price is not None:
+        clauses.append('p.price >= %s')
+        params.append(min_price)
+    if max_price is not None:
+        clauses.append('p.price <= %s')
+        params.append(max_price)
+    return clauses, params
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """FTS5 index with BM25 ranking and prefix indexes for typeahead."""
+
+    def match_expression(self, terms):
+        quoted = [f'"{term}"' for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def search_terms(self, terms, category, min_price, max_price, limit, offset):
+        clauses, params = _filters(min_price, max_price)
+        base = (
+            f'FROM {FTS_TABLE} f JOIN products_product p ON p.id = f.rowid '
+            f'WHERE {FTS_TABLE} MATCH %s AND ' + ' AND '.join(clauses)
+        )
+        params = [self.match_expression(terms)] + params
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT p.category, count(*) {base} GROUP BY p.category', params)
+            facets = dict(cursor.fetchall())
+            if category:
+                base += ' AND p.category = %s'
+                params.append(category)
+            weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+            cursor.execute(
+                f'SELECT p.id {base} ORDER BY bm25({FTS_TABLE}, {weights}), p.id DESC LIMIT %s OFFSET %s',
+                params + [limit, offset],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        total = facets.get(category, 0) if category else sum(facets.values())
+        return SearchResults(ids=ids, total=total, facets=facets)
+
+    def index(self, products):
+        rows = [
+            (product.pk, product.name, product.brand, product.category, product.description, ' '.join(product.tags or ()))
+            for product in products
+        ]
+        if not rows:
+            return
+        # One transaction, or two concurrent indexers can both insert the rowid.
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(row[0],) for row in rows])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE} (rowid, name, brand, category, description, tags) '
+                f'VALUES (%s, %s, %s, %s, %s, %s)',
+                rows,
+            )
+
+    def remove(self, product_ids):
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk in product_ids])
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, brand, category, description, tags) "
+                f"SELECT id, name, brand, category, description, "
+                f"coalesce((SELECT group_concat(value, ' ') FROM json_each(products_product.tags)), '') "
+                f"FROM products_product"
+            )
+            cursor.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')")
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    tsvector search over an expression GIN index; the index follows the
+    table on its own, so there is nothing to update from signals.
+    """
+
+    def tsquery(self, terms):
+        return ' & '.join(terms[:-1] + [f'{terms[-1]}:*'])
+
+    def search_terms(self, terms, category, min_price, max_price, limit, offset):
+        clauses, params = _filters(min_price, max_price)
+        base = (
+            f"FROM products_product p, to_tsquery('simple', %s) q "
+            f"WHERE ({POSTGRES_VECTOR_SQL}) @@ q AND " + ' AND '.join(clauses)
+        )
+        params = [self.tsquery(terms)] + params
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT p.category, count(*) {base} GROUP BY p.category', params)
+            facets = dict(cursor.fetchall())
+            if category:
+                base += ' AND p.category = %s'
+                params.append(category)
+            cursor.execute(
+                f'SELECT p.id {base} ORDER BY ts_rank_cd({POSTGRES_VECTOR_SQL}, q) DESC, p.id DESC '
+                f'LIMIT %s OFFSET %s',
+                params + [limit, offset],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        total = facets.get(category, 0) if category else sum(facets.values())
+        return SearchResults(ids=ids, total=total, facets=facets)
+
+
+BACKENDS = {
+    'sqlite': 'search.backends.SQLiteFTSBackend',
+    'postgresql': 'search.backends.PostgresSearchBackend',
+}
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'SEARCH_BACKEND', None) or BACKENDS.get(connection.vendor)
+        if path is None:
+            raise ImproperlyConfigured(
+                f'No product search backend for {connection.vendor}; set SEARCH_BACKEND'
+            )
+        _backend = import_string(path)()
+    return _backend
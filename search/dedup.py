@@ -0,0 +1,238 @@
+"""
+Near-duplicate product detection with MinHash/LSH and perceptual hashes.
+
+Titles and descriptions are shingled into character n-grams and reduced to
+MinHash signatures in NumPy, a batch of products at a time: all shingles of
+the batch are hashed in one array and ``np.minimum.reduceat`` takes the
+per-product minimum for each permutation.  Title signatures are split into
+LSH bands; products sharing a band bucket become candidate pairs, which are
+verified together by comparing signature agreement (the Jaccard estimate)
+and the Hamming distance of their image hashes.  Titles whose numbers differ
+("Model 2000" vs "Model 3000") are variants, not duplicates, and are never
+matched.  Verified pairs are grouped
+with union-find into clusters whose lowest id is the canonical product.
+"""
+
+import re
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import F
+
+from products.models import Product
+
+from .images import np
+from .models import ImageFingerprint
+from .tasks import sync_product
+
+NUM_PERM = 128
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+TITLE_NGRAM = 3
+DESCRIPTION_NGRAM = 5
+BATCH_SIZE = 20000
+MAX_BUCKET = 50
+MAX_TEXT = 1000
+VERIFY_CHUNK = 100000
+NO_HASH = -1
+
+_MASK = (1 << 32) - 1
+_PRIME = 16777619
+
+
+@dataclass
+class DedupThresholds:
+    title: float = 0.8
+    description: float = 0.5
+    image_distance: int = 6
+    image_title: float = 0.5
+
+
+def _permutations():
+    rng = np.random.default_rng(0x5EED)
+    a = rng.integers(1, _MASK, size=NUM_PERM, dtype=np.uint32) | np.uint32(1)
+    b = rng.integers(0, _MASK, size=NUM_PERM, dtype=np.uint32)
+    return a, b
+
+
+def normalize(text):
+    return ' '.join((text or '').lower().split())
+
+
+def model_numbers(texts):
+    """Per-text hash of the numbers it contains, 0 for texts without any."""
+    return np.fromiter(
+        (hash(tuple(numbers)) if (numbers := re.findall(r'\d+', text or '')) else 0 for text in texts),
+        dtype=np.int64, count=len(texts),
+    )
+
+
+def minhash(texts, ngram):
+    """``uint32[len(texts), NUM_PERM]`` MinHash signatures of character n-grams."""
+    a, b = _permutations()
+    signatures = np.empty((len(texts), NUM_PERM), dtype=np.uint32)
+    for start in range(0, len(texts), BATCH_SIZE):
+        batch = [normalize(text)[:MAX_TEXT].ljust(ngram).encode() for text in texts[start:start + BATCH_SIZE]]
+        buffer = np.frombuffer(b''.join(batch), dtype=np.uint8).astype(np.uint32)
+        lengths = np.fromiter((len(text) for text in batch), dtype=np.int64, count=len(batch))
+        offsets = np.concatenate(([0], np.cumsum(lengths)))
+
+        # Polynomial hash of every n-gram in the concatenated buffer; uint32
+        # arithmetic wraps, which is the modulus we want.
+        grams = np.zeros(buffer.size - ngram + 1, dtype=np.uint32)
+        for position in range(ngram):
+            grams = grams * np.uint32(_PRIME) + buffer[position:buffer.size - ngram + 1 + position]
+        # Keep only n-grams that start and end inside the same text.
+        counts = lengths - ngram + 1
+        segment_starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        grams = grams[np.arange(counts.sum()) + np.repeat(offsets[:-1] - segment_starts, counts)]
+
+        hashed = np.empty_like(grams)
+        for permutation in range(NUM_PERM):
+            np.multiply(grams, a[permutation], out=hashed)
+            hashed += b[permutation]
+            signatures[start:start + len(batch), permutation] = np.minimum.reduceat(hashed, segment_starts)
+    return signatures
+
+
+def candidate_pairs(signatures, keep=None):
+    """
+    ``int64[M, 2]`` index pairs sharing at least one LSH band bucket.  ``keep``
+    is a vectorized ``keep(left, right)`` filter applied as pairs are found.
+    """
+    count = len(signatures)
+    multipliers = np.random.default_rng(0xB4D5).integers(1, 1 << 63, size=ROWS, dtype=np.uint64) | np.uint64(1)
+    found = []
+    for band in range(BANDS):
+        rows = signatures[:, band * ROWS:(band + 1) * ROWS].astype(np.uint64)
+        keys = (rows * multipliers).sum(axis=1, dtype=np.uint64)
+        order = np.argsort(keys, kind='stable')
+        bucket = np.concatenate(([0], np.cumsum(np.diff(keys[order]) != 0)))
+        # Pair each member with the next MAX_BUCKET - 1 members of its bucket,
+        # so huge buckets cost a sliding window rather than all pairs.
+        for offset in range(1, MAX_BUCKET):
+            same = bucket[:-offset] == bucket[offset:]
+            if not same.any():
+                break
+            left, right = order[:-offset][same], order[offset:][same]
+            left, right = np.minimum(left, right), np.maximum(left, right)
+            if keep is not None:
+                wanted = keep(left, right)
+                left, right = left[wanted], right[wanted]
+            found.append(left * count + right)
+    if not found:
+        return np.empty((0, 2), dtype=np.int64)
+    pairs = np.unique(np.concatenate(found))
+    return np.stack(np.divmod(pairs, count), axis=1)
+
+
+def _hamming(left, right):
+    xor = np.bitwise_xor(left.astype(np.uint64), right.astype(np.uint64))
+    return np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+def verify(pairs, titles, descriptions, has_description, hashes, thresholds):
+    """Boolean mask of candidate pairs that are near-duplicates."""
+    matched = np.zeros(len(pairs), dtype=bool)
+    # Chunked so the gathered signature rows stay a few hundred MB at most.
+    for start in range(0, len(pairs), VERIFY_CHUNK):
+        left, right = pairs[start:start + VERIFY_CHUNK, 0], pairs[start:start + VERIFY_CHUNK, 1]
+        title_similarity = (titles[left] == titles[right]).mean(axis=1)
+        description_similarity = (descriptions[left] == descriptions[right]).mean(axis=1)
+        both_described = has_description[left] & has_description[right]
+        text_match = (title_similarity >= thresholds.title) & (
+            ~both_described | (description_similarity >= thresholds.description)
+        )
+        both_hashed = (hashes[left] != NO_HASH) & (hashes[right] != NO_HASH)
+        distance = np.where(both_hashed, _hamming(hashes[left], hashes[right]), 64)
+        image_match = (distance <= thresholds.image_distance) & (title_similarity >= thresholds.image_title)
+        matched[start:start + VERIFY_CHUNK] = text_match | image_match
+    return matched
+
+
+def _clusters(count, pairs):
+    parent = list(range(count))
+
+    def find(item):
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    for left, right in pairs:
+        root_left, root_right = find(left), find(right)
+        if root_left != root_right:
+            parent[max(root_left, root_right)] = min(root_left, root_right)
+    groups = {}
+    for item in range(count):
+        groups.setdefault(find(item), []).append(item)
+    return [members for members in groups.values() if len(members) > 1]
+
+
+def find_duplicates(queryset=None, new_since=None, thresholds=None):
+    """
+    Clusters of near-duplicate products as lists of ids, canonical id first.
+
+    With ``new_since`` only pairs involving a product with a larger id are
+    considered, which is what a bulk import needs: the new batch against
+    itself and against the existing catalogue.
+    """
+    thresholds = thresholds or DedupThresholds()
+    queryset = queryset if queryset is not None else Product.objects.filter(is_active=True, duplicate_of__isnull=True)
+    rows = list(queryset.order_by('id').values_list('id', 'name', 'description').iterator(chunk_size=BATCH_SIZE))
+    if len(rows) < 2:
+        return []
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    titles = minhash([row[1] for row in rows], TITLE_NGRAM)
+    descriptions = minhash([row[2] for row in rows], DESCRIPTION_NGRAM)
+    has_description = np.array([bool((row[2] or '').strip()) for row in rows])
+    numbers = model_numbers([row[1] for row in rows])
+
+    hashes = np.full(len(rows), NO_HASH, dtype=np.int64)
+    positions = {pk: index for index, pk in enumerate(ids.tolist())}
+    fingerprints = ImageFingerprint.objects.filter(product_id__in=positions).order_by('product_id', 'id')
+    for product_id, phash in fingerprints.values_list('product_id', 'phash').iterator(chunk_size=BATCH_SIZE):
+        if hashes[positions[product_id]] == NO_HASH:
+            hashes[positions[product_id]] = phash
+
+    is_new = ids > new_since if new_since is not None else None
+
+    def keep(left, right):
+        wanted = (numbers[left] == 0) | (numbers[right] == 0) | (numbers[left] == numbers[right])
+        if is_new is not None:
+            wanted &= is_new[left] | is_new[right]
+        return wanted
+
+    pairs = candidate_pairs(titles, keep)
+    matched = pairs[verify(pairs, titles, descriptions, has_description, hashes, thresholds)]
+    return [ids[members].tolist() for members in _clusters(len(rows), matched.tolist())]
+
+
+def apply_duplicates(clusters, merge=False):
+    """
+    Flag every non-canonical product with ``duplicate_of``.  With ``merge``,
+    duplicates listed by the canonical product's own seller are folded into
+    it: their stock is added and they are deactivated.  The queryset updates
+    send no signals, so the changed products are queued for ``sync_product``
+    in the same transaction.
+    """
+    flagged = merged = 0
+    with transaction.atomic():
+        for cluster in clusters:
+            canonical_id, duplicate_ids = cluster[0], cluster[1:]
+            flagged += Product.objects.filter(id__in=duplicate_ids).update(duplicate_of_id=canonical_id)
+            if not merge:
+                continue
+            canonical = Product.objects.select_for_update().get(id=canonical_id)
+            same_seller = dict(
+                Product.objects.select_for_update()
+                .filter(id__in=duplicate_ids, seller_id=canonical.seller_id, is_active=True)
+                .values_list('id', 'stock_quantity')
+            )
+            if not same_seller:
+                continue
+            merged += Product.objects.filter(id__in=same_seller).update(is_active=False, stock_quantity=0)
+            Product.objects.filter(id=canonical_id).update(stock_quantity=F('stock_quantity') + sum(same_seller.values()))
+            for product_id in [canonical_id, *same_seller]:
+                sync_product.enqueue(product_id=product_id)
+    return flagged, merged
@@ -0,0 +1,19 @@
+import fcntl
+import os
+
+
+class FileLock:
+    """Exclusive advisory lock serialising index writers across processes."""
+
+    def __init__(self, path):
+        self.path = str(path)
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, 'w')
+        fcntl.flock(self._file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._file.close()
@@ -0,0 +1,327 @@
+"""
+Image similarity search over perceptual hashes and compact embeddings.
+
+Every uploaded image gets a 64-bit DCT perceptual hash and a small
+L2-normalised embedding (low-frequency DCT structure, colour histogram and a
+3x3 colour layout), computed with NumPy on the CPU.  Images attached to
+products are appended to an on-disk index of three flat files::
+
+    vectors.f16   float16[N, EMBEDDING_DIM]
+    hashes.u64    uint64[N]
+    ids.u64       uint64[N]   product id of each row
+
+Rows are appended under a file lock, ids last, so readers size the index from
+ids.u64 and never see a half-written row.  Queries memory-map the files and
+scan them in fixed-size chunks, keeping only the best candidates of each
+chunk, so memory use does not grow with the number of images.  Candidates are
+re-scored with the Hamming distance between hashes.
+
+When a product is deleted or deactivated the numbers of its rows are appended
+to ``removed.u64`` and queries skip them; ``manage.py rebuild_image_index``
+reclaims their space.
+"""
+
+import os
+from functools import lru_cache
+
+from django.conf import settings
+
+from src.lazy import installed, lazy_module
+
+from .files import FileLock
+
+# Imported on first use; image search is disabled without NumPy and Pillow.
+if installed('numpy', 'PIL'):
+    np, Image = lazy_module('numpy'), lazy_module('PIL.Image')
+else:
+    np = Image = None
+
+HASH_SIZE = 8
+DCT_SIZE = 32
+HISTOGRAM_BINS = 8
+EMBEDDING_DIM = 128
+CHUNK_ROWS = 65536
+CANDIDATE_FACTOR = 5
+COSINE_WEIGHT = 0.7
+# Larger images are refused before they are decoded; Pillow's own
+# DecompressionBombError only starts at ~179M pixels.
+MAX_IMAGE_SIDE = 4096
+
+
+class ImageTooLarge(ValueError):
+    pass
+
+
+def available():
+    return np is not None
+
+
+@lru_cache(maxsize=None)
+def _dct_matrix(size):
+    k = np.arange(size)[:, None]
+    n = np.arange(size)[None, :]
+    matrix = np.cos(np.pi * (2 * n + 1) * k / (2 * size)) * np.sqrt(2.0 / size)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix.astype(np.float32)
+
+
+def _unit(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def fingerprint(file):
+    """Return ``(phash, embedding)`` for an image file or file-like object.
+
+    Raises ImageTooLarge for images larger than MAX_IMAGE_SIDE on either side.
+    """
+    image = Image.open(file)
+    width, height = image.size
+    if width > MAX_IMAGE_SIDE or height > MAX_IMAGE_SIDE:
+        raise ImageTooLarge(f'Images may be at most {MAX_IMAGE_SIDE}x{MAX_IMAGE_SIDE} pixels')
+    image.draft('RGB', (DCT_SIZE * 2, DCT_SIZE * 2))
+    image = image.convert('RGB')
+
+    gray = np.asarray(image.convert('L').resize((DCT_SIZE, DCT_SIZE), Image.Resampling.BILINEAR), dtype=np.float32)
+    dct = _dct_matrix(DCT_SIZE) @ gray @ _dct_matrix(DCT_SIZE).T
+    low = dct[:HASH_SIZE, :HASH_SIZE].ravel()
+    bits = low > np.median(low[1:])
+    phash = int(np.packbits(bits).view('>u8')[0])
+
+    small = np.asarray(image.resize((24, 24), Image.Resampling.BILINEAR), dtype=np.float32) / 255.0
+    histogram = np.concatenate([
+        np.histogram(small[..., channel], bins=HISTOGRAM_BINS, range=(0.0, 1.0))[0]
+        for channel in range(3)
+    ]).astype(np.float32)
+    layout = small.reshape(3, 8, 3, 8, 3).mean(axis=(1, 3)).ravel()
+
+    embedding = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    parts = [_unit(low[1:]), _unit(np.sqrt(histogram)), _unit(layout - layout.mean())]
+    position = 0
+    for part in parts:
+        embedding[position:position + part.size] = part
+        position += part.size
+    return phash, _unit(embedding).astype(np.float16)
+
+
+def hamming(hashes, phash):
+    """Bit distance between a uint64 array and one hash."""
+    xor = np.bitwise_xor(hashes, np.uint64(phash))
+    return np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+
+
+class ImageIndex:
+    def __init__(self, directory):
+        self.directory = str(directory)
+        self._maps = None
+        self._removed = (None, None)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def __len__(self):
+        try:
+            return os.path.getsize(self._path('ids.u64')) // 8
+        except FileNotFoundError:
+            return 0
+
+    def add(self, rows):
+        """Append ``(product_id, phash, embedding)`` rows."""
+        rows = list(rows)
+        if not rows:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        vectors = np.stack([np.asarray(row[2], dtype=np.float16) for row in rows])
+        hashes = np.array([row[1] for row in rows], dtype=np.uint64)
+        ids = np.array([row[0] for row in rows], dtype=np.uint64)
+        with FileLock(self._path('index.lock')):
+            count = len(self)
+            # Drop any tail left behind by an interrupted writer before appending.
+            for name, array, width in (('vectors.f16', vectors, 2 * EMBEDDING_DIM), ('hashes.u64', hashes, 8), ('ids.u64', ids, 8)):
+                with open(self._path(name), 'ab') as f:
+                    f.truncate(count * width)
+                    f.write(array.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def remove(self, product_ids):
+        """Hide the rows of ``product_ids`` from queries."""
+        with FileLock(self._path('index.lock')):
+            count, _vectors, _hashes, ids = self._arrays()
+            if not count:
+                return
+            rows = np.flatnonzero(np.isin(ids, np.array(list(product_ids), dtype=np.uint64)))
+            rows = np.setdiff1d(rows, self.removed_rows()).astype(np.uint64)
+            if not rows.size:
+                return
+            with open(self._path('removed.u64'), 'ab') as f:
+                f.write(rows.tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+
+    def removed_rows(self):
+        """Sorted numbers of the rows of removed products."""
+        try:
+            stat = os.stat(self._path('removed.u64'))
+        except FileNotFoundError:
+            return np.empty(0, dtype=np.int64)
+        version = (stat.st_ino, stat.st_size)
+        if self._removed[0] != version:
+            rows = np.fromfile(self._path('removed.u64'), dtype=np.uint64, count=stat.st_size // 8)
+            self._removed = (version, np.unique(rows.astype(np.int64)))
+        return self._removed[1]
+
+    def clear(self):
+        with FileLock(self._path('index.lock')):
+            for name in ('vectors.f16', 'hashes.u64', 'ids.u64', 'removed.u64'):
+                if os.path.exists(self._path(name)):
+                    os.remove(self._path(name))
+        self._maps = None
+        self._removed = (None, None)
+
+    def _arrays(self):
+        try:
+            stat = os.stat(self._path('ids.u64'))
+        except FileNotFoundError:
+            return 0, None, None, None
+        count = stat.st_size // 8
+        # A rebuild replaces the files, possibly with as many rows as before.
+        version = (stat.st_ino, count)
+        if self._maps is None or self._maps[0] != version:
+            if not count:
+                return 0, None, None, None
+            self._maps = (
+                version,
+                np.memmap(self._path('vectors.f16'), dtype=np.float16, mode='r', shape=(count, EMBEDDING_DIM)),
+                np.memmap(self._path('hashes.u64'), dtype=np.uint64, mode='r', shape=(count,)),
+                np.memmap(self._path('ids.u64'), dtype=np.uint64, mode='r', shape=(count,)),
+            )
+        return (count,) + self._maps[1:]
+
+    def search(self, phash, embedding, k=10):
+        """Top ``k`` products as ``(product_id, score, similarity, distance)``."""
+        count, vectors, hashes, ids = self._arrays()
+        if not count:
+            return []
+        query = np.asarray(embedding, dtype=np.float32)
+        removed = self.removed_rows()
+        wanted = k * CANDIDATE_FACTOR
+        best_rows = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, count, CHUNK_ROWS):
+            scores = vectors[start:start + CHUNK_ROWS].astype(np.float32) @ query
+            if removed.size:
+                dead = removed[np.searchsorted(removed, start):np.searchsorted(removed, start + scores.size)]
+                scores[dead - start] = -np.inf
+            if scores.size > wanted:
+                top = np.argpartition(scores, -wanted)[-wanted:]
+            else:
+                top = np.arange(scores.size)
+            best_rows = np.concatenate([best_rows, top + start])
+            best_scores = np.concatenate([best_scores, scores[top]])
+            if best_rows.size > wanted:
+                keep = np.argpartition(best_scores, -wanted)[-wanted:]
+                best_rows, best_scores = best_rows[keep], best_scores[keep]
+
+        distances = hamming(np.asarray(hashes[best_rows]), phash)
+        combined = COSINE_WEIGHT * best_scores + (1 - COSINE_WEIGHT) * (1 - distances / 64.0)
+        results = {}
+        for row in np.argsort(-combined):
+            if not np.isfinite(combined[row]):
+                break
+            product_id = int(ids[best_rows[row]])
+            if product_id not in results:
+                results[product_id] = (product_id, float(combined[row]), float(best_scores[row]), int(distances[row]))
+            if len(results) == k:
+                break
+        return list(results.values())
+
+
+def index_directory():
+    return getattr(settings, 'IMAGE_INDEX_DIR', os.path.join(settings.BASE_DIR, 'var', 'images'))
+
+
+_index = None
+
+
+def get_index():
+    global _index
+    if _index is None:
+        _index = ImageIndex(index_directory())
+    return _index
+
+
+def to_signed(phash):
+    """uint64 hash as the signed value a BigIntegerField can hold."""
+    return phash - (1 << 64) if phash >= 1 << 63 else phash
+
+
+def to_unsigned(value):
+    return value + (1 << 64) if value < 0 else value
+
+
+def record_upload(file_path):
+    """Fingerprint a freshly stored upload; non-images are skipped."""
+    from django.core.files.storage import default_storage
+
+    from .models import ImageFingerprint
+
+    if not available():
+        return None
+    existing = ImageFingerprint.objects.filter(path=file_path).first()
+    if existing is not None:
+        return existing
+    try:
+        with default_storage.open(file_path) as f:
+            phash, embedding = fingerprint(f)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        return None
+    fingerprint_row, _ = ImageFingerprint.objects.get_or_create(
+        path=file_path, defaults={'phash': to_signed(phash), 'embedding': embedding.tobytes()},
+    )
+    return fingerprint_row
+
+
+def media_path(url):
+    """Storage path of a MEDIA_URL link, or None for external images."""
+    marker = settings.MEDIA_URL
+    if marker not in url:
+        return None
+    return url.split(marker, 1)[1].split('?', 1)[0]
+
+
+def remove_product_images(product_id):
+    """Drop a deleted or deactivated product's images from search results."""
+    from .models import ImageFingerprint
+
+    if not available():
+        return
+    get_index().remove([product_id])
+    # Unlinked, so they are indexed again if the product is reactivated.
+    ImageFingerprint.objects.filter(product_id=product_id).update(product=None)
+
+
+def index_product_images(product):
+    """Append fingerprints of the product's uploaded images to the index."""
+    from .models import ImageFingerprint
+
+    if not available():
+        return
+    paths = [path for path in map(media_path, product.images_url or ()) if path]
+    if not paths:
+        return
+    # Uploads are fingerprinted by a queued job that may not have run yet.
+    known = set(ImageFingerprint.objects.filter(path__in=paths).values_list('path', flat=True))
+    for path in paths:
+        if path not in known:
+            record_upload(path)
+    fingerprints = list(
+        ImageFingerprint.objects.filter(path__in=paths).exclude(product_id=product.pk)
+    )
+    if not fingerprints:
+        return
+    get_index().add(
+        (product.pk, to_unsigned(item.phash), np.frombuffer(item.embedding, dtype=np.float16))
+        for item in fingerprints
+    )
+    ImageFingerprint.objects.filter(pk__in=[item.pk for item in fingerprints]).update(product=product)
@@ -0,0 +1,19 @@
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from search.suggest import get_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the typeahead snapshot from the product table'
+
+    def handle(self, *args, **options):
+        index = get_index()
+        start = perf_counter()
+        index.rebuild()
+        snapshot = index.snapshot()
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {snapshot.term_count} terms and {snapshot.key_count} keys to {index.path} '
+            f'in {perf_counter() - start:.2f}s'
+        ))
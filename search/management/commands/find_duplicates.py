@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from search import images
+from search.dedup import DedupThresholds, apply_duplicates, find_duplicates
+
+
+class Command(BaseCommand):
+    help = 'Flag near-duplicate products by title, description and image similarity'
+
+    def add_arguments(self, parser):
+        defaults = DedupThresholds()
+        parser.add_argument('--since', type=int, help='Only compare products with an id above this one against the catalogue (bulk imports)')
+        parser.add_argument('--merge', action='store_true', help="Fold duplicates from the canonical product's seller into it")
+        parser.add_argument('--dry-run', action='store_true', help='Report clusters without changing anything')
+        parser.add_argument('--title-threshold', type=float, default=defaults.title)
+        parser.add_argument('--description-threshold', type=float, default=defaults.description)
+        parser.add_argument('--image-distance', type=int, default=defaults.image_distance)
+
+    def handle(self, *args, **options):
+        if not images.available():
+            raise CommandError('Duplicate detection needs NumPy')
+        thresholds = DedupThresholds(
+            title=options['title_threshold'],
+            description=options['description_threshold'],
+            image_distance=options['image_distance'],
+        )
+        clusters = find_duplicates(new_since=options['since'], thresholds=thresholds)
+        if options['dry_run']:
+            for cluster in clusters:
+                self.stdout.write(' '.join(map(str, cluster)))
+            self.stdout.write(f'{len(clusters)} clusters')
+            return
+        flagged, merged = apply_duplicates(clusters, merge=options['merge'])
+        self.stdout.write(self.style.SUCCESS(f'{len(clusters)} clusters: flagged {flagged} products, merged {merged}'))
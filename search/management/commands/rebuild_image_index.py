@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from search import images
+from search.models import ImageFingerprint
+
+BATCH_SIZE = 10000
+
+
+class Command(BaseCommand):
+    help = 'Rewrite the image similarity index from stored fingerprints, dropping deleted products'
+
+    def handle(self, *args, **options):
+        if not images.available():
+            raise CommandError('Image search needs NumPy and Pillow')
+        index = images.get_index()
+        index.clear()
+        rows = ImageFingerprint.objects.filter(product__is_active=True).values_list('product_id', 'phash', 'embedding')
+        batch, total = [], 0
+        for product_id, phash, embedding in rows.iterator(chunk_size=BATCH_SIZE):
+            batch.append((product_id, images.to_unsigned(phash), images.np.frombuffer(embedding, dtype=images.np.float16)))
+            if len(batch) == BATCH_SIZE:
+                index.add(batch)
+                total += len(batch)
+                batch = []
+        index.add(batch)
+        total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f'Indexed {total} product images in {index.directory}'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from search.backends import get_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the product search index, e.g. after bulk imports that bypass model signals'
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt product index with {type(backend).__name__}'))
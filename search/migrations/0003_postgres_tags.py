@@ -0,0 +1,40 @@
+from django.db import migrations
+
+# Copied rather than imported from search.backends, so later changes there
+# do not change what this migration does.
+OLD_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(brand, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(category, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'D')"
+)
+
+NEW_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(brand, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(category, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(tags, '[]'::jsonb)), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'D')"
+)
+
+
+def recreate_index(vector_sql):
+    def operation(apps, schema_editor):
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute('DROP INDEX IF EXISTS products_product_search_idx')
+            schema_editor.execute(
+                f"CREATE INDEX products_product_search_idx ON products_product USING gin (({vector_sql}))"
+            )
+    return operation
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0002_image_fingerprint'),
+    ]
+
+    operations = [
+        # The expression index now covers tags as well.
+        migrations.RunPython(recreate_index(NEW_VECTOR_SQL), recreate_index(OLD_VECTOR_SQL)),
+    ]
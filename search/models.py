@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class ImageFingerprint(models.Model):
+    """Perceptual hash and embedding of an uploaded image."""
+
+    path = models.CharField(max_length=255, unique=True)
+    phash = models.BigIntegerField(db_index=True)
+    embedding = models.BinaryField()
+    product = models.ForeignKey(
+        'products.Product', null=True, blank=True, on_delete=models.SET_NULL, related_name='image_fingerprints'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.path
@@ -0,0 +1,112 @@
+import graphene
+from graphene_file_upload.scalars import Upload
+from graphql import GraphQLError
+
+from products.catalog import CATEGORIES
+from products.models import Product
+from products.schema import ProductType
+
+from . import images
+from .backends import get_backend
+from .suggest import get_index
+
+MAX_PAGE_COUNT = 100
+MAX_SUGGESTIONS = 25
+
+
+class CategoryFacet(graphene.ObjectType):
+    category = graphene.String()
+    count = graphene.Int()
+
+
+class ProductSearchResult(graphene.ObjectType):
+    items = graphene.List(ProductType)
+    total_count = graphene.Int()
+    page_number = graphene.Int()
+    page_count = graphene.Int()
+    has_next_page = graphene.Boolean()
+    facets = graphene.List(CategoryFacet)
+
+
+class Suggestion(graphene.ObjectType):
+    text = graphene.String()
+    kind = graphene.String()
+    product_id = graphene.ID()
+
+
+class ImageMatch(graphene.ObjectType):
+    product = graphene.Field(ProductType)
+    score = graphene.Float()
+    similarity = graphene.Float()
+    hamming_distance = graphene.Int()
+
+
+class Query(graphene.ObjectType):
+    search_products = graphene.Field(
+        ProductSearchResult,
+        query=graphene.String(),
+        category=graphene.String(),
+        min_price=graphene.Float(),
+        max_price=graphene.Float(),
+        page_number=graphene.Int(default_value=1),
+        page_count=graphene.Int(default_value=20),
+    )
+    suggest = graphene.List(
+        Suggestion,
+        prefix=graphene.String(required=True),
+        limit=graphene.Int(default_value=10),
+    )
+    search_products_by_image = graphene.List(
+        ImageMatch,
+        image=Upload(required=True),
+        first=graphene.Int(default_value=10),
+    )
+
+    def resolve_search_products(self, info, query=None, category=None, min_price=None, max_price=None,
+                                page_number=1, page_count=20):
+        page_number = max(page_number, 1)
+        page_count = min(max(page_count, 1), MAX_PAGE_COUNT)
+        results = get_backend().search(
+            query,
+            category=category,
+            min_price=min_price,
+            max_price=max_price,
+            limit=page_count,
+            offset=(page_number - 1) * page_count,
+        )
+        products = Product.objects.select_related('seller').in_bulk(results.ids)
+        return ProductSearchResult(
+            items=[products[pk] for pk in results.ids if pk in products],
+            total_count=results.total,
+            page_number=page_number,
+            page_count=page_count,
+            has_next_page=page_number * page_count < results.total,
+            facets=[CategoryFacet(category=name, count=results.facets.get(name, 0)) for name in CATEGORIES],
+        )
+
+    def resolve_suggest(self, info, prefix, limit=10):
+        limit = min(max(limit, 1), MAX_SUGGESTIONS)
+        return [
+            Suggestion(text=item['text'], kind=item['kind'], product_id=item['product_id'])
+            for item in get_index().suggest(prefix, limit)
+        ]
+
+    def resolve_search_products_by_image(self, info, image, first=10):
+        if not images.available():
+            raise GraphQLError('Image search is not available on this server')
+        first = min(max(first, 1), MAX_PAGE_COUNT)
+        try:
+            phash, embedding = images.fingerprint(image)
+        except images.ImageTooLarge as error:
+            raise GraphQLError(str(error))
+        except (OSError, ValueError, images.Image.DecompressionBombError):
+            raise GraphQLError('The uploaded file is not a readable image')
+        matches = images.get_index().search(phash, embedding, k=first)
+        products = Product.objects.filter(is_active=True).select_related('seller').in_bulk(
+            [match[0] for match in matches]
+        )
+        return [
+            ImageMatch(product=products[product_id], score=score, similarity=similarity, hamming_distance=distance)
+            for product_id, score, similarity, distance in matches
+            if product_id in products
+        ]
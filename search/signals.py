@@ -0,0 +1,23 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from jobs.signals import worker_stopping
+from products.models import Product
+
+from .suggest import get_index
+from .tasks import sync_product
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    sync_product.enqueue(product_id=instance.pk)
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    sync_product.enqueue(product_id=instance.pk)
+
+
+@receiver(worker_stopping)
+def flush_suggestions(sender, **kwargs):
+    get_index().flush()
@@ -0,0 +1,347 @@
+"""
+Typeahead suggestions from a sorted-key prefix index.
+
+Product names, brands and categories become *terms*; every word-start suffix
+of a term ("acme laptop x1", "laptop x1", "x1") becomes a *key* pointing back
+at it.  Keys are stored sorted in a flat snapshot file that every gunicorn
+worker maps read-only, so the index lives once in the page cache and a lookup
+is two binary searches over the mapped offsets plus a scan of the matching
+range.
+
+Snapshot layout (little-endian, sections 8-byte aligned)::
+
+    header      magic, version, term count T, key count K, text sizes
+    Q[T]        term refs (product id, 0 for brands/categories)
+    Q[T+1]      term text offsets
+    Q[K+1]      key text offsets
+    I[T]        term weights (1 per product, product count for the rest)
+    I[T]        brand term of each product term
+    I[T]        category term of each product term
+    I[K]        term of each key
+    B[T]        term kinds
+    bytes       term text, then key text
+
+Product saves and deletes reach the index through the ``sync_product`` job,
+are buffered in the worker and folded into a new snapshot under a file lock
+after SUGGEST_INDEX['FLUSH_DELAY'] seconds, when the worker stops or when the
+process exits; the buffered changes are overlaid on lookups in the meantime.
+A flush rewrites the whole file however few products changed, about 2 s of
+CPU and 17 MB written per 100,000 products, hence the batching.  Readers
+notice the replaced file within a second and remap it.
+
+A missing snapshot is built by a queued job (or ``manage.py
+build_suggest_index``), never inside a request; until it exists only the
+buffered changes are suggested.
+"""
+
+import atexit
+import heapq
+import mmap
+import os
+import re
+import struct
+import threading
+from array import array
+from collections import Counter
+from time import monotonic
+
+from django.conf import settings
+
+from .files import FileLock
+
+MAGIC = b'SUGG'
+VERSION = 1
+HEADER = struct.Struct('<4sIIIQQ')
+NO_TERM = 0xFFFFFFFF
+
+PRODUCT, BRAND, CATEGORY = 0, 1, 2
+KIND_NAMES = {PRODUCT: 'product', BRAND: 'brand', CATEGORY: 'category'}
+
+# Ranges larger than this are ranked once and cached per snapshot.
+SCAN_LIMIT = 2000
+RECHECK_INTERVAL = 1.0
+# A missing snapshot queues another build if the last one has not written it by then.
+BUILD_RETRY_INTERVAL = 10 * 60
+
+
+def suggest_settings():
+    return getattr(settings, 'SUGGEST_INDEX', {})
+
+
+def normalize(text):
+    return ' '.join(re.findall(r'\w+', (text or '').lower()))
+
+
+def term_keys(text):
+    words = normalize(text).split(' ')
+    return [' '.join(words[index:]) for index in range(len(words)) if words[index]]
+
+
+def _align(size):
+    return size + (-size % 8)
+
+
+def write_snapshot(path, products):
+    """Write a snapshot for ``(id, name, brand, category)`` rows atomically."""
+    terms = []  # (kind, weight, ref, text, brand term, category term)
+    group_terms = {}
+    counts = Counter()
+    rows = list(products)
+    for _pk, _name, brand, category in rows:
+        for kind, text in ((BRAND, brand), (CATEGORY, category)):
+            if text:
+                counts[kind, text] += 1
+    for (kind, text), count in sorted(counts.items()):
+        group_terms[kind, text] = len(terms)
+        terms.append((kind, count, 0, text, NO_TERM, NO_TERM))
+    for pk, name, brand, category in rows:
+        if name:
+            terms.append((
+                PRODUCT, 1, pk, name,
+                group_terms.get((BRAND, brand), NO_TERM),
+                group_terms.get((CATEGORY, category), NO_TERM),
+            ))
+
+    keys = sorted(
+        (key.encode(), index)
+        for index, term in enumerate(terms)
+        for key in term_keys(term[3])
+    )
+
+    term_text = bytearray()
+    term_offsets = array('Q', [0])
+    for term in terms:
+        term_text += term[3].encode()
+        term_offsets.append(len(term_text))
+    key_text = bytearray()
+    key_offsets = array('Q', [0])
+    for key, _index in keys:
+        key_text += key
+        key_offsets.append(len(key_text))
+
+    sections = [
+        array('Q', (term[2] for term in terms)).tobytes(),
+        term_offsets.tobytes(),
+        key_offsets.tobytes(),
+        array('I', (term[1] for term in terms)).tobytes(),
+        array('I', (term[4] for term in terms)).tobytes(),
+        array('I', (term[5] for term in terms)).tobytes(),
+        array('I', (index for _key, index in keys)).tobytes(),
+        bytes(term[0] for term in terms),
+        bytes(term_text),
+        bytes(key_text),
+    ]
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(terms), len(keys), len(term_text), len(key_text)))
+        for section in sections:
+            f.write(section)
+            f.write(b'\0' * (_align(len(section)) - len(section)))
+    os.replace(tmp_path, path)
+
+
+class Snapshot:
+    """Read-only view of a snapshot file."""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.stat = os.fstat(f.fileno())
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, term_count, key_count, term_text_size, key_text_size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} suggest snapshot')
+        self.term_count = term_count
+        self.key_count = key_count
+        view = memoryview(self._mmap)
+        position = HEADER.size
+
+        def section(size, fmt=None):
+            nonlocal position
+            chunk = view[position:position + size]
+            position += _align(size)
+            return chunk.cast(fmt) if fmt else chunk
+
+        self.term_refs = section(8 * term_count, 'Q')
+        self.term_offsets = section(8 * (term_count + 1), 'Q')
+        self.key_offsets = section(8 * (key_count + 1), 'Q')
+        self.term_weights = section(4 * term_count, 'I')
+        self.term_brands = section(4 * term_count, 'I')
+        self.term_categories = section(4 * term_count, 'I')
+        self.key_terms = section(4 * key_count, 'I')
+        self.term_kinds = section(term_count)
+        self.term_text = section(term_text_size)
+        self.key_text = section(key_text_size)
+        self._ranked = {}
+
+    def key(self, index):
+        return self.key_text[self.key_offsets[index]:self.key_offsets[index + 1]].tobytes()
+
+    def text(self, term):
+        return self.term_text[self.term_offsets[term]:self.term_offsets[term + 1]].tobytes().decode()
+
+    def _bisect(self, target):
+        low, high = 0, self.key_count
+        while low < high:
+            middle = (low + high) // 2
+            if self.key(middle) < target:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def key_range(self, prefix):
+        encoded = prefix.encode()
+        return self._bisect(encoded), self._bisect(encoded + b'\xff')
+
+    def rank(self, prefix, limit):
+        """Best ``(weight, -len, term)`` candidates for a normalized prefix."""
+        start, end = self.key_range(prefix)
+        if end - start > SCAN_LIMIT:
+            cached = self._ranked.get(prefix)
+            if cached is not None and len(cached) >= limit:
+                return cached[:limit]
+        terms = set(self.key_terms[start:end])
+        ranked = heapq.nlargest(
+            limit, ((self.term_weights[term], -(self.term_offsets[term + 1] - self.term_offsets[term]), term) for term in terms)
+        )
+        if end - start > SCAN_LIMIT:
+            self._ranked[prefix] = ranked
+        return ranked
+
+    def products(self):
+        """``(id, name, brand, category)`` rows, used to fold in changes."""
+        for term in range(self.term_count):
+            if self.term_kinds[term] != PRODUCT:
+                continue
+            brand, category = self.term_brands[term], self.term_categories[term]
+            yield (
+                self.term_refs[term],
+                self.text(term),
+                self.text(brand) if brand != NO_TERM else '',
+                self.text(category) if category != NO_TERM else '',
+            )
+
+
+class SuggestIndex:
+    """Per-process handle on the shared snapshot plus unflushed changes."""
+
+    def __init__(self, path, flush_delay=2.0):
+        self.path = str(path)
+        self.flush_delay = flush_delay
+        self._snapshot = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._timer = None
+        self._build_queued = None
+
+    def snapshot(self):
+        """The current snapshot, or None while it has not been built."""
+        now = monotonic()
+        if self._snapshot is None or now - self._checked > RECHECK_INTERVAL:
+            self._checked = now
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._queue_build(now)
+                return None
+            # A snapshot deleted later gets a build of its own.
+            self._build_queued = None
+            current = self._snapshot
+            if current is None or (stat.st_ino, stat.st_mtime_ns) != (current.stat.st_ino, current.stat.st_mtime_ns):
+                self._snapshot = Snapshot(self.path)
+        return self._snapshot
+
+    def suggest(self, prefix, limit=10):
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        snapshot = self.snapshot()
+        pending = self._pending
+        results, seen = [], set()
+        # Over-fetch so products changed since the snapshot can be dropped.
+        candidates = snapshot.rank(prefix, limit + len(pending) if pending else limit) if snapshot else []
+        for weight, _length, term in candidates:
+            kind = snapshot.term_kinds[term]
+            ref = snapshot.term_refs[term]
+            if kind == PRODUCT and ref in pending:
+                continue
+            results.append((weight, kind, snapshot.text(term), ref))
+        for ref, row in list(pending.items()):
+            if row is not None and any(key.startswith(prefix) for key in term_keys(row[0])):
+                results.append((1, PRODUCT, row[0], ref))
+        results.sort(key=lambda result: (-result[0], len(result[2]), result[2]))
+        suggestions = []
+        for weight, kind, text, ref in results:
+            dedupe = (kind, text.lower())
+            if dedupe in seen:
+                continue
+            seen.add(dedupe)
+            suggestions.append({'text': text, 'kind': KIND_NAMES[kind], 'product_id': ref or None, 'weight': weight})
+            if len(suggestions) == limit:
+                break
+        return suggestions
+
+    def product_changed(self, product_id, row):
+        """Buffer ``(name, brand, category)`` for a product, or None if it is gone."""
+        with self._lock:
+            self._pending[product_id] = row
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._timer = None
+        if not pending:
+            return
+        with self._file_lock():
+            try:
+                rows = {row[0]: row for row in Snapshot(self.path).products()}
+            except FileNotFoundError:
+                rows = {}
+            for pk, row in pending.items():
+                if row is None:
+                    rows.pop(pk, None)
+                else:
+                    rows[pk] = (pk,) + tuple(row)
+            write_snapshot(self.path, rows.values())
+        self._checked = 0.0
+
+    def rebuild(self):
+        from products.models import Product
+
+        with self._file_lock():
+            rows = Product.objects.filter(is_active=True).values_list('id', 'name', 'brand', 'category').iterator(chunk_size=10000)
+            write_snapshot(self.path, rows)
+        self._checked = 0.0
+
+    def _queue_build(self, now):
+        from .tasks import build_suggest_index
+
+        if self._build_queued is None or now - self._build_queued > BUILD_RETRY_INTERVAL:
+            self._build_queued = now
+            build_suggest_index.enqueue()
+
+    def _file_lock(self):
+        return FileLock(f'{self.path}.lock')
+
+
+_index = None
+
+
+def get_index():
+    global _index
+    if _index is None:
+        config = suggest_settings()
+        _index = SuggestIndex(
+            config.get('PATH', os.path.join(settings.BASE_DIR, 'var', 'suggest.idx')),
+            flush_delay=config.get('FLUSH_DELAY', 2.0),
+        )
+        # The flush timer is a daemon thread; do not lose what it was waiting for.
+        atexit.register(_index.flush)
+    return _index
@@ -0,0 +1,38 @@
+import os
+
+from jobs.queue import task
+from products.models import Product
+
+from .backends import get_backend
+from .images import index_product_images, record_upload, remove_product_images
+from .suggest import get_index
+
+
+@task()
+def sync_product(product_id):
+    """Bring the search backend, typeahead index and image index in line with a product."""
+    product = Product.objects.filter(pk=product_id).first()
+    if product is None:
+        get_backend().remove([product_id])
+        get_index().product_changed(product_id, None)
+        remove_product_images(product_id)
+        return
+    get_backend().index([product])
+    get_index().product_changed(product_id, (product.name, product.brand, product.category) if product.is_active else None)
+    if product.is_active:
+        index_product_images(product)
+    else:
+        remove_product_images(product_id)
+
+
+@task()
+def fingerprint_upload(path):
+    record_upload(path)
+
+
+@task()
+def build_suggest_index():
+    """Build the typeahead snapshot if no process has done so yet."""
+    index = get_index()
+    if not os.path.exists(index.path):
+        index.rebuild()
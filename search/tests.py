@@ -0,0 +1,76 @@
+import os
+import shutil
+import tempfile
+
+from jobs.models import Job
+from jobs.signals import worker_stopping
+from search.suggest import SuggestIndex
+from src.testing import APITestCase, make_product, run_jobs
+
+SEARCH = '''
+query($query: String, $category: String) {
+  searchProducts(query: $query, category: $category) { totalCount items { name } facets { category count } }
+}
+'''
+
+SUGGEST = '''
+query($prefix: String!) { suggest(prefix: $prefix) { text kind } }
+'''
+
+
+class SearchTests(APITestCase):
+    def setUp(self):
+        super().setUp()
+        make_product(name='Walnut desk lamp', category='Electronics')
+        make_product(name='Brass floor lamp', category='Home & Garden')
+        make_product(name='Trail running shoes', category='Sports')
+        # Products are indexed by jobs.
+        run_jobs()
+
+    def test_search(self):
+        result = self.query(SEARCH, {'query': 'lamp'})['searchProducts']
+        self.assertEqual(result['totalCount'], 2)
+        self.assertEqual({item['name'] for item in result['items']}, {'Walnut desk lamp', 'Brass floor lamp'})
+
+    def test_category_filter(self):
+        result = self.query(SEARCH, {'query': 'lamp', 'category': 'Electronics'})['searchProducts']
+        self.assertEqual([item['name'] for item in result['items']], ['Walnut desk lamp'])
+
+    def test_suggest(self):
+        def suggestions():
+            return [item['text'] for item in self.query(SUGGEST, {'prefix': 'desk l'})['suggest']]
+
+        # Served from the worker's buffered changes until they are flushed.
+        self.assertEqual(suggestions(), ['Walnut desk lamp'])
+        worker_stopping.send(sender=None, worker='test')
+        self.assertEqual(suggestions(), ['Walnut desk lamp'])
+
+    def test_merged_duplicates_leave_the_index(self):
+        from search.dedup import apply_duplicates
+
+        canonical = make_product(name='Oak bedside lamp', stock_quantity=3)
+        duplicate = make_product(name='Oak bedside lamp', stock_quantity=2, seller=canonical.seller)
+        run_jobs()
+        self.assertEqual(apply_duplicates([[canonical.pk, duplicate.pk]], merge=True), (1, 1))
+        run_jobs()
+        result = self.query(SEARCH, {'query': 'bedside'})['searchProducts']
+        self.assertEqual(result['totalCount'], 1)
+
+
+class SuggestBuildTests(APITestCase):
+    def test_missing_snapshots_are_built_once(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        index = SuggestIndex(os.path.join(directory, 'suggest.idx'))
+        builds = Job.objects.filter(task='search.tasks.build_suggest_index')
+        for _ in range(2):
+            index._checked = 0.0
+            self.assertIsNone(index.snapshot())
+        self.assertEqual(builds.count(), 1)
+        index.rebuild()
+        self.assertIsNotNone(index.snapshot())
+        # Deleted later, it is queued again.
+        os.remove(index.path)
+        index._checked = 0.0
+        self.assertIsNone(index.snapshot())
+        self.assertEqual(builds.count(), 2)
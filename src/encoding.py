@@ -0,0 +1,117 @@
+"""
+JSON encoding and compression of API responses.
+
+``dumps`` uses orjson when it is installed, which is several times faster
+than the stdlib encoder on large result lists.  It falls back to
+``json.dumps``.  Both encode Decimals as strings, and orjson hands
+datetimes, dates and times to DjangoJSONEncoder like the fallback does
+(milliseconds, ``Z`` for UTC) instead of using its own format, so
+GenericScalar values encode the same way with either.
+
+``compress`` picks a Content-Encoding from the client's Accept-Encoding, in
+RESPONSE_ENCODING['ENCODINGS'] order: zstd (zstandard), br (brotli) or gzip.
+zstd and br are only offered when their modules are installed.  Bodies
+smaller than RESPONSE_ENCODING['MIN_SIZE'] are sent as they are, since
+compressing them costs more than it saves.
+
+The same caveat as for GZipMiddleware applies: compressed responses that
+contain both a secret and attacker-controlled text can leak the secret
+through their length (BREACH).  The GraphQL views accept the session cookie
+as well as bearer tokens and are CSRF-exempt, so a cross-site page could
+send such requests; what keeps it from doing so with the victim's session is
+the session cookie's SameSite=Lax (Django's default SESSION_COOKIE_SAMESITE),
+which leaves the cookie off cross-site POSTs and subrequests.  Do not relax
+that setting while responses are compressed.
+"""
+
+import gzip
+import json
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.functional import Promise
+
+try:
+    import orjson
+except ImportError:  # The stdlib encoder is used without orjson.
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # br is not offered without brotli.
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # zstd is not offered without zstandard.
+    zstandard = None
+
+DEFAULTS = {
+    'MIN_SIZE': 1024,
+    'ENCODINGS': ('zstd', 'br', 'gzip'),
+    'LEVELS': {'zstd': 3, 'br': 4, 'gzip': 5},
+}
+
+COMPRESSORS = {
+    'gzip': lambda data, level: gzip.compress(data, compresslevel=level, mtime=0),
+}
+if brotli is not None:
+    COMPRESSORS['br'] = lambda data, level: brotli.compress(data, quality=level)
+if zstandard is not None:
+    COMPRESSORS['zstd'] = lambda data, level: zstandard.ZstdCompressor(level=level).compress(data)
+
+_coding = re.compile(r'^\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*$')
+
+
+def encoding_settings():
+    return {**DEFAULTS, **getattr(settings, 'RESPONSE_ENCODING', {})}
+
+
+def _default(value):
+    # Only values orjson does not encode itself reach this.
+    if isinstance(value, Promise):
+        return str(value)
+    return DjangoJSONEncoder().default(value)
+
+
+def dumps(data):
+    """Compact JSON for ``data`` as bytes."""
+    if orjson is not None:
+        return orjson.dumps(
+            data, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+    return json.dumps(data, separators=(',', ':'), cls=DjangoJSONEncoder).encode()
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept_encoding, offered):
+    """The first of ``offered`` that ``accept_encoding`` allows, or None."""
+    accepted = {}
+    for part in accept_encoding.split(','):
+        match = _coding.match(part)
+        if match:
+            try:
+                accepted[match[1].lower()] = float(match[2] or 1)
+            except ValueError:
+                continue
+    for coding in offered:
+        if accepted.get(coding, accepted.get('*', 0)) > 0:
+            return coding
+    return None
+
+
+def compress(data, accept_encoding):
+    """``(coding, compressed data)``, or ``(None, data)`` when it is sent as is."""
+    config = encoding_settings()
+    if len(data) < config['MIN_SIZE'] or not accept_encoding:
+        return None, data
+    offered = tuple(coding for coding in config['ENCODINGS'] if coding in COMPRESSORS)
+    coding = negotiate(accept_encoding, offered)
+    if coding is None:
+        return None, data
+    compressed = COMPRESSORS[coding](data, config['LEVELS'][coding])
+    if len(compressed) >= len(data):
+        return None, data
+    return coding, compressed
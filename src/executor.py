@@ -0,0 +1,125 @@
+"""
+The GraphQL schema and executor shared by every GraphQL view.
+
+Django builds a view instance per request, and graphene's view then
+instantiates GRAPHENE['MIDDLEWARE'] and parses and validates the query all
+over again.  ``get_executor`` builds those things once per process instead:
+the schema (imported on first use, so URL loading stays cheap), one
+MiddlewareManager, which also caches each field's wrapped resolver, and an
+LRU cache of parsed and validated documents keyed by the query text, which
+clients send the same few of again and again.  Documents are read-only during
+execution, so one can serve any number of requests at the same time.
+
+The cache is bounded by the total length of the cached queries,
+GRAPHQL_EXECUTOR['DOCUMENT_CACHE_BYTES'], since a document and its
+validation take about 150-200 bytes of memory per character of query text:
+the default 64 KiB holds roughly 10 MiB.  Queries longer than
+MAX_CACHED_QUERY_LENGTH and queries that fail validation are not cached, so
+neither can push the common ones out.
+
+Under a preloading server ``warm`` builds all of it in the parent before the
+workers are forked (see gunicorn.conf.py).
+"""
+
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from graphene_django.settings import graphene_settings
+from graphene_django.views import instantiate_middleware
+from graphql import MiddlewareManager, parse, validate, validate_schema
+
+DEFAULTS = {
+    'DOCUMENT_CACHE_BYTES': 64 * 1024,
+    'MAX_CACHED_QUERY_LENGTH': 4 * 1024,
+}
+
+_executor = None
+
+
+def executor_settings():
+    return {**DEFAULTS, **getattr(settings, 'GRAPHQL_EXECUTOR', {})}
+
+
+class DocumentCache:
+    """LRU of ``(query, rules) -> (document, [])`` holding at most ``size`` characters of queries."""
+
+    def __init__(self, size):
+        self.size = size
+        self.used = 0
+        self._lock = threading.Lock()
+        self._documents = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._documents.get(key)
+            if entry is not None:
+                self._documents.move_to_end(key)
+            return entry
+
+    def add(self, key, entry):
+        with self._lock:
+            if key in self._documents:
+                return
+            self._documents[key] = entry
+            self.used += len(key[0])
+            while self.used > self.size:
+                (query, _rules), _entry = self._documents.popitem(last=False)
+                self.used -= len(query)
+
+    def __len__(self):
+        return len(self._documents)
+
+
+class Executor:
+    def __init__(self, schema, middleware=()):
+        config = executor_settings()
+        self.schema = schema
+        self.schema_errors = validate_schema(schema.graphql_schema)
+        self.middleware = MiddlewareManager(*instantiate_middleware(middleware))
+        self.max_cached_length = config['MAX_CACHED_QUERY_LENGTH']
+        self.documents = DocumentCache(config['DOCUMENT_CACHE_BYTES'])
+
+    def _document(self, query, validation_rules):
+        """``(document, validation errors)``; raises GraphQLError when ``query`` does not parse."""
+        document = parse(query)
+        return document, validate(
+            self.schema.graphql_schema, document, validation_rules, graphene_settings.MAX_VALIDATION_ERRORS,
+        )
+
+    def document(self, query, validation_rules=None):
+        rules = tuple(validation_rules) if validation_rules else None
+        if len(query) > self.max_cached_length:
+            return self._document(query, rules)
+        key = (query, rules)
+        entry = self.documents.get(key)
+        if entry is None:
+            entry = self._document(query, rules)
+            if not entry[1]:
+                self.documents.add(key, entry)
+        return entry
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = Executor(graphene_settings.SCHEMA, graphene_settings.MIDDLEWARE)
+    return _executor
+
+
+@receiver(setting_changed)
+def _reset_executor(setting, **kwargs):
+    # Middleware reads its settings when it is instantiated, e.g. rate limits.
+    global _executor
+    if setting in ('GRAPHENE', 'GRAPHQL_EXECUTOR', 'RATE_LIMITS'):
+        _executor = None
+
+
+def warm():
+    """Import and build everything the first GraphQL request would, e.g. before forking workers."""
+    from django.urls import get_resolver
+
+    get_resolver().urlconf_module
+    return get_executor()
@@ -0,0 +1,42 @@
+"""
+Deferred imports of heavy optional modules.
+
+NumPy and Pillow add ~20 MiB and ~60 ms to every process that imports them,
+while only image search and columnar analytics use them.  ``lazy_module``
+stands in for such a module and imports it on first attribute access, so
+``np.float32`` works as usual in functions and processes that never get
+there do not pay for it.  ``installed`` tells whether modules are present
+without importing them.
+"""
+
+import importlib
+from importlib.util import find_spec
+
+
+def installed(*names):
+    try:
+        return all(find_spec(name) is not None for name in names)
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule:
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def _load(self):
+        # The import lock makes concurrent first uses import the module once.
+        module = self._module = importlib.import_module(self._name)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._module or self._load(), attr)
+
+    def __repr__(self):
+        return f'<lazy module {self._name!r}{" (loaded)" if self._module is not None else ""}>'
+
+
+def lazy_module(name):
+    """A LazyModule for ``name``, or None when it is not installed."""
+    return LazyModule(name) if installed(name) else None
@@ -2,18 +2,27 @@ import graphene
 from graphene_django import DjangoObjectType
 from django.contrib.auth.models import User
 
+from accounts.schema import Mutation as AccountsMutation, Query as AccountsQuery
+from analytics.schema import Query as AnalyticsQuery
+from cart.schema import Mutation as CartMutation, Query as CartQuery
+from messaging.schema import Mutation as MessagingMutation, Query as MessagingQuery
+from notifications.schema import Mutation as NotificationsMutation, Query as NotificationsQuery
+from products.schema import Mutation as ProductsMutation, Query as ProductsQuery
+from search.schema import Query as SearchQuery
+from wishlist.schema import Mutation as WishlistMutation, Query as WishlistQuery
+
 class UserType(DjangoObjectType):
     class Meta:
         model = User
         fields = ("id", "username", "email", "first_name", "last_name")
 
-class Query(graphene.ObjectType):
+class Query(AccountsQuery, AnalyticsQuery, CartQuery, MessagingQuery, NotificationsQuery, ProductsQuery, SearchQuery, WishlistQuery, graphene.ObjectType):
     users = graphene.List(UserType)
     
     def resolve_users(self, info):
         return User.objects.all()
 
-class Mutation(graphene.ObjectType):
+class Mutation(AccountsMutation, CartMutation, MessagingMutation, NotificationsMutation, ProductsMutation, WishlistMutation, graphene.ObjectType):
     pass
 
 schema = graphene.Schema(query=Query, mutation=Mutation)
@@ -27,15 +27,32 @@ INSTALLED_APPS = [
     'graphene_django',
     'corsheaders',
     'accounts',
+    'monitoring',
+    'jobs',
+    'products',
+    'search',
+    'orders',
+    'analytics',
+    'cart',
+    'inventory',
+    'notifications',
+    'messaging',
+    'wishlist',
+    'ratelimit',
+    'exports',
 ]
 
 MIDDLEWARE = [
+    'monitoring.middleware.MetricsMiddleware',
+    'monitoring.middleware.SlowRequestProfilerMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.JWTAuthenticationMiddleware',
+    'ratelimit.middleware.RateLimitMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -65,9 +82,38 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # WAL lets readers run alongside the writer and commits without a
+            # full fsync.  Stock reservations take the write lock up front
+            # (inventory.reservations); other transactions stay DEFERRED.
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            'timeout': 20,
+        },
+    }
+}
+
+# Cache; set REDIS_URL to share it between gunicorn workers
+REDIS_URL = os.environ.get('REDIS_URL')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'monitoring.cache.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'monitoring.cache.LocMemCache',
     }
 }
 
+# Sessions are read from the cache when workers share one, and unchanged
+# sessions are not written back (accounts.sessions); `manage.py
+# clearsessions` purges expired ones in batches
+SESSION_ENGINE = 'accounts.sessions'
+SESSIONS = {
+    'CACHE': 'default' if REDIS_URL else None,
+    'WRITE_INTERVAL': 60 * 60,
+    'PURGE_BATCH': 1000,
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -84,6 +130,24 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# The first hasher hashes new passwords; ITERATIONS (default: Django's) sets
+# its cost, and existing hashes are upgraded on login when it changes.
+PASSWORD_HASHERS = [
+    'accounts.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+
+# Logins and registrations hash in this many processes per server process;
+# beyond MAX_PENDING waiting hashes the API answers 429 (accounts.hashing)
+PASSWORD_HASHING = {
+    'WORKERS': 2,
+    'MAX_PENDING': 8,
+    'TIMEOUT': 10.0,
+}
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -98,6 +162,102 @@ STATIC_ROOT = BASE_DIR / 'staticfiles'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Typeahead snapshot shared by all workers through mmap
+SUGGEST_INDEX = {
+    'PATH': BASE_DIR / 'var' / 'suggest.idx',
+    'FLUSH_DELAY': 2.0,
+}
+
+# Memory-mapped image similarity index (needs NumPy and Pillow)
+IMAGE_INDEX_DIR = BASE_DIR / 'var' / 'images'
+
+# Incremental vendor analytics rollups
+ANALYTICS_ROLLUPS = {
+    'FLUSH_DELAY': 5.0,
+    'HOURLY_RETENTION_DAYS': 14,
+}
+
+# Memory-mapped columnar analytics export (needs NumPy)
+ANALYTICS_COLUMNAR_DIR = BASE_DIR / 'var' / 'analytics'
+
+# Carts live in the shared cache with write-behind when there is one
+CART = {
+    'STORE': 'cached' if REDIS_URL else 'database',
+    'FLUSH_DELAY': 2.0,
+}
+
+# Stock reservations are held this long (seconds) before the sweeper returns them
+INVENTORY = {
+    'RESERVATION_TTL': 15 * 60,
+}
+
+# Outbox job queue; side effects such as search indexing only happen while
+# `manage.py run_workers` is running next to the web server.
+JOBS = {
+    'BATCH_SIZE': 10,
+    'LEASE': 5 * 60,
+    'MAX_ATTEMPTS': 5,
+    'RETENTION': 24 * 60 * 60,
+}
+
+# Notification fan-out; TRANSPORT delivers pushes (LocalTransport for tests)
+NOTIFICATIONS = {
+    'TRANSPORT': 'notifications.transports.LogTransport',
+    'CHUNK_SIZE': 2000,
+    'COALESCE_WINDOW': 15 * 60,
+}
+
+# Wishlists and recently viewed products are read from the cache when workers
+# share one, and views are compacted to the database every FLUSH_DELAY
+# seconds; without one they are read from and written to the database
+WISHLIST = {
+    'CACHE': 'default' if REDIS_URL else None,
+    'MAX_ITEMS': 500,
+    'RECENT_ITEMS': 50,
+    'FLUSH_DELAY': 5.0,
+}
+
+# Bearer tokens for the GraphQL API (accounts.tokens); SIGNING_KEY defaults to SECRET_KEY.
+# Revoked tokens are denied from the cache only when it is shared by all
+# workers, else from the database
+JWT = {
+    'CACHE': 'default' if REDIS_URL else None,
+    'ACCESS_TTL': 15 * 60,
+    'REFRESH_TTL': 30 * 24 * 60 * 60,
+    'VERIFIED_TOKENS': 10_000,
+}
+
+# Sliding-window limits per user (or IP when anonymous); counters live in the
+# shared cache when there is one, else per process (ratelimit.limiter).
+# RATE_LIMITS_ENABLED=0 turns them off, e.g. for a server that
+# ``manage.py benchmark --url`` runs against from one client.
+RATE_LIMITS = {
+    'ENABLED': os.environ.get('RATE_LIMITS_ENABLED', '1') != '0',
+    'BACKEND': 'cache' if REDIS_URL else 'local',
+    'DEFAULT': '600/m',
+    'PATHS': {
+        '/api/upload-image/': '30/m',
+        '/graphql/uploads/': '30/m',
+        '/exports/products.ndjson': '30/h',
+        '/exports/users.ndjson': '30/h',
+    },
+    # GraphQL root fields cost COSTS units (default 1) against this budget
+    'GRAPHQL': '600/m',
+    'COSTS': {
+        'searchProducts': 5,
+        'searchProductsByImage': 20,
+        'vendorAnalytics': 10,
+        'vendorSalesBreakdown': 10,
+    },
+    'OPERATIONS': {
+        'login': '10/m',
+        'register': '5/m',
+        'refreshToken': '30/m',
+        'sendMessage': '60/m',
+        'createProduct': '30/m',
+    },
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -113,5 +273,76 @@ CORS_ALLOW_CREDENTIALS = True
 
 # GraphQL settings
 GRAPHENE = {
-    'SCHEMA': 'src.schema.schema'
+    'SCHEMA': 'src.schema.schema',
+    'MIDDLEWARE': [
+        'ratelimit.middleware.OperationRateLimitMiddleware',
+        'monitoring.tracing.ResolverTracingMiddleware',
+    ],
+}
+
+# One schema, middleware stack and cache of parsed and validated queries per
+# process, shared by both GraphQL views (src/executor.py).  The cache holds
+# DOCUMENT_CACHE_BYTES of query text (about 10 MiB of documents) and skips
+# longer queries and invalid ones.  `manage.py importtime` reports what a
+# worker spends its start-up on; gunicorn.conf.py preloads all of it before
+# forking.
+GRAPHQL_EXECUTOR = {
+    'DOCUMENT_CACHE_BYTES': 64 * 1024,
+    'MAX_CACHED_QUERY_LENGTH': 4 * 1024,
+}
+
+# Per-resolver tracing; send the X-GraphQL-Trace header (DEBUG or staff only)
+# to get the trace back in the response extensions.  Metrics are labelled by
+# operation name (OPERATIONS if set, else the first MAX_OPERATIONS seen; the
+# rest are "other") and by field path up to MAX_PATH_DEPTH fields.
+GRAPHQL_TRACING = {
+    'ENABLED': True,
+    'EXPOSE_HEADER': 'HTTP_X_GRAPHQL_TRACE',
+    'OPERATIONS': [],
+    'MAX_OPERATIONS': 100,
+    'MAX_PATH_DEPTH': 5,
+}
+
+# API responses: orjson when installed, and zstd/br/gzip (as installed and
+# accepted) for bodies of MIN_SIZE bytes or more; see src/encoding.py.
+RESPONSE_ENCODING = {
+    'MIN_SIZE': 1024,
+    'ENCODINGS': ('zstd', 'br', 'gzip'),
+    'LEVELS': {'zstd': 3, 'br': 4, 'gzip': 5},
+}
+
+# Streaming NDJSON exports under /exports/; see exports/views.py.
+EXPORTS = {
+    'CHUNK_SIZE': 2000,
+    'FLUSH_BYTES': 64 * 1024,
+}
+
+# manage.py benchmark: run history, the baseline it compares with, and how
+# much slower (fraction and milliseconds) a p95 may get before it fails.
+BENCHMARKS = {
+    'HISTORY': BASE_DIR / 'var' / 'benchmarks' / 'history.jsonl',
+    'BASELINE': BASE_DIR / 'var' / 'benchmarks' / 'baseline.json',
+    'THRESHOLD': 0.2,
+    'MIN_DELTA_MS': 2.0,
+    'CONCURRENCY': 4,
+}
+
+# manage.py test [--parallel]: in-process GraphQL tests against an in-memory
+# database, with fast test settings; see src/testing.py.
+TEST_RUNNER = 'src.testing.TestRunner'
+
+# Monitoring; under gunicorn point METRICS_MULTIPROC_DIR at an empty
+# directory so every worker's metrics are summed on /metrics.
+METRICS_ALLOWED_NETWORKS = ['127.0.0.1/32', '::1/128']
+METRICS_MULTIPROC_DIR = os.environ.get('METRICS_MULTIPROC_DIR')
+
+# Stacks of requests slower than THRESHOLD seconds are sampled at HZ and
+# written to OUTPUT_DIR; render them with `manage.py flamegraph`.  Off unless
+# DEBUG; enable it in production only while investigating.
+SLOW_REQUEST_PROFILER = {
+    'ENABLED': DEBUG,
+    'THRESHOLD': 0.5,
+    'HZ': 1000 if DEBUG else 100,
+    'REQUEST_RATE': 1.0 if DEBUG else 0.1,
+    'OUTPUT_DIR': 'profiles',
 }
@@ -0,0 +1,216 @@
+"""
+Test harness for the GraphQL API: ``manage.py test`` runs without a server.
+
+``APITestCase.execute`` runs operations straight against the schema with the
+views' shared executor (``src.executor``), as a given user, so a test costs a
+schema execution instead of an HTTP round trip.  Tests are Django TestCases:
+each runs in a transaction that is rolled back afterwards, the test database
+is SQLite in memory, and ``--parallel`` runs test modules in worker
+processes, each with its own copy of the database.
+
+The ``make_*`` factories create the usual rows with valid defaults that any
+keyword overrides.  TestRunner applies test_settings() on top of the project
+settings: a fast password hasher hashed inline, no rate limits, a
+per-process cache, carts in the database, pushes kept in
+LocalTransport.outbox, files under a temporary directory, and write-behind
+flushes that only happen when a test calls them.  Side effects queued as jobs
+run when a test calls ``run_jobs``.
+
+Only the app packages are searched for tests, so the scripts at the top of
+the repository that call a remote server are not picked up.
+"""
+
+import itertools
+import shutil
+import tempfile
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.runner import DiscoverRunner, ParallelTestSuite as BaseParallelTestSuite
+
+from .executor import get_executor
+
+PASSWORD = 'test-Password-1'
+
+_sequence = itertools.count(1)
+_overrides = None
+_files = None
+
+
+def test_settings(files):
+    """Overrides of the project settings for tests, with files kept under ``files``."""
+    return {
+        'PASSWORD_HASHERS': ['django.contrib.auth.hashers.MD5PasswordHasher'],
+        'PASSWORD_HASHING': {**getattr(settings, 'PASSWORD_HASHING', {}), 'WORKERS': 0},
+        'CACHES': {'default': {'BACKEND': 'monitoring.cache.LocMemCache'}},
+        'SESSIONS': {**getattr(settings, 'SESSIONS', {}), 'CACHE': None},
+        'JWT': {**getattr(settings, 'JWT', {}), 'CACHE': None},
+        'RATE_LIMITS': {**getattr(settings, 'RATE_LIMITS', {}), 'ENABLED': False, 'BACKEND': 'local'},
+        'CART': {**settings.CART, 'STORE': 'database'},
+        'NOTIFICATIONS': {**settings.NOTIFICATIONS, 'TRANSPORT': 'notifications.transports.LocalTransport'},
+        # Flushed only when a test asks, never by a timer in the middle of another test.
+        'SUGGEST_INDEX': {**settings.SUGGEST_INDEX, 'PATH': f'{files}/suggest.idx', 'FLUSH_DELAY': 24 * 60 * 60},
+        'WISHLIST': {**settings.WISHLIST, 'FLUSH_DELAY': 24 * 60 * 60},
+        'ANALYTICS_ROLLUPS': {**settings.ANALYTICS_ROLLUPS, 'FLUSH_DELAY': 24 * 60 * 60},
+        'MEDIA_ROOT': f'{files}/media',
+        'IMAGE_INDEX_DIR': f'{files}/images',
+        'ANALYTICS_COLUMNAR_DIR': f'{files}/analytics',
+        'BENCHMARKS': {**getattr(settings, 'BENCHMARKS', {}), 'HISTORY': f'{files}/history.jsonl'},
+    }
+
+
+def _apply_test_settings(parent=None):
+    global _files, _overrides
+    if _overrides is None:
+        _files = tempfile.mkdtemp(prefix='test-files-', dir=parent)
+        _overrides = override_settings(**test_settings(_files))
+        _overrides.enable()
+
+
+def _restore_settings():
+    global _files, _overrides
+    if _overrides is not None:
+        # Spawned workers' directories are inside this one.
+        shutil.rmtree(_files, ignore_errors=True)
+        _overrides.disable()
+        _overrides = _files = None
+
+
+class ParallelTestSuite(BaseParallelTestSuite):
+    # Spawned workers import this module before django.setup(), start from
+    # the settings module and keep their files in a directory of the
+    # runner's, which it removes; forked ones inherit the overrides.
+    process_setup = _apply_test_settings
+
+    @property
+    def process_setup_args(self):
+        return (_files,)
+
+
+class TestRunner(DiscoverRunner):
+    parallel_test_suite = ParallelTestSuite
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        _apply_test_settings()
+
+    def teardown_test_environment(self, **kwargs):
+        _restore_settings()
+        super().teardown_test_environment(**kwargs)
+
+    def build_suite(self, test_labels=None, **kwargs):
+        if not test_labels:
+            test_labels = [
+                config.name for config in apps.get_app_configs()
+                if str(config.path).startswith(str(settings.BASE_DIR))
+            ]
+        return super().build_suite(test_labels, **kwargs)
+
+
+def run_jobs():
+    """Run queued jobs, e.g. search indexing, until none are left; returns how many ran."""
+    from jobs.queue import work
+
+    total = 0
+    while ran := work():
+        total += ran
+    return total
+
+
+class APITestCase(TestCase):
+    def setUp(self):
+        from notifications.transports import LocalTransport
+
+        super().setUp()
+        # Caches and the outbox are not part of the rolled-back transaction.
+        for cache in caches.all():
+            cache.clear()
+        LocalTransport.outbox.clear()
+        self.factory = RequestFactory()
+
+    def request(self, user=None, **meta):
+        from django.contrib.auth.models import AnonymousUser
+
+        request = self.factory.post('/graphql/', **meta)
+        request.user = user or AnonymousUser()
+        return request
+
+    def execute(self, query, variables=None, user=None, request=None):
+        """Run ``query`` as ``user`` (anonymous by default) and return the ExecutionResult."""
+        executor = get_executor()
+        return executor.schema.execute(
+            query, variable_values=variables, context_value=request or self.request(user),
+            middleware=executor.middleware,
+        )
+
+    def query(self, query, variables=None, user=None, request=None):
+        """``data`` of a query expected to succeed."""
+        result = self.execute(query, variables, user, request)
+        self.assertIsNone(result.errors, result.errors)
+        return result.data
+
+    def assertError(self, result, message=None, code=None):
+        self.assertTrue(result.errors, 'Expected an error')
+        error = result.errors[0]
+        if message is not None:
+            self.assertIn(message, error.message)
+        if code is not None:
+            self.assertEqual((error.extensions or {}).get('code'), code)
+        return error
+
+
+def make_user(password=PASSWORD, account_type=None, **fields):
+    from accounts.models import AccountProfile
+
+    n = next(_sequence)
+    fields.setdefault('email', f'user{n}@example.com')
+    fields.setdefault('username', fields['email'])
+    fields.setdefault('first_name', 'Test')
+    fields.setdefault('last_name', f'User {n}')
+    user = get_user_model()(**fields)
+    user.set_password(password)
+    user.save()
+    AccountProfile.objects.create(user=user, account_type=account_type or AccountProfile.CUSTOMER)
+    return user
+
+
+def make_supplier(**fields):
+    from accounts.models import AccountProfile
+
+    return make_user(account_type=AccountProfile.SUPPLIER, **fields)
+
+
+def make_product(seller=None, **fields):
+    from products.models import Product
+
+    n = next(_sequence)
+    fields.setdefault('name', f'Test product {n}')
+    fields.setdefault('category', 'Electronics')
+    fields.setdefault('price', Decimal('19.99'))
+    fields.setdefault('stock_quantity', 10)
+    return Product.objects.create(seller=seller or make_supplier(), **fields)
+
+
+def make_order(customer=None, items=None, status=None, **fields):
+    """An order of ``items``, ``[(product, quantity)]``, all from the first product's seller."""
+    from orders.models import Order, OrderItem
+
+    n = next(_sequence)
+    items = items or [(make_product(), 1)]
+    order = Order.objects.create(
+        order_number=f'TEST-{n}', customer=customer or make_user(), vendor_id=items[0][0].seller_id,
+        status=status or Order.CONFIRMED,
+        total_amount=sum(product.current_price * quantity for product, quantity in items), **fields,
+    )
+    OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order, product=product, product_name=product.name, quantity=quantity,
+            unit_price=product.current_price, total_price=product.current_price * quantity,
+        )
+        for product, quantity in items
+    ])
+    return order
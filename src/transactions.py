@@ -0,0 +1,33 @@
+"""
+Transactions that take SQLite's write lock when they begin.
+
+SQLite has one write lock per database.  A DEFERRED transaction, Django's
+default, only asks for it at its first write, and if another connection
+committed since the transaction's first read the upgrade fails at once with
+"database is locked": the busy timeout does not apply.  Code that reads and
+then writes under contention (stock reservations, job claims) therefore uses
+``write_atomic``, which starts the outermost transaction with ``BEGIN
+IMMEDIATE`` so it queues for the lock on the busy timeout instead.  Other
+databases lock rows, and get a plain ``transaction.atomic()``.
+"""
+
+from contextlib import contextmanager
+
+from django.db import connection, transaction
+
+
+@contextmanager
+def write_atomic():
+    """``transaction.atomic()`` that takes SQLite's write lock when it begins."""
+    if connection.vendor != 'sqlite' or connection.in_atomic_block:
+        with transaction.atomic():
+            yield
+        return
+    connection.ensure_connection()
+    previous, connection.transaction_mode = connection.transaction_mode, 'IMMEDIATE'
+    try:
+        with transaction.atomic():
+            connection.transaction_mode = previous
+            yield
+    finally:
+        connection.transaction_mode = previous
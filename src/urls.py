@@ -25,8 +25,11 @@ from django.core.files.storage import default_storage
 import uuid
 import os
 
-from graphene_django.views import GraphQLView
-from graphene_file_upload.django import FileUploadGraphQLView
+from exports.views import export_products, export_users
+from monitoring.instrumentation import UPLOADED_BYTES, UPLOADED_FILES
+from monitoring.views import metrics
+from search.tasks import fingerprint_upload
+from src.views import GraphQLView, FileUploadGraphQLView
 
 @csrf_exempt
 def upload_image(request):
@@ -41,6 +44,9 @@ def upload_image(request):
                 
                 # Save the file
                 file_path = default_storage.save(f'profile_images/{unique_filename}', image_file)
+                UPLOADED_FILES.inc(('profile_images',))
+                UPLOADED_BYTES.inc(('profile_images',), image_file.size)
+                fingerprint_upload.enqueue(path=file_path)
                 
                 # Return the URL
                 image_url = request.build_absolute_uri(f'/media/{file_path}')
@@ -72,4 +78,7 @@ urlpatterns = [
     path("graphql/", csrf_exempt(GraphQLView.as_view(graphiql=True))),
     path("graphql/uploads/", csrf_exempt(FileUploadGraphQLView.as_view(graphiql=True))),
     path("api/upload-image/", upload_image, name='upload_image'),
+    path("exports/products.ndjson", export_products, name='export_products'),
+    path("exports/users.ndjson", export_users, name='export_users'),
+    path("metrics", metrics, name='metrics'),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
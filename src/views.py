@@ -0,0 +1,132 @@
+"""
+GraphQL views used by the project URLs.
+"""
+
+from django.db import connection, transaction
+from django.http import HttpResponseBadRequest, HttpResponseNotAllowed
+from django.utils.cache import patch_vary_headers
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.views import GraphQLView as BaseGraphQLView, HttpError
+from graphene_file_upload.django import FileUploadGraphQLView as BaseFileUploadGraphQLView
+from graphql import ExecutionResult, OperationType, execute, get_operation_ast
+from graphql.error import GraphQLError
+
+from monitoring.tracing import TracingGraphQLViewMixin
+
+from .encoding import compress, dumps
+from .executor import get_executor
+
+
+class RetryAfterMixin:
+    """Answers 429 with Retry-After when a resolver set ``request.retry_after``."""
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        retry_after = getattr(request, 'retry_after', None)
+        if retry_after is not None:
+            response.status_code = 429
+            response['Retry-After'] = str(retry_after)
+        return response
+
+
+class FastJSONMixin:
+    """Encodes results with ``src.encoding.dumps``; ``?pretty`` output is unchanged."""
+
+    def json_encode(self, request, d, pretty=False):
+        if self.pretty or pretty or request.GET.get('pretty'):
+            return super().json_encode(request, d, pretty)
+        content = dumps(d)
+        # Batched results are joined as text by the base view.
+        return content.decode() if self.batch else content
+
+
+class CompressionMixin:
+    """Compresses responses with the encoding the client accepts (see ``src.encoding``)."""
+
+    def dispatch(self, request, *args, **kwargs):
+        response = super().dispatch(request, *args, **kwargs)
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        coding, content = compress(response.content, request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if coding is not None:
+            response.content = content
+            response['Content-Encoding'] = coding
+            response['Content-Length'] = str(len(content))
+        return response
+
+
+class SharedExecutorMixin:
+    """
+    Runs queries with the process-wide executor (``src.executor``): no
+    middleware is instantiated per request and repeated queries are not
+    parsed or validated again.  Otherwise behaves as graphene's view.
+    """
+
+    def __init__(self, **kwargs):
+        executor = get_executor()
+        kwargs.setdefault('schema', executor.schema)
+        kwargs.setdefault('middleware', executor.middleware)
+        super().__init__(**kwargs)
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        if not query:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest('Must provide query string.'))
+
+        executor = get_executor()
+        if executor.schema_errors:
+            return ExecutionResult(data=None, errors=executor.schema_errors)
+        try:
+            document, validation_errors = executor.document(query, self.validation_rules)
+        except GraphQLError as error:
+            return ExecutionResult(errors=[error])
+
+        operation_ast = get_operation_ast(document, operation_name)
+        if request.method.lower() == 'get' and operation_ast is not None and operation_ast.operation != OperationType.QUERY:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseNotAllowed(
+                ['POST'], f'Can only perform a {operation_ast.operation.value} operation from a POST request.',
+            ))
+        if validation_errors:
+            return ExecutionResult(data=None, errors=validation_errors)
+
+        options = {
+            'root_value': self.get_root_value(request),
+            'context_value': self.get_context(request),
+            'variable_values': variables,
+            'operation_name': operation_name,
+            'middleware': self.get_middleware(request),
+        }
+        if self.execution_context_class:
+            options['execution_context_class'] = self.execution_context_class
+        schema = self.schema.graphql_schema
+        try:
+            if operation_ast is not None and operation_ast.operation == OperationType.MUTATION and (
+                graphene_settings.ATOMIC_MUTATIONS is True
+                or connection.settings_dict.get('ATOMIC_MUTATIONS', False) is True
+            ):
+                with transaction.atomic():
+                    result = execute(schema, document, **options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+                return result
+            return execute(schema, document, **options)
+        except Exception as error:
+            return ExecutionResult(errors=[error])
+
+
+class GraphQLView(
+    CompressionMixin, RetryAfterMixin, TracingGraphQLViewMixin, FastJSONMixin, SharedExecutorMixin, BaseGraphQLView,
+):
+    pass
+
+
+class FileUploadGraphQLView(
+    CompressionMixin, RetryAfterMixin, TracingGraphQLViewMixin, FastJSONMixin, SharedExecutorMixin,
+    BaseFileUploadGraphQLView,
+):
+    pass
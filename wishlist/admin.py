@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from .models import RecentlyViewed, WishlistItem
+
+
+@admin.register(WishlistItem)
+class WishlistItemAdmin(admin.ModelAdmin):
+    list_display = ('user', 'product', 'created_at')
+    raw_id_fields = ('user', 'product')
+
+
+@admin.register(RecentlyViewed)
+class RecentlyViewedAdmin(admin.ModelAdmin):
+    list_display = ('user', 'product', 'viewed_at')
+    raw_id_fields = ('user', 'product')
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.db import models
+
+
+class WishlistItem(models.Model):
+    # Both foreign keys are covered by the composite indexes below.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='wishlist_items', db_index=False,
+    )
+    product = models.ForeignKey(
+        'products.Product', on_delete=models.CASCADE, related_name='wishlist_items', db_index=False,
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=['user', 'product'], name='unique_wishlist_product')]
+        # The product index serves the price-drop and restock audiences.
+        indexes = [models.Index(fields=['product', 'user'], name='wishlist_watchers_idx')]
+
+    def __str__(self):
+        return f'{self.product_id} on the wishlist of {self.user_id}'
+
+
+class RecentlyViewed(models.Model):
+    """A user's recently viewed products; with a shared cache, a compacted copy of the list there."""
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='recently_viewed', db_index=False,
+    )
+    product = models.ForeignKey('products.Product', on_delete=models.CASCADE, related_name='+')
+    viewed_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name_plural = 'recently viewed'
+        constraints = [models.UniqueConstraint(fields=['user', 'product'], name='unique_recently_viewed_product')]
+
+    def __str__(self):
+        return f'{self.product_id} viewed by {self.user_id}'
@@ -0,0 +1,96 @@
+import graphene
+from graphql import GraphQLError
+
+from accounts.schema import current_user_id
+from products.schema import ProductType
+
+from .store import (
+    WishlistError, add_to_wishlist, from_micros, get_view_history, product_cards, remove_from_wishlist, wishlist,
+)
+
+
+class WishlistItemType(graphene.ObjectType):
+    id = graphene.ID()
+    product = graphene.Field(ProductType)
+    created_at = graphene.DateTime()
+
+
+class RecentlyViewedType(graphene.ObjectType):
+    # One entry per product, so the product id doubles as the entry id.
+    id = graphene.ID()
+    product = graphene.Field(ProductType)
+    viewed_at = graphene.DateTime()
+
+
+def product_id_argument(product_id):
+    if not str(product_id).isdigit():
+        raise WishlistError('Product not found')
+    return int(product_id)
+
+
+class Query(graphene.ObjectType):
+    my_wishlist = graphene.List(WishlistItemType)
+    recently_viewed = graphene.List(RecentlyViewedType, first=graphene.Int())
+
+    def resolve_my_wishlist(self, info):
+        entries = wishlist(current_user_id(info))
+        products = {product.pk: product for product in product_cards([product_id for _, product_id, _ in entries])}
+        return [
+            WishlistItemType(id=pk, product=products[product_id], created_at=from_micros(added_at))
+            for pk, product_id, added_at in entries if product_id in products
+        ]
+
+    def resolve_recently_viewed(self, info, first=None):
+        entries = get_view_history().get(current_user_id(info))
+        if first is not None:
+            if first < 0:
+                raise GraphQLError('first must not be negative')
+            entries = entries[:first]
+        products = {product.pk: product for product in product_cards([product_id for product_id, _ in entries])}
+        return [
+            RecentlyViewedType(id=product_id, product=products[product_id], viewed_at=from_micros(viewed_at))
+            for product_id, viewed_at in entries if product_id in products
+        ]
+
+
+class AddToWishlist(graphene.Mutation):
+    class Arguments:
+        product_id = graphene.ID(required=True)
+
+    wishlist_item = graphene.Field(WishlistItemType)
+    success = graphene.Boolean()
+    message = graphene.String()
+
+    def mutate(self, info, product_id):
+        user_id = current_user_id(info)
+        try:
+            item = add_to_wishlist(user_id, product_id_argument(product_id))
+        except WishlistError as error:
+            return AddToWishlist(success=False, message=str(error))
+        return AddToWishlist(
+            wishlist_item=WishlistItemType(id=item.pk, product=item.product, created_at=item.created_at),
+            success=True, message='Added to wishlist',
+        )
+
+
+class RemoveFromWishlist(graphene.Mutation):
+    class Arguments:
+        product_id = graphene.ID(required=True)
+
+    success = graphene.Boolean()
+    message = graphene.String()
+
+    def mutate(self, info, product_id):
+        user_id = current_user_id(info)
+        try:
+            removed = remove_from_wishlist(user_id, product_id_argument(product_id))
+        except WishlistError as error:
+            return RemoveFromWishlist(success=False, message=str(error))
+        if not removed:
+            return RemoveFromWishlist(success=False, message='Product is not in your wishlist')
+        return RemoveFromWishlist(success=True, message='Removed from wishlist')
+
+
+class Mutation(graphene.ObjectType):
+    add_to_wishlist = AddToWishlist.Field()
+    remove_from_wishlist = RemoveFromWishlist.Field()
@@ -0,0 +1,11 @@
+from django.dispatch import receiver
+
+from products.signals import product_viewed
+
+from .store import get_view_history
+
+
+@receiver(product_viewed)
+def product_viewed_handler(sender, product, user=None, **kwargs):
+    if user is not None and user.is_authenticated:
+        get_view_history().record(user.pk, product.pk)
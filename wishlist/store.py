@@ -0,0 +1,274 @@
+"""
+Wishlists and recently viewed products, read from the cache.
+
+Both are short, recency-ordered lists read on every screen open, so each
+user's list is one cache value: the entries packed into an ``array('q')``
+of 64-bit integers, newest first.  An entry costs 16 or 24 bytes instead of
+a pickled row, and reading a list is one cache get plus one batched product
+query for the cards, however long the list is.
+
+The cache is only used when WISHLIST['CACHE'] names one, which must be
+shared by all workers, e.g. Redis: with a per-process cache the other
+workers would keep serving a changed wishlist, and each would compact its
+own view history over the others'.  Without one, lists are read from the
+rows and views are written to them straight away.
+
+Wishlists are written through: the rows are the source of truth, capped at
+WISHLIST['MAX_ITEMS'], and a change drops the cached list once it commits.
+The next read rebuilds it from the rows.
+
+Recently viewed products are kept the other way round.  A view only rewrites
+the cached list: it moves the product to the front and evicts the oldest
+entry beyond WISHLIST['RECENT_ITEMS'].  Users with changed lists are queued
+per process and compacted to RecentlyViewed rows after
+WISHLIST['FLUSH_DELAY'] seconds.  Compaction keeps exactly the cached
+entries, so the table is bounded per user as well.  Concurrent views by one
+user may drop one of them, and a list evicted before its flush loses its
+latest views; neither matters for a browsing history.
+
+Every cached list expires after WISHLIST['TIMEOUT'] seconds without use,
+and no list grows past its cap, so cache memory is bounded by the number of
+recently active users rather than by all users.
+"""
+
+import threading
+from array import array
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import connection, transaction
+from django.dispatch import receiver
+from django.utils import timezone
+
+from products.models import Product
+
+from .models import RecentlyViewed, WishlistItem
+
+DEFAULTS = {
+    'CACHE': None,
+    'TIMEOUT': 24 * 60 * 60,
+    'MAX_ITEMS': 500,
+    'RECENT_ITEMS': 50,
+    'FLUSH_DELAY': 5.0,
+}
+
+
+class WishlistError(Exception):
+    pass
+
+
+def wishlist_settings():
+    return {**DEFAULTS, **getattr(settings, 'WISHLIST', {})}
+
+
+def get_cache():
+    """The shared cache holding the lists, or None to use the rows only."""
+    name = wishlist_settings()['CACHE']
+    return caches[name] if name else None
+
+
+def to_micros(moment):
+    return int(moment.timestamp() * 1_000_000)
+
+
+def from_micros(micros):
+    return datetime.fromtimestamp(micros / 1_000_000, tz=dt_timezone.utc)
+
+
+def pack(entries):
+    packed = array('q')
+    for entry in entries:
+        packed.extend(entry)
+    return packed.tobytes()
+
+
+def unpack(data, width):
+    packed = array('q')
+    packed.frombytes(data)
+    return [tuple(packed[index:index + width]) for index in range(0, len(packed), width)]
+
+
+def product_cards(product_ids):
+    """Active products for ``product_ids`` in the given order, in one query."""
+    products = Product.objects.filter(is_active=True).select_related('seller').in_bulk(product_ids)
+    return [products[product_id] for product_id in product_ids if product_id in products]
+
+
+def wishlist_key(user_id):
+    return f'wishlist:{user_id}'
+
+
+def wishlist(user_id):
+    """``(item id, product id, added at in microseconds)`` entries, newest first."""
+    cache = get_cache()
+    data = cache.get(wishlist_key(user_id)) if cache is not None else None
+    if data is not None:
+        return unpack(data, 3)
+    config = wishlist_settings()
+    entries = [
+        (pk, product_id, to_micros(created_at))
+        for pk, product_id, created_at in WishlistItem.objects.filter(user_id=user_id)
+        .order_by('-created_at', '-pk').values_list('pk', 'product_id', 'created_at')[:config['MAX_ITEMS']]
+    ]
+    if cache is not None:
+        # add, not set: a change committed meanwhile may already have dropped the key.
+        cache.add(wishlist_key(user_id), pack(entries), config['TIMEOUT'])
+    return entries
+
+
+def _invalidate(user_id):
+    cache = get_cache()
+    if cache is not None:
+        transaction.on_commit(lambda: cache.delete(wishlist_key(user_id)))
+
+
+def add_to_wishlist(user_id, product_id):
+    """The user's WishlistItem for ``product_id``, created unless it exists."""
+    if not Product.objects.filter(pk=product_id, is_active=True).exists():
+        raise WishlistError('Product not found')
+    limit = wishlist_settings()['MAX_ITEMS']
+    with transaction.atomic():
+        item = WishlistItem.objects.filter(user_id=user_id, product_id=product_id).first()
+        if item is not None:
+            return item
+        if WishlistItem.objects.filter(user_id=user_id).count() >= limit:
+            raise WishlistError(f'A wishlist holds at most {limit} products')
+        item, _ = WishlistItem.objects.get_or_create(user_id=user_id, product_id=product_id)
+        _invalidate(user_id)
+    return item
+
+
+def remove_from_wishlist(user_id, product_id):
+    with transaction.atomic():
+        deleted, _ = WishlistItem.objects.filter(user_id=user_id, product_id=product_id).delete()
+        if deleted:
+            _invalidate(user_id)
+    return bool(deleted)
+
+
+class DatabaseViewHistory:
+    """Per-user recently viewed lists kept in RecentlyViewed rows only."""
+
+    def __init__(self, limit):
+        self.limit = limit
+
+    def _rows(self, user_id):
+        return [
+            (product_id, to_micros(viewed_at))
+            for product_id, viewed_at in RecentlyViewed.objects.filter(user_id=user_id)
+            .order_by('-viewed_at', '-pk').values_list('product_id', 'viewed_at')[:self.limit]
+        ]
+
+    def get(self, user_id):
+        """``(product id, viewed at in microseconds)`` entries, newest first."""
+        return self._rows(user_id)
+
+    def record(self, user_id, product_id, moment=None):
+        with transaction.atomic():
+            RecentlyViewed.objects.bulk_create(
+                [RecentlyViewed(user_id=user_id, product_id=product_id, viewed_at=moment or timezone.now())],
+                update_conflicts=True, unique_fields=['user', 'product'], update_fields=['viewed_at'],
+            )
+            stale = RecentlyViewed.objects.filter(user_id=user_id).order_by('-viewed_at', '-pk')[self.limit:]
+            stale_ids = list(stale.values_list('pk', flat=True))
+            if stale_ids:
+                RecentlyViewed.objects.filter(pk__in=stale_ids).delete()
+
+    def flush(self, user_ids=None):
+        pass
+
+
+class CachedViewHistory(DatabaseViewHistory):
+    """Per-user recently viewed lists in the shared cache, compacted to the database on a timer."""
+
+    def __init__(self, cache, timeout, limit, flush_delay):
+        super().__init__(limit)
+        self.cache = cache
+        self.timeout = timeout
+        self.flush_delay = flush_delay
+        self._lock = threading.Lock()
+        self._dirty = set()
+        self._timer = None
+
+    def _key(self, user_id):
+        return f'viewed:{user_id}'
+
+    def get(self, user_id):
+        """``(product id, viewed at in microseconds)`` entries, newest first."""
+        data = self.cache.get(self._key(user_id))
+        if data is not None:
+            return unpack(data, 2)
+        entries = self._rows(user_id)
+        self.cache.add(self._key(user_id), pack(entries), self.timeout)
+        return entries
+
+    def record(self, user_id, product_id, moment=None):
+        micros = to_micros(moment or timezone.now())
+        entries = [entry for entry in self.get(user_id) if entry[0] != product_id]
+        entries.insert(0, (product_id, micros))
+        del entries[self.limit:]
+        self.cache.set(self._key(user_id), pack(entries), self.timeout)
+        with self._lock:
+            self._dirty.add(user_id)
+            if self._timer is None:
+                self._timer = threading.Timer(self.flush_delay, self._flush_in_thread)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self, user_ids=None):
+        """Compact queued lists, or the given users' lists, to RecentlyViewed rows."""
+        with self._lock:
+            if user_ids is None:
+                user_ids, self._dirty = self._dirty, set()
+                self._timer = None
+            else:
+                self._dirty.difference_update(user_ids)
+        found = self.cache.get_many([self._key(user_id) for user_id in user_ids])
+        lists = {user_id: unpack(found[self._key(user_id)], 2) for user_id in user_ids if self._key(user_id) in found}
+        if not lists:
+            return
+        wanted = {product_id for entries in lists.values() for product_id, _ in entries}
+        existing = set(Product.objects.filter(pk__in=wanted).values_list('pk', flat=True))
+        with transaction.atomic():
+            for user_id, entries in lists.items():
+                RecentlyViewed.objects.filter(user_id=user_id).exclude(
+                    product_id__in=[product_id for product_id, _ in entries],
+                ).delete()
+            RecentlyViewed.objects.bulk_create(
+                [
+                    RecentlyViewed(user_id=user_id, product_id=product_id, viewed_at=from_micros(micros))
+                    for user_id, entries in lists.items()
+                    for product_id, micros in entries if product_id in existing
+                ],
+                update_conflicts=True, unique_fields=['user', 'product'], update_fields=['viewed_at'],
+            )
+
+    def _flush_in_thread(self):
+        try:
+            self.flush()
+        finally:
+            connection.close()
+
+
+_history = None
+
+
+def get_view_history():
+    global _history
+    if _history is None:
+        config = wishlist_settings()
+        cache = get_cache()
+        if cache is not None:
+            _history = CachedViewHistory(cache, config['TIMEOUT'], config['RECENT_ITEMS'], config['FLUSH_DELAY'])
+        else:
+            _history = DatabaseViewHistory(config['RECENT_ITEMS'])
+    return _history
+
+
+@receiver(setting_changed)
+def _reset_history(setting, **kwargs):
+    global _history
+    if setting == 'WISHLIST':
+        _history = None
@@ -0,0 +1,75 @@
+from django.conf import settings
+from django.test import override_settings
+
+from src.testing import APITestCase, make_product, make_user
+from wishlist.models import RecentlyViewed
+from wishlist.store import get_view_history
+
+PRODUCT = 'query($id: Int!) { product(id: $id) { id } }'
+RECENTLY_VIEWED = '{ recentlyViewed { product { id } } }'
+MY_WISHLIST = '{ myWishlist { product { id } } }'
+ADD = 'mutation($productId: ID!) { addToWishlist(productId: $productId) { success message } }'
+REMOVE = 'mutation($productId: ID!) { removeFromWishlist(productId: $productId) { success message } }'
+
+
+class WishlistTests(APITestCase):
+    """Without a shared cache: every list is read from and written to the rows."""
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user()
+        self.products = [make_product() for _ in range(3)]
+
+    def view(self, product):
+        self.query(PRODUCT, {'id': product.pk}, user=self.user)
+
+    def viewed(self):
+        get_view_history().flush()
+        return [int(item['product']['id']) for item in self.query(RECENTLY_VIEWED, user=self.user)['recentlyViewed']]
+
+    def change(self, mutation, product):
+        # The cached list is dropped when the change commits.
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.query(mutation, {'productId': product.pk}, user=self.user)
+
+    def wishlisted(self):
+        return [int(item['product']['id']) for item in self.query(MY_WISHLIST, user=self.user)['myWishlist']]
+
+    def test_wishlist_changes_are_read_back(self):
+        first, second, _ = self.products
+        self.assertTrue(self.change(ADD, first)['addToWishlist']['success'])
+        self.assertEqual(self.wishlisted(), [first.pk])
+        self.change(ADD, second)
+        self.assertEqual(self.wishlisted(), [second.pk, first.pk])
+        self.assertTrue(self.change(REMOVE, first)['removeFromWishlist']['success'])
+        self.assertEqual(self.wishlisted(), [second.pk])
+
+    def test_recently_viewed_newest_first(self):
+        first, second, third = self.products
+        for product in (first, second, third, first):
+            self.view(product)
+        self.assertEqual(self.viewed(), [first.pk, third.pk, second.pk])
+        self.assertEqual(RecentlyViewed.objects.filter(user=self.user).count(), 3)
+
+    def test_recently_viewed_is_capped(self):
+        with self.settings(WISHLIST={**settings.WISHLIST, 'RECENT_ITEMS': 2}):
+            for product in self.products:
+                self.view(product)
+            self.assertEqual(self.viewed(), [self.products[2].pk, self.products[1].pk])
+        self.assertEqual(RecentlyViewed.objects.filter(user=self.user).count(), 2)
+
+    def test_views_are_written(self):
+        self.view(self.products[0])
+        # At once, so every worker reads it.
+        self.assertTrue(RecentlyViewed.objects.filter(user=self.user, product=self.products[0]).exists())
+
+
+@override_settings(WISHLIST={**settings.WISHLIST, 'CACHE': 'default'})
+class CachedWishlistTests(WishlistTests):
+    """With a shared cache: lists are cached and views compacted to the rows."""
+
+    def test_views_are_written(self):
+        self.view(self.products[0])
+        self.assertFalse(RecentlyViewed.objects.filter(user=self.user).exists())
+        get_view_history().flush()
+        self.assertTrue(RecentlyViewed.objects.filter(user=self.user, product=self.products[0]).exists())